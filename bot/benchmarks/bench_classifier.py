@@ -0,0 +1,59 @@
+"""
+Микробенчмарк классификатора: поштучный classify против classify_batch
+
+Запуск из корня репозитория:
+    python bot/benchmarks/bench_classifier.py --model models/fasttext_news_classifier.bin
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rss_parser import NewsClassifier
+
+
+def load_items(dump_path: str, limit: int = 0):
+    with open(dump_path, "r", encoding="utf-8") as f:
+        news_data = json.load(f)
+    items = [(item["title"], item["content"]) for item in news_data]
+    return items[:limit] if limit else items
+
+
+def bench(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/fasttext_news_classifier.bin")
+    parser.add_argument("--dump", default="news_dump.json")
+    parser.add_argument("--limit", type=int, default=0, help="Ограничить количество новостей")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество повторов (берётся лучший)")
+    args = parser.parse_args()
+
+    classifier = NewsClassifier(args.model)
+    items = load_items(args.dump, args.limit)
+
+    single = bench(lambda: [classifier.classify(title, content) for title, content in items], args.repeat)
+    batch = bench(lambda: classifier.classify_batch(items), args.repeat)
+
+    single_results = [classifier.classify(title, content) for title, content in items]
+    batch_results = classifier.classify_batch(items)
+    mismatches = sum(1 for a, b in zip(single_results, batch_results) if a[0] != b[0])
+
+    print(f"Новостей: {len(items)}")
+    print(f"classify:       {single * 1000:8.1f} мс  ({len(items) / single:8.0f} новостей/с)")
+    print(f"classify_batch: {batch * 1000:8.1f} мс  ({len(items) / batch:8.0f} новостей/с)")
+    print(f"Ускорение: x{single / batch:.2f}, расхождений в категориях: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Бенчмарк поиска похожих новостей по плотным векторам: точный перебор против IVF
+
+Корпус синтетический: векторы размерности --dim (как у fastText), собранные
+вокруг случайных «тем», чтобы у каждой новости были близкие соседи. Векторы
+пишутся во временный VectorStore (memory-map, как в боте), затем строятся
+списки IVF. Запросы — зашумлённые векторы случайных новостей корпуса.
+recall@10 — доля точных 10 ближайших (перебор) среди 10 найденных через IVF.
+
+Запуск из корня репозитория:
+    python bot/benchmarks/bench_dense_search.py --sizes 100000 1000000 --nprobe 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.dense_index import IVFIndex, VectorStore, normalize_rows, search_vectors
+
+
+def build_store(path: str, size: int, dim: int, topics: int, rng, batch_size: int = 100_000) -> VectorStore:
+    centers = normalize_rows(rng.standard_normal((topics, dim)))
+    store = VectorStore(path, dim)
+    for start in range(0, size, batch_size):
+        count = min(batch_size, size - start)
+        labels = rng.integers(0, topics, count)
+        vectors = centers[labels] + 1.0 * rng.standard_normal((count, dim)).astype(np.float32) / np.sqrt(dim)
+        store.append(
+            vectors,
+            np.arange(start + 1, start + count + 1, dtype=np.int64),
+            np.full(count, "general", dtype="U16"),
+            np.arange(start + 1, start + count + 1, dtype=np.int64)
+        )
+    return store
+
+
+def percentiles(latencies):
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--dim", type=int, default=100)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'размер':>8} {'поиск':<14} {'построение, с':>14} {'p50/p99, мс':>18} {'recall@10':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = build_store(tmp_dir, size, args.dim, args.topics, rng)
+            sources = rng.choice(size, args.queries, replace=False)
+            queries = normalize_rows(
+                np.asarray(store.vectors[np.sort(sources)])
+                + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32) / np.sqrt(args.dim)
+            )
+
+            exact, latencies = [], []
+            for query in queries:
+                started = time.perf_counter()
+                rows, _ = search_vectors(store.vectors, query, args.top_n)
+                latencies.append(time.perf_counter() - started)
+                exact.append(set(rows.tolist()))
+            p50, p99 = percentiles(latencies)
+            print(f"{size:>8} {'перебор':<14} {'-':>14} {p50:>8.2f} / {p99:<7.2f} {1.0:>10.3f}")
+
+            started = time.perf_counter()
+            ivf = IVFIndex.build(store.vectors)
+            build_seconds = time.perf_counter() - started
+            for nprobe in args.nprobe:
+                latencies, recalls = [], []
+                for query, expected in zip(queries, exact):
+                    started = time.perf_counter()
+                    rows, _ = search_vectors(store.vectors, query, args.top_n, ivf=ivf, nprobe=nprobe)
+                    latencies.append(time.perf_counter() - started)
+                    recalls.append(len(expected & set(rows.tolist())) / len(expected))
+                p50, p99 = percentiles(latencies)
+                name = f"IVF {ivf.nlist}/{nprobe}"
+                print(f"{size:>8} {name:<14} {build_seconds:>14.2f} {p50:>8.2f} / {p99:<7.2f} {np.mean(recalls):>10.3f}")
+            del store
+
+
+if __name__ == "__main__":
+    main()
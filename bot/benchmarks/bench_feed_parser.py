@@ -0,0 +1,122 @@
+"""
+Бенчмарк разбора фидов: feedparser против потокового парсера (utils.feed_stream)
+
+Без --feed строит синтетический полнотекстовый RSS (в стиле RBC full.rss)
+из news_dump.json. Замеряются полный разбор и типичный цикл опроса, когда
+новых записей в начале фида всего несколько (--new) и разбор останавливается
+на курсоре.
+
+Запуск из корня репозитория:
+    python bot/benchmarks/bench_feed_parser.py
+    python bot/benchmarks/bench_feed_parser.py --feed feed1.xml --feed feed2.xml
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser
+
+from utils.feed_cursor import entry_guid
+from utils.feed_stream import iter_feed_entries
+
+
+def build_full_text_feed(dump_path: str, copies: int) -> bytes:
+    """RSS с rbc_news:full-text: каждая новость дампа повторена copies раз"""
+    with open(dump_path, "r", encoding="utf-8") as f:
+        news_data = json.load(f)
+
+    started = datetime(2025, 11, 12, 18, 0, 0)
+    items = []
+    for i in range(len(news_data) * copies):
+        item = news_data[i % len(news_data)]
+        published = format_datetime(started - timedelta(minutes=i)).replace("-0000", "+0000")
+        full_text = " ".join([item["content"]] * 8)
+        items.append(
+            "<item>"
+            f"<title>{escape(item['title'])}</title>"
+            f"<link>{escape(item['source_url'])}?n={i}</link>"
+            f"<guid>{escape(item['source_url'])}?n={i}</guid>"
+            f"<pubDate>{published}</pubDate>"
+            f"<description><![CDATA[<p>{item['content']}</p>]]></description>"
+            f"<rbc_news:full-text><![CDATA[<p>{full_text}</p>]]></rbc_news:full-text>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<rss version="2.0" xmlns:rbc_news="https://www.rbc.ru">'
+        "<channel><title>bench</title><link>https://example.com/</link>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def bench(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def check_equivalence(content: bytes) -> int:
+    """Количество записей, у которых поля потокового парсера расходятся с feedparser"""
+    expected = feedparser.parse(content).entries
+    actual = list(iter_feed_entries(content))
+    if len(expected) != len(actual):
+        return abs(len(expected) - len(actual))
+
+    mismatches = 0
+    for a, b in zip(expected, actual):
+        if (
+            a.get("title", "").strip() != b.get("title", "").strip()
+            or a.get("link", "") != b.get("link", "")
+            or entry_guid(a) != entry_guid(b)
+            or tuple(a.get("published_parsed") or ())[:6] != tuple(b.get("published_parsed") or ())[:6]
+        ):
+            mismatches += 1
+    return mismatches
+
+
+def run(name: str, content: bytes, new_items: int, repeat: int):
+    entries = list(iter_feed_entries(content))
+    stop_guid = entry_guid(entries[min(new_items, len(entries) - 1)]) if entries else None
+
+    full_feedparser = bench(lambda: feedparser.parse(content), repeat)
+    full_stream = bench(lambda: list(iter_feed_entries(content)), repeat)
+    cursor_stream = bench(lambda: list(iter_feed_entries(content, stop_guid=stop_guid)), repeat)
+
+    print(f"{name}: {len(content) / 2**20:.1f} МБ, записей: {len(entries)}, "
+          f"расхождений с feedparser: {check_equivalence(content)}")
+    print(f"  feedparser, весь фид:        {full_feedparser * 1000:8.1f} мс")
+    print(f"  streaming, весь фид:         {full_stream * 1000:8.1f} мс  (x{full_feedparser / full_stream:.1f})")
+    print(f"  streaming, {new_items:3d} новых до курсора: {cursor_stream * 1000:8.1f} мс  "
+          f"(x{full_feedparser / cursor_stream:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feed", action="append", default=[], help="Локальный файл фида (можно несколько)")
+    parser.add_argument("--dump", default="news_dump.json")
+    parser.add_argument("--copies", type=int, default=3, help="Размножение дампа в синтетическом фиде")
+    parser.add_argument("--new", type=int, default=5, help="Сколько записей считать новыми")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество повторов (берётся лучший)")
+    args = parser.parse_args()
+
+    if args.feed:
+        for path in args.feed:
+            with open(path, "rb") as f:
+                run(os.path.basename(path), f.read(), args.new, args.repeat)
+    else:
+        run("synthetic full-text RSS", build_full_text_feed(args.dump, args.copies), args.new, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
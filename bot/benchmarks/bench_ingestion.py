@@ -0,0 +1,148 @@
+"""
+Бенчмарк всего конвейера загрузки новостей без обращения к реальным сайтам
+
+Фиды отдаёт локальный FeedReplayServer: из записанных фикстур
+(python bot/manage.py record-feeds) или из синтетических, построенных по
+news_dump.json. Новости пишутся во временную SQLite базу (или в
+--database-url). Выводятся записей/с и время этапов: fetch, parse, clean,
+dedup, classify, insert и cluster (истории). Второй цикл показывает
+повторный опрос, когда фиды не изменились (ответы 304).
+
+Запуск из корня репозитория:
+    python bot/benchmarks/bench_ingestion.py --model models/fasttext_news_classifier.bin
+    python bot/benchmarks/bench_ingestion.py --fixtures fixtures/feeds --latency 0.2 --no-classifier
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, News, NewsCategory
+from utils.feed_registry import DEFAULT_RSS_SOURCES
+from utils.feed_replay import FeedReplayServer, write_fixture
+from utils.rss_parser import NewsClassifier, parse_multiple_rss_sources_async
+from utils.story_clustering import StoryIndex
+
+
+STAGES = ["fetch", "parse", "clean", "dedup", "classify", "insert", "cluster"]
+
+
+def build_synthetic_fixtures(dump_path: str, fixtures_dir: str, copies: int = 1):
+    """Раскладывает новости дампа по источникам DEFAULT_RSS_SOURCES в виде полнотекстовых RSS"""
+    with open(dump_path, "r", encoding="utf-8") as f:
+        news_data = json.load(f)
+
+    now = datetime.utcnow()
+    items_by_source = {source["name"]: [] for source in DEFAULT_RSS_SOURCES}
+    for i in range(len(news_data) * copies):
+        item = news_data[i % len(news_data)]
+        source = DEFAULT_RSS_SOURCES[i % len(DEFAULT_RSS_SOURCES)]
+        published = format_datetime(now - timedelta(minutes=i)).replace("-0000", "+0000")
+        link = escape(f"{item['source_url']}?copy={i // len(news_data)}")
+        items_by_source[source["name"]].append(
+            "<item>"
+            f"<title>{escape(item['title'])}</title>"
+            f"<link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>{published}</pubDate>"
+            f"<description><![CDATA[<p>{item['summary'] or item['content'][:300]}</p>]]></description>"
+            f"<rbc_news:full-text><![CDATA[<p>{item['content']}</p>]]></rbc_news:full-text>"
+            "</item>"
+        )
+
+    for source in DEFAULT_RSS_SOURCES:
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<rss version="2.0" xmlns:rbc_news="https://www.rbc.ru"><channel>'
+            f"<title>{escape(source['name'])}</title><link>{escape(source['url'])}</link>"
+            + "".join(items_by_source[source["name"]])
+            + "</channel></rss>"
+        ).encode("utf-8")
+        write_fixture(fixtures_dir, source, body, {
+            "content-type": "application/rss+xml; charset=utf-8",
+            "etag": f'"{len(body)}"'
+        })
+
+
+def run_cycle(sources, session, classifier, args):
+    timings = {}
+    started = time.perf_counter()
+    results = asyncio.run(parse_multiple_rss_sources_async(
+        sources=sources,
+        session=session,
+        News=News,
+        NewsCategory=NewsCategory,
+        classifier=classifier,
+        hours_filter=24 * 365 * 10,
+        story_index=StoryIndex(),
+        cascade_threshold=args.cascade_threshold,
+        parser_backend=args.parser_backend,
+        stage_timings=timings
+    ))
+    wall = time.perf_counter() - started
+    return sum(len(added) for added in results.values()), wall, timings
+
+
+def report(title: str, added: int, wall: float, timings):
+    print(f"\n{title}: добавлено {added} новостей за {wall:.2f} с ({added / wall if wall else 0:.0f} записей/с)")
+    for stage in STAGES:
+        seconds = timings.get(stage, 0.0)
+        note = "  (сумма по источникам, запросы параллельны)" if stage == "fetch" else ""
+        print(f"  {stage:9s} {seconds * 1000:9.1f} мс{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="Каталог записанных фикстур (по умолчанию синтетические из дампа)")
+    parser.add_argument("--dump", default="news_dump.json")
+    parser.add_argument("--copies", type=int, default=1, help="Размножение дампа в синтетических фикстурах")
+    parser.add_argument("--database-url", help="БД для записи (по умолчанию временная SQLite)")
+    parser.add_argument("--model", default="models/fasttext_news_classifier.bin")
+    parser.add_argument("--no-classifier", action="store_true", help="Без модели: всем источникам фикс. категория")
+    parser.add_argument("--cascade-threshold", type=float, help="Порог каскадной классификации")
+    parser.add_argument("--parser-backend", default="feedparser", choices=["feedparser", "streaming"])
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа сервера, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixtures_dir = args.fixtures
+        if not fixtures_dir:
+            fixtures_dir = os.path.join(tmp_dir, "fixtures")
+            build_synthetic_fixtures(args.dump, fixtures_dir, args.copies)
+
+        engine = create_engine(args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'bench.sqlite')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        server = FeedReplayServer(fixtures_dir, latency=args.latency, error_rate=args.error_rate).start()
+        sources = server.sources()
+        classifier = None
+        if args.no_classifier:
+            sources = [dict(source, fixed_category=source.get("fixed_category", "SOCIETY")) for source in sources]
+        else:
+            classifier = NewsClassifier(args.model, lazy=False)
+
+        print(f"Источников: {len(sources)}, сервер: {server.base_url}, парсер: {args.parser_backend}")
+        try:
+            report("Первый цикл", *run_cycle(sources, session, classifier, args))
+            report("Повторный цикл (фиды не изменились)", *run_cycle(sources, session, classifier, args))
+        finally:
+            server.stop()
+            session.close()
+            engine.dispose()
+        print(f"\nОтветы сервера: {server.counters}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Бенчмарк поиска /search: LIKE по базе против BM25 индекса в памяти (KeywordSearchEngine)
+
+Корпус — news_dump.json, размноженный до нужного размера во временной
+SQLite базе. Запросы — слова и пары слов из текстов дампа. Эталон для
+полноты — новости, в тексте которых запрос встречается как подстрока
+(то, что находит LIKE); recall@10 — доля эталонных новостей в первых
+10 результатах BM25 (от min(10, число эталонных)).
+
+Запуск из корня репозитория:
+    python bot/benchmarks/bench_keyword_search.py --sizes 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, News, NewsCategory
+from utils.search_news import KeywordSearchEngine, search_news_by_keyword
+
+
+def build_corpus(session, news_data, size: int):
+    rows = []
+    for i in range(size):
+        item = news_data[i % len(news_data)]
+        rows.append({
+            "title": f"{item['title']} #{i // len(news_data)}"[:300],
+            "content": item["content"],
+            "category": NewsCategory(item["category"]),
+            "category_confidence": item["category_confidence"],
+            "source_name": item["source_name"],
+            "created_at": datetime.utcnow()
+        })
+    for start in range(0, len(rows), 5000):
+        session.execute(insert(News), rows[start:start + 5000])
+    session.commit()
+
+
+def make_queries(news_data, count: int):
+    queries = []
+    while len(queries) < count:
+        words = [word.strip('.,:;«»"()!?') for word in random.choice(news_data)["content"].split()]
+        words = [word for word in words if len(word) > 4 and word.isalpha() and word.islower()]
+        if not words:
+            continue
+        start = random.randrange(len(words))
+        queries.append(" ".join(words[start:start + random.choice([1, 1, 2])]))
+    return queries
+
+
+def percentiles(latencies):
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dump", default="news_dump.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.dump, "r", encoding="utf-8") as f:
+        news_data = json.load(f)
+
+    random.seed(0)
+    queries = make_queries(news_data, args.queries)
+    print(f"{'размер':>8} {'индекс, с':>10} {'LIKE p50/p99, мс':>20} {'BM25 p50/p99, мс':>20} {'recall@10':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'search.sqlite')}")
+            Base.metadata.create_all(engine)
+            session = sessionmaker(bind=engine)()
+            build_corpus(session, news_data, size)
+
+            started = time.perf_counter()
+            keyword_engine = KeywordSearchEngine()
+            keyword_engine.fit(session)
+            build_seconds = time.perf_counter() - started
+
+            texts = {
+                row.id: f"{row.title} {row.content}".lower()
+                for row in session.query(News.id, News.title, News.content)
+            }
+
+            like_latencies, bm25_latencies, recalls = [], [], []
+            for query in queries:
+                session.expunge_all()
+                started = time.perf_counter()
+                search_news_by_keyword(session, query, limit=args.limit)
+                like_latencies.append(time.perf_counter() - started)
+
+                session.expunge_all()
+                started = time.perf_counter()
+                found = keyword_engine.search(session, query, limit=args.limit)
+                bm25_latencies.append(time.perf_counter() - started)
+
+                relevant = {news_id for news_id, text in texts.items() if query in text}
+                if relevant:
+                    hits = sum(1 for news in found[:10] if news.id in relevant)
+                    recalls.append(hits / min(10, len(relevant)))
+
+            like_p50, like_p99 = percentiles(like_latencies)
+            bm25_p50, bm25_p99 = percentiles(bm25_latencies)
+            print(f"{size:>8} {build_seconds:>10.2f} {like_p50:>9.2f} / {like_p99:<8.2f} "
+                  f"{bm25_p50:>9.2f} / {bm25_p99:<8.2f} {np.mean(recalls):>10.3f}")
+            session.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
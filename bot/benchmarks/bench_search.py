@@ -0,0 +1,148 @@
+"""
+Бенчмарк NewsSearchEngine: задержка find_similar / search_by_text от размера корпуса
+
+Сравнивается прежняя схема (полный argsort и session.get на каждого
+кандидата, затем фильтр категории в Python) с текущей (маски на векторе
+оценок, argpartition и одна загрузка WHERE id IN). Корпус — news_dump.json,
+размноженный до нужного размера во временной SQLite базе.
+
+Запуск из корня репозитория:
+    python bot/benchmarks/bench_search.py --sizes 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, News, NewsCategory
+from utils.search_news import NewsSearchEngine
+
+
+def build_corpus(session, news_data, size: int):
+    rows = []
+    for i in range(size):
+        item = news_data[i % len(news_data)]
+        rows.append({
+            "title": f"{item['title']} #{i // len(news_data)}"[:300],
+            "content": item["content"],
+            "category": NewsCategory(item["category"]),
+            "category_confidence": item["category_confidence"],
+            "source_name": item["source_name"],
+            "created_at": datetime.utcnow()
+        })
+    for start in range(0, len(rows), 5000):
+        session.execute(insert(News), rows[start:start + 5000])
+    session.commit()
+
+
+def legacy_find_similar(engine, news, session, top_n=10):
+    """Прежняя реализация: полный argsort, session.get на каждого кандидата"""
+    query_vector = engine.vectorizer.transform([f"{news.title} {news.content}"])
+    similarities = cosine_similarity(query_vector, engine.news_vectors)[0]
+    results = []
+    for idx in np.argsort(similarities)[::-1]:
+        news_id = int(engine.news_ids[idx])
+        if news_id == news.id:
+            continue
+        similar_news = session.get(News, news_id)
+        if not similar_news:
+            continue
+        if news.story_id and similar_news.story_id == news.story_id:
+            continue
+        results.append((similar_news, float(similarities[idx])))
+        if len(results) >= top_n:
+            break
+    # Обработчик кнопки оставлял 3 новости той же категории
+    return [item for item in results if item[0].category == news.category][:3]
+
+
+def legacy_search_by_text(engine, query_text, session, top_n=10, category=None):
+    query_vector = engine.vectorizer.transform([query_text])
+    similarities = cosine_similarity(query_vector, engine.news_vectors)[0]
+    results = []
+    for idx in np.argsort(similarities)[::-1][:top_n * 2]:
+        similar_news = session.get(News, int(engine.news_ids[idx]))
+        if not similar_news or (category and similar_news.category != category):
+            continue
+        if similarities[idx] > 0.1:
+            results.append((similar_news, float(similarities[idx])))
+        if len(results) >= top_n:
+            break
+    return results
+
+
+def measure(func, calls, session):
+    latencies = []
+    found = 0
+    for args in calls:
+        session.expunge_all()
+        started = time.perf_counter()
+        found += len(func(*args))
+        latencies.append(time.perf_counter() - started)
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dump", default="news_dump.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=50, help="Запросов на каждый размер")
+    args = parser.parse_args()
+
+    with open(args.dump, "r", encoding="utf-8") as f:
+        news_data = json.load(f)
+
+    random.seed(0)
+    print(f"{'размер':>8} {'операция':<28} {'было p50/p99, мс':>20} {'стало p50/p99, мс':>20} {'найдено':>16}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'search.sqlite')}")
+            Base.metadata.create_all(engine)
+            session = sessionmaker(bind=engine)()
+            build_corpus(session, news_data, size)
+
+            search_engine = NewsSearchEngine()
+            search_engine.fit(session)
+
+            sample_ids = random.sample(range(1, size + 1), min(args.queries, size))
+            targets = [session.get(News, news_id) for news_id in sample_ids]
+            similar_legacy = [(search_engine, news, session) for news in targets]
+            similar_new = [(news, session, 3, False, news.category) for news in targets]
+            # Запросы — начала заголовков дампа
+            text_calls = [" ".join(random.choice(news_data)["title"].split()[:4]) for _ in range(args.queries)]
+            categories = [random.choice(list(NewsCategory)) for _ in range(args.queries)]
+
+            rows = [
+                ("find_similar (та же категория)",
+                 measure(legacy_find_similar, similar_legacy, session),
+                 measure(search_engine.find_similar, similar_new, session)),
+                ("search_by_text",
+                 measure(lambda q: legacy_search_by_text(search_engine, q, session), [(q,) for q in text_calls], session),
+                 measure(lambda q: search_engine.search_by_text(q, session), [(q,) for q in text_calls], session)),
+                ("search_by_text + категория",
+                 measure(lambda q, c: legacy_search_by_text(search_engine, q, session, category=c),
+                         list(zip(text_calls, categories)), session),
+                 measure(lambda q, c: search_engine.search_by_text(q, session, category=c),
+                         list(zip(text_calls, categories)), session)),
+            ]
+            for name, (old_p50, old_p99, old_found), (new_p50, new_p99, new_found) in rows:
+                print(f"{size:>8} {name:<28} {old_p50:>9.2f} / {old_p99:<8.2f} {new_p50:>9.2f} / {new_p99:<8.2f} "
+                      f"{old_found:>7} -> {new_found:<7}")
+            session.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Бенчмарк очистки текста: прежние clean_html / preprocess_classifier_text
+(четыре прохода регулярных выражений) против utils.text_normalizer
+
+Перед замером проверяется, что результаты совпадают посимвольно на всём
+корпусе и на наборе пограничных случаев (check_equivalence): при первом же
+расхождении поднимается AssertionError и замер не выполняется.
+
+Запуск из корня репозитория:
+    python bot/benchmarks/bench_text_normalizer.py
+    python bot/benchmarks/bench_text_normalizer.py --check-only
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from html import unescape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_normalizer import clean_html, preprocess_classifier_text
+
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "plain title",
+    "  leading and\ttrailing\n",
+    "<p>tag</p><br/>text",
+    "a<b>b</b>c",
+    "<div><p>nested <b><i>deep</i></b></p></div>",
+    "<<b>>double brackets<</b>>",
+    "text before <b unterminated tag",
+    "<p>unterminated at the end <",
+    "<a title=\"x > y\">attribute with gt</a>",
+    "<!-- comment --> after comment",
+    "<![CDATA[<p>inside &amp; cdata</p>]]>",
+    "<![CDATA[one]]> and <![CDATA[two]]>",
+    "<![CDATA[<![CDATA[nested]]>]]>",
+    "<![CDATA[unclosed <b>bold</b>",
+    "<![CDATA[]]>",
+    "stray ]]> marker",
+    "&nbsp;&nbsp;nbsp&nbsp;",
+    "&laquo;Цитата&raquo; &mdash; автор",
+    "&amp;lt;not a tag&amp;gt;",
+    "&amp;lt;b&amp;gt;bold&amp;lt;/b&amp;gt;",
+    "&lt;b&gt;escaped tag&lt;/b&gt;",
+    "&ampfoo &#1049;&#x439; &#0; &unknown;",
+    "&#65;&#x41;&#X41;&#128512; &#x110000; &#xD800; &#9;tab",
+    "&AMP; &Amp; &amp &lt &copy2024",
+    "&#32;&#160;&#x3000; entity whitespace",
+    "a &lt;b&gt; c",
+    "1 < 2 and 3 > 2",
+    "<a href=\"http://example.com/?a=1&b=2\">ссылка</a>",
+    "line\u2028separator\xa0nbsp\u3000ideographic\x1c",
+    "ЁЛКИ www.example.com и http://example.com/path?x=1 конец",
+]
+
+
+def legacy_clean_html(html_text: str) -> str:
+    if not html_text:
+        return ""
+    text = re.sub(r'<!\[CDATA\[(.*?)\]\]>', r'\1', html_text, flags=re.DOTALL)
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = unescape(text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def legacy_preprocess_classifier_text(title: str, content: str) -> str:
+    text = f"{title} {title} {content}".lower()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return re.sub(r'http\S+|www.\S+', '', text)
+
+
+def build_corpus(dump_path: str):
+    """Тексты в том виде, в каком они приходят из RSS: заголовок, описание и полный текст с разметкой"""
+    with open(dump_path, "r", encoding="utf-8") as f:
+        news_data = json.load(f)
+
+    texts = []
+    for item in news_data:
+        content = item["content"].replace("«", "&laquo;").replace("»", "&raquo;")
+        paragraphs = content.replace(". ", ".</p>\n<p>&nbsp;")
+        texts.append(item["title"])
+        texts.append(f"<p>{paragraphs}</p>")
+        texts.append(f"<div class=\"article\"><p>{paragraphs}</p>" + f"<p><b>{content}</b></p>" * 4 + "</div>")
+    return texts
+
+
+def check_equivalence(samples):
+    """
+    Сравнивает clean_html и preprocess_classifier_text с прежней реализацией
+
+    Raises:
+        AssertionError: при первом расхождении (с текстом и обоими результатами)
+    """
+    for text in samples:
+        expected, actual = legacy_clean_html(text), clean_html(text)
+        assert actual == expected, f"clean_html({text[:80]!r}): {actual[:80]!r} != {expected[:80]!r}"
+
+    pairs = list(zip(samples[::2], samples[1::2]))
+    pairs += [(legacy_clean_html(title), legacy_clean_html(content)) for title, content in pairs]
+    for title, content in pairs:
+        expected = legacy_preprocess_classifier_text(title, content)
+        actual = preprocess_classifier_text(title, content)
+        assert actual == expected, (
+            f"preprocess_classifier_text({title[:40]!r}, {content[:40]!r}): {actual[:80]!r} != {expected[:80]!r}"
+        )
+
+
+def bench(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dump", default="news_dump.json")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество повторов (берётся лучший)")
+    parser.add_argument("--check-only", action="store_true", help="Только проверка совпадения результатов")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.dump)
+    check_equivalence(EDGE_CASES)
+    check_equivalence(corpus)
+    print(f"✅ Результаты совпадают: {len(corpus)} текстов ({sum(len(text) for text in corpus) / 2**20:.1f} МБ), "
+          f"пограничных случаев: {len(EDGE_CASES)}")
+    if args.check_only:
+        return
+
+    def legacy_pipeline():
+        cleaned = [legacy_clean_html(text) for text in corpus]
+        return [legacy_preprocess_classifier_text(t, c) for t, c in zip(cleaned[::3], cleaned[2::3])]
+
+    def new_pipeline():
+        cleaned = [clean_html(text) for text in corpus]
+        return [preprocess_classifier_text(t, c) for t, c in zip(cleaned[::3], cleaned[2::3])]
+
+    legacy_clean = bench(lambda: [legacy_clean_html(text) for text in corpus], args.repeat)
+    new_clean = bench(lambda: [clean_html(text) for text in corpus], args.repeat)
+    legacy_total = bench(legacy_pipeline, args.repeat)
+    new_total = bench(new_pipeline, args.repeat)
+
+    print(f"clean_html:               {legacy_clean * 1000:7.1f} мс -> {new_clean * 1000:7.1f} мс "
+          f"(x{legacy_clean / new_clean:.2f}, {len(corpus) / new_clean:8.0f} текстов/с)")
+    print(f"clean_html + preprocess:  {legacy_total * 1000:7.1f} мс -> {new_total * 1000:7.1f} мс "
+          f"(x{legacy_total / new_total:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
+import asyncio
 from maxapi import Router, F
 from maxapi.types import MessageCallback, MessageCreated, Command
 from maxapi.utils.inline_keyboard import InlineKeyboardBuilder
 from maxapi.types import CallbackButton
 from maxapi.bot import ParseMode
 from sqlalchemy.orm import Session
-from models import User, News, ReactionType
+from models import User, News, NewsNeighbor, ReactionType
 from utils.recomendation import get_recommended_news, process_user_reaction
-from utils.search_news import NewsSearchEngine, search_news_by_keyword
+from utils.search_news import NewsSearchEngine, KeywordSearchEngine, hydrate_ranked, keyword_search_ids
+from utils.search_cache import SearchResultCache
+from utils.news_neighbors import get_neighbors
 from typing import Optional
 import logging
 from datetime import datetime, timedelta
@@ -16,10 +19,21 @@ logger = logging.getLogger(__name__)
 
 
 class NewsManager:
-    def __init__(self, bot, db_session: Session, search_engine: NewsSearchEngine):
+    def __init__(
+        self,
+        bot,
+        db_session: Session,
+        search_engine: NewsSearchEngine,
+        keyword_engine: Optional[KeywordSearchEngine] = None,
+        search_cache: Optional[SearchResultCache] = None
+    ):
         self.bot = bot
         self.db_session = db_session
         self.search_engine = search_engine
+        # BM25 индекс в памяти для /search; без него поиск идёт через БД
+        self.keyword_engine = keyword_engine
+        # Кэш id и оценок /search; сбрасывается загрузкой новостей (ParseHandler)
+        self.search_cache = search_cache
         self.user_news_cache = {}
         self.user_score_cache_time = {}
         self.router = Router()
@@ -122,13 +136,18 @@ class NewsManager:
             await callback.answer("⚠️ Новость не найдена")
             return
         try:
-            similar_news_list = self.search_engine.find_similar(
-                news=news,
-                session=self.db_session,
-                top_n=10,
-                exclude_same_category=False
-            )
-            similar_news_list = [sn for sn, score in similar_news_list if sn.category == news.category][:3]
+            # Соседи считаются заранее при загрузке; живой поиск — только если их ещё нет
+            similar_news_list = get_neighbors(self.db_session, News, NewsNeighbor, news.id, limit=3)
+            if similar_news_list is None:
+                # Поиск (и расчёт вектора у векторного поиска) — в потоке, без сессии бота;
+                # поля news уже загружены запросом выше
+                found = await asyncio.to_thread(
+                    self.search_engine.similar_ids,
+                    news,
+                    top_n=3,
+                    category=news.category
+                )
+                similar_news_list = [sn for sn, score in hydrate_ranked(self.db_session, found)]
         except Exception as e:
             logger.error(f"Ошибка поиска похожих новостей: {e}")
             await callback.answer("⚠️ Ошибка при поиске")
@@ -233,7 +252,11 @@ class NewsManager:
             await self.bot.send_message(chat_id, text="⚠️ Пожалуйста, укажите текст для поиска после команды.", parse_mode=ParseMode.MARKDOWN)
             return
         
-        found_news = search_news_by_keyword(session=self.db_session, keyword=keyword, limit=10)
+        if self.search_cache is not None:
+            found = self.search_cache.search(keyword, limit=10)
+        else:
+            found = keyword_search_ids(self.db_session, self.keyword_engine, keyword, limit=10)
+        found_news = [news for news, _ in hydrate_ranked(self.db_session, found)]
 
         if not found_news:
             await self.bot.send_message(chat_id, text=f"😔 По запросу «{keyword}» новостей не найдено.", parse_mode=ParseMode.MARKDOWN)
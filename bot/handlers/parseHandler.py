@@ -1,41 +1,119 @@
+import asyncio
+import os
+from typing import Callable, Optional
 from sqlalchemy.orm import Session
-from utils.rss_parser import NewsClassifier
-from utils.rss_parser import parse_multiple_rss_sources
-from models import News, NewsCategory
+from utils.rss_parser import parse_multiple_rss_sources_async
+from utils.classifier_service import ClassifierPool
+from utils.classification_cache import CachedClassifier
+from utils.story_clustering import StoryIndex
+from utils.feed_registry import sync_feed_sources, get_due_sources, record_poll_results
+from utils.feed_replay import replay_sources
+from utils.search_news import NewsSearchEngine, KeywordSearchEngine
+from utils.search_cache import SearchResultCache
+from utils.news_neighbors import update_neighbors
+from models import News, NewsCategory, NewsNeighbor
 class ParseHandler:
-    def __init__(self, db_session: Session):
-        self.db_session = db_session
-        self.classifier = NewsClassifier("/app/models/fasttext_news_classifier.bin")
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        search_engine: Optional[NewsSearchEngine] = None,
+        keyword_engine: Optional[KeywordSearchEngine] = None,
+        search_cache: Optional[SearchResultCache] = None
+    ):
+        # Цикл загрузки работает в рабочих потоках: у каждого цикла своя сессия,
+        # сессию обработчиков бота (event loop) в потоки не передаём
+        self.session_factory = session_factory
+        # Новые новости сразу попадают в поисковые индексы отдельным сегментом
+        self.search_engine = search_engine
+        self.keyword_engine = keyword_engine
+        # Кэш /search сбрасывается после загрузки; частые запросы пересчитываются сразу
+        self.search_cache = search_cache
+        self.search_cache_prewarm = int(os.getenv("SEARCH_CACHE_PREWARM", "20"))
+        model_path = os.getenv("CLASSIFIER_MODEL_PATH", "/app/models/fasttext_news_classifier.bin")
+        # Модель живёт в процессах-воркерах, а не в процессе бота;
+        # на повторяющиеся тексты отвечает кэш без обращения к воркерам
+        self.classifier = CachedClassifier(
+            ClassifierPool(
+                model_path,
+                idle_unload_seconds=float(os.getenv("CLASSIFIER_IDLE_UNLOAD_SECONDS", "0")) or None
+            ),
+            model_path,
+            persist_path=os.getenv("CLASSIFIER_CACHE_PATH") or None,
+            save_interval_seconds=float(os.getenv("CLASSIFIER_CACHE_SAVE_INTERVAL_SECONDS", "300"))
+        )
+        self.story_index = StoryIndex()
+        # Каскадная классификация: полный текст только для неуверенных ответов
+        self.cascade_threshold = float(os.getenv("CLASSIFIER_CASCADE_THRESHOLD", "0.8")) or None
+        # "streaming" — потоковый XML парсер для больших полнотекстовых фидов
+        self.parser_backend = os.getenv("FEED_PARSER_BACKEND", "feedparser")
+        # Адрес локального сервера воспроизведения фидов (manage.py replay-feeds) вместо реальных сайтов
+        self.replay_url = os.getenv("FEED_REPLAY_URL") or None
+        session = session_factory()
+        try:
+            sync_feed_sources(session)
+        finally:
+            session.close()
+
+    def close(self):
+        """Сохраняет кэш классификатора и останавливает воркеры (при остановке бота)"""
+        self.classifier.close()
 
     async def command(self):
-        rss_sources = [
-            {"url": "https://www.kommersant.ru/rss/section-sport.xml", 
-             "name": "Kommersant Sport", 
-             "fixed_category": "SPORTS"},
-            {"url": "https://www.kommersant.ru/rss/section-culture.xml", 
-             "name": "Kommersant Culture", 
-             "fixed_category": "CULTURE"},
-            {"url": "https://habr.com/ru/rss/hubs/health/articles/?fl=ru", 
-             "name": "Habr Health", 
-             "fixed_category": "HEALTH"},
-            {"url": "https://habr.com/ru/rss/hubs/Ecology/articles/?fl=ru", 
-             "name": "Habr Ecology", 
-             "fixed_category": "CLIMATE"},
-            {"url": "https://lenta.ru/rss/news/travel", 
-             "name": "Lenta Travel", 
-             "fixed_category": "TRAVEL"},
-            {"url": "https://elementy.ru/rss/news/it", "name": "Elementy IT"},
-            {"url": "https://www.cnews.ru/inc/rss/news.xml", "name": "CNews"},
-            {"url": "https://news.mail.ru/rss/", "name": "Mail.ru News"},
-            {"url": "https://rssexport.rbc.ru/rbcnews/news/30/full.rss", "name": "RBC"},
-        ]
+        """Опрашивает источники, для которых по расписанию реестра наступил срок"""
+        session = self.session_factory()
+        try:
+            await self._poll(session)
+        finally:
+            session.close()
+
+    async def _poll(self, session: Session):
+        rss_sources = await asyncio.to_thread(get_due_sources, session)
+        if not rss_sources:
+            return
+        if self.replay_url:
+            rss_sources = replay_sources(rss_sources, self.replay_url)
 
-        results = parse_multiple_rss_sources(
+        source_stats = {}
+        results = await parse_multiple_rss_sources_async(
                     sources=rss_sources,
-                    session=self.db_session,
+                    session=session,
                     News=News,
                     NewsCategory=NewsCategory,
                     classifier=self.classifier,
-                    hours_filter=1
+                    hours_filter=1,
+                    story_index=self.story_index,
+                    source_stats=source_stats,
+                    cascade_threshold=self.cascade_threshold,
+                    parser_backend=self.parser_backend
                 )
 
+        await asyncio.to_thread(record_poll_results, session, source_stats)
+
+        added_ids = [item['id'] for added in results.values() for item in added]
+        if self.search_engine is not None and added_ids:
+            indexed = await asyncio.to_thread(self.search_engine.add_news, session, added_ids)
+            print(f"🔎 В поисковый индекс добавлено {indexed} новостей "
+                  f"(сегментов: {self.search_engine.segments_count})")
+            neighbors = await asyncio.to_thread(
+                update_neighbors, session, NewsNeighbor, self.search_engine, added_ids
+            )
+            print(f"🧭 Похожие новости посчитаны для {neighbors} новостей")
+        if self.keyword_engine is not None and added_ids:
+            indexed = await asyncio.to_thread(self.keyword_engine.add_news, session, added_ids)
+            print(f"🔎 В BM25 индекс добавлено {indexed} новостей "
+                  f"(блоков: {self.keyword_engine.segments_count})")
+        if self.search_cache is not None and added_ids:
+            self.search_cache.invalidate()
+            if self.search_cache_prewarm:
+                warmed = await asyncio.to_thread(self.search_cache.prewarm, self.search_cache_prewarm)
+                print(f"🔥 Кэш поиска: заново посчитано {warmed} частых запросов")
+
+        cache_stats = self.classifier.stats()
+        print(f"🧠 Кэш классификатора: {cache_stats['hit_rate']:.0%} попаданий "
+              f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), "
+              f"записей: {cache_stats['size']}")
+        if self.search_cache is not None:
+            search_stats = self.search_cache.stats()
+            print(f"🔍 Кэш поиска: {search_stats['hit_rate']:.0%} попаданий "
+                  f"({search_stats['hits']}/{search_stats['hits'] + search_stats['misses']}), "
+                  f"записей: {search_stats['size']}, ~{search_stats['memory_bytes'] // 1024} КБ")
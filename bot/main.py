@@ -6,13 +6,13 @@ from handlers.regHandler import RegHandler
 from handlers.parseHandler import ParseHandler
 from handlers.NewsHandler import NewsManager
 from utils.recomendation import precompute_scores_for_user
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 import os
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import functools
-from models import User, News
-import json
-from datetime import datetime
+from models import User, News, NewsCategory, NewsNeighbor
+from utils.news_dump import import_news_dump
 
 
 logging.basicConfig(level=logging.INFO)
@@ -36,33 +36,92 @@ async def job_wrapper(session):
 
 def job_sync_wrapper(session):
     asyncio.run(job_wrapper(session))
-import json
-from models import News, NewsCategory
-from sqlalchemy.exc import IntegrityError
-
-def load_news_from_dump(session: Session, filename="news_dump.json"):
-    now = datetime.utcnow()
-    with open(filename, "r", encoding="utf-8") as f:
-        news_data = json.load(f)
-    for item in news_data:
-        news = News(
-            title=item["title"],
-            content=item["content"],
-            summary=item.get("summary"),
-            category=NewsCategory(item["category"]),
-            category_confidence=item.get("category_confidence"),
-            source_url=item.get("source_url"),
-            source_name=item.get("source_name"),
-            created_at=now
-        )
-        session.add(news)
+
+
+async def merge_search_index(search_engine, index_path: str):
+    """Фоновое слияние сегментов поискового индекса (или переобучение словаря) и запись снимка"""
+    session = get_session()
+    try:
+        stats = await asyncio.to_thread(search_engine.merge_and_save, index_path, session)
+        if stats["refit"]:
+            logger.info(f"🔎 Поисковый индекс обучен заново ({stats['refit']}): новостей {stats['rows']}")
+        elif stats["segments"] > 1 or stats["expired"]:
+            logger.info(f"🔎 Индекс слит: сегментов {stats['segments']} -> 1, "
+                        f"новостей {stats['rows']}, удалено устаревших {stats['expired']}")
+    except Exception as e:
+        logger.error(f"Ошибка при слиянии поискового индекса: {e}")
+    finally:
+        session.close()
+
+
+class NeighborsJob:
+    """Фоновый досчёт похожих новостей (news_neighbors) и удаление устаревших списков"""
+    def __init__(self, search_engine, retention_days):
+        self.search_engine = search_engine
+        self.retention_days = retention_days
+        # Курсор текущего обхода (от новых к старым) и граница уже обойдённых новостей
+        self.before_id = None
+        self.after_id = 0
+        self._walk_max_id = 0
+
+    def run(self):
+        from utils.news_neighbors import backfill_neighbors, expire_neighbors
+        session = get_session()
+        try:
+            if self.before_id is None:
+                # Новый обход: только новости, появившиеся после прошлого
+                self._walk_max_id = session.query(func.max(News.id)).scalar() or 0
+            processed, self.before_id = backfill_neighbors(
+                session, News, NewsNeighbor, self.search_engine,
+                before_id=self.before_id, after_id=self.after_id, retention_days=self.retention_days
+            )
+            if self.before_id is None:
+                self.after_id = max(self.after_id, self._walk_max_id)
+            expired = expire_neighbors(session, News, NewsNeighbor, self.retention_days) if self.retention_days else 0
+            if processed or expired:
+                logger.info(f"🧭 Похожие новости: досчитано {processed}, удалено устаревших строк {expired}")
+        finally:
+            session.close()
+
+
+async def refresh_news_neighbors(neighbors_job: NeighborsJob):
+    try:
+        await asyncio.to_thread(neighbors_job.run)
+    except Exception as e:
+        logger.error(f"Ошибка при расчёте похожих новостей: {e}")
+
+
+def keyword_search_own_session(keyword_engine, keyword: str, category: str = "", limit: int = 10):
+    """
+    Поиск для кэша /search на отдельной сессии
+
+    prewarm кэша выполняется в рабочем потоке, поэтому каждый поиск
+    открывает свою сессию, а не берёт сессию обработчиков бота.
+    """
+    from utils.search_news import keyword_search_ids
+    session = get_session()
+    try:
+        return keyword_search_ids(session, keyword_engine, keyword, category, limit)
+    finally:
+        session.close()
+
+
+async def compact_keyword_index(keyword_engine):
+    """Фоновое слияние блоков BM25 индекса"""
     try:
-        session.commit()
-        print(f"Loaded {len(news_data)} news from dump")
-    except IntegrityError:
-        session.rollback()
-        print("Some data already exists, rollback done")
+        await asyncio.to_thread(keyword_engine.compact)
+    except Exception as e:
+        logger.error(f"Ошибка при слиянии BM25 индекса: {e}")
+
 
+def load_news_from_dump(session: Session, filename="news_dump.json", batch_size: int = 1000):
+    """
+    Загружает новости из дампа. Безопасен при повторном запуске:
+    уже существующие новости пропускаются по уникальному отпечатку.
+    Дамп читается потоково, каждая пачка коммитится отдельно.
+    """
+    stats = import_news_dump(session, News, NewsCategory, filename, chunk_size=batch_size, keep_dates=False)
+    print(f"Loaded {stats['inserted']} news from dump, skipped {stats['skipped']} existing")
 
 async def main():
     """Главная функция запуска бота."""
@@ -72,30 +131,95 @@ async def main():
     
     logger.info("Тренериуем поисковую систему")
 
-    from utils.search_news import NewsSearchEngine
-    search_engine = NewsSearchEngine()
-    search_engine.fit(session)
+    parse_handler = ParseHandler(get_session)
+
+    retention_days = float(os.getenv("SEARCH_RETENTION_DAYS", "30")) or None
+    # Кэш результатов поиска (id и оценки) на каждый индекс; 0 — без кэша
+    search_cache_size = int(os.getenv("SEARCH_CACHE_SIZE", "1000"))
+    # "tfidf" — разреженные TF-IDF векторы, "dense" — векторы предложений fastText с индексом IVF
+    if os.getenv("SEARCH_VECTORS", "tfidf") == "dense":
+        from utils.search_news import DenseSearchEngine
+        search_index_path = os.getenv("DENSE_INDEX_PATH", "/app/models/dense_index")
+        # Векторы считает та же модель в воркерах, что и классифицирует новости
+        search_engine = DenseSearchEngine(
+            parse_handler.classifier,
+            nprobe=int(os.getenv("DENSE_NPROBE", "16")),
+            retention_days=retention_days,
+            text_cache_size=search_cache_size
+        )
+    else:
+        from utils.search_news import NewsSearchEngine
+        search_index_path = os.getenv("SEARCH_INDEX_PATH", "/app/models/search_index")
+        search_engine = NewsSearchEngine(retention_days=retention_days, text_cache_size=search_cache_size)
+    search_engine.load_or_fit(session, search_index_path)
+
+    # "bm25" — /search по индексу в памяти процесса, "postgres" — полнотекстовый поиск в БД
+    keyword_engine = None
+    if os.getenv("SEARCH_BACKEND", "postgres") == "bm25":
+        from utils.search_news import KeywordSearchEngine
+        keyword_engine = KeywordSearchEngine()
+        logger.info(f"🔎 BM25 индекс построен: {keyword_engine.fit(session)} новостей")
+
+    search_cache = None
+    if search_cache_size:
+        from utils.search_cache import SearchResultCache
+        search_cache = SearchResultCache(
+            functools.partial(keyword_search_own_session, keyword_engine),
+            max_size=search_cache_size,
+            # Полнотекстовый поиск учитывает свежесть, поэтому результаты стареют и без загрузки
+            ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "600")) or None
+        )
 
     logger.info("Регистрация обработчиков...")
     
     reg_handler = RegHandler(bot=bot, db_session=session)
-    news_manager = NewsManager(bot=bot, db_session=session, search_engine=search_engine)
+    news_manager = NewsManager(
+        bot=bot,
+        db_session=session,
+        search_engine=search_engine,
+        keyword_engine=keyword_engine,
+        search_cache=search_cache
+    )
     
     dp.include_routers(news_manager.router)
     dp.include_routers(reg_handler.dp)
     
     logger.info("Роутеры подключены")
     
-    parse_handler = ParseHandler(session)
+    parse_handler.search_engine = search_engine
+    parse_handler.keyword_engine = keyword_engine
+    parse_handler.search_cache = search_cache
     scheduler = AsyncIOScheduler()
     
-    scheduler.add_job(parse_handler.command, 'interval', minutes=10)
+    # Частый тик: какие источники опрашивать, решает адаптивное расписание реестра
+    scheduler.add_job(parse_handler.command, 'interval', minutes=1)
 
     scheduler.add_job(functools.partial(job_sync_wrapper, session), 'interval', minutes=10)
 
+    scheduler.add_job(
+        merge_search_index, 'interval',
+        minutes=int(os.getenv("SEARCH_MERGE_INTERVAL_MINUTES", "15")),
+        args=[search_engine, search_index_path]
+    )
+    scheduler.add_job(
+        refresh_news_neighbors, 'interval',
+        minutes=int(os.getenv("SEARCH_MERGE_INTERVAL_MINUTES", "15")),
+        args=[NeighborsJob(search_engine, search_engine.retention_days)]
+    )
+    if keyword_engine is not None:
+        scheduler.add_job(
+            compact_keyword_index, 'interval',
+            minutes=int(os.getenv("SEARCH_MERGE_INTERVAL_MINUTES", "15")),
+            args=[keyword_engine]
+        )
+
 
     scheduler.start()
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        scheduler.shutdown(wait=False)
+        parse_handler.close()
 
 
 if __name__ == "__main__":
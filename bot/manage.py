@@ -0,0 +1,262 @@
+"""
+Служебные команды бота
+
+Запуск из корня репозитория:
+    python bot/manage.py <команда> [параметры]
+"""
+import argparse
+import json
+import os
+import time
+
+
+def load_dump_items(dump_path: str):
+    with open(dump_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def evaluate_classifier(classifier, news_data):
+    """Предсказания модели по дампу и доля совпадений с сохранёнными категориями"""
+    items = [(item["title"], item["content"]) for item in news_data]
+    started = time.perf_counter()
+    predictions = classifier.classify_batch(items)
+    elapsed = time.perf_counter() - started
+
+    correct = sum(
+        1 for (category, _), item in zip(predictions, news_data)
+        if category == item["category"].upper()
+    )
+    return predictions, {
+        "accuracy": correct / len(news_data) if news_data else 0.0,
+        "items_per_second": len(items) / elapsed if elapsed else 0.0
+    }
+
+
+def quantize_model(args):
+    """Создаёт квантованную .ftz модель из .bin и записывает сравнение точности на дампе"""
+    from utils.rss_parser import NewsClassifier
+
+    output = args.output or os.path.splitext(args.model)[0] + ".ftz"
+
+    started = time.perf_counter()
+    full = NewsClassifier(args.model, lazy=False)
+    full_load = time.perf_counter() - started
+
+    print(f"Квантование {args.model} -> {output}")
+    full.model.quantize(
+        input=args.train_file,
+        retrain=bool(args.train_file),
+        cutoff=args.cutoff if args.train_file else 0,
+        qnorm=True
+    )
+    full.model.save_model(output)
+    full.unload()
+
+    full = NewsClassifier(args.model, lazy=False)
+    started = time.perf_counter()
+    quantized = NewsClassifier(output, lazy=False)
+    quantized_load = time.perf_counter() - started
+
+    news_data = load_dump_items(args.dump)
+    full_predictions, full_metrics = evaluate_classifier(full, news_data)
+    quantized_predictions, quantized_metrics = evaluate_classifier(quantized, news_data)
+    agreement = sum(
+        1 for a, b in zip(full_predictions, quantized_predictions) if a[0] == b[0]
+    ) / len(news_data) if news_data else 0.0
+
+    report = {
+        "dump": args.dump,
+        "items": len(news_data),
+        "agreement": agreement,
+        "full": dict(full_metrics, path=args.model, size_bytes=os.path.getsize(args.model), load_seconds=full_load),
+        "quantized": dict(quantized_metrics, path=output, size_bytes=os.path.getsize(output), load_seconds=quantized_load)
+    }
+    report_path = output + ".report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"Точность .bin: {full_metrics['accuracy']:.3f}, .ftz: {quantized_metrics['accuracy']:.3f}, "
+          f"совпадение категорий: {agreement:.3f}")
+    print(f"Размер: {report['full']['size_bytes'] / 2**20:.1f} МБ -> {report['quantized']['size_bytes'] / 2**20:.1f} МБ")
+    print(f"Отчёт: {report_path}")
+
+
+def import_dump(args):
+    """Потоковый импорт JSON дампа в таблицу news (повторный запуск безопасен)"""
+    from db import get_session
+    from models import News, NewsCategory
+    from utils.news_dump import import_news_dump
+
+    session = get_session()
+    started = time.perf_counter()
+    stats = import_news_dump(
+        session, News, NewsCategory, args.dump,
+        chunk_size=args.chunk_size,
+        keep_dates=not args.now,
+        method=args.method
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Прочитано {stats['read']}, добавлено {stats['inserted']}, пропущено {stats['skipped']} "
+          f"за {elapsed:.1f} с ({stats['read'] / elapsed if elapsed else 0:.0f} новостей/с)")
+
+
+def export_dump(args):
+    """Выгружает таблицу news в JSON дамп формата news_dump.json"""
+    from db import get_session
+    from models import News
+    from utils.news_dump import export_news_dump
+
+    session = get_session()
+    started = time.perf_counter()
+    count = export_news_dump(session, News, args.output, chunk_size=args.chunk_size)
+    print(f"Выгружено {count} новостей в {args.output} за {time.perf_counter() - started:.1f} с")
+
+
+def reclassify(args):
+    """Переразмечает таблицу news текущей моделью с сохранением контрольной точки"""
+    from db import get_session
+    from models import News, NewsCategory
+    from utils.classifier_service import ClassifierPool
+    from utils.classification_cache import model_version
+    from utils.reclassify import (
+        reclassify_news,
+        fixed_category_sources,
+        load_checkpoint,
+        save_checkpoint
+    )
+
+    version = model_version(args.model)
+    start_after_id = args.start_after_id
+    if args.resume and start_after_id is None:
+        checkpoint = load_checkpoint(args.checkpoint)
+        if checkpoint and checkpoint.get("model_version") != version:
+            print(f"⚠️  Контрольная точка создана другой моделью ({checkpoint.get('model_version')}), начинаем заново")
+            checkpoint = {}
+        start_after_id = checkpoint.get("last_id", 0)
+    start_after_id = start_after_id or 0
+
+    read_session = get_session()
+    write_session = get_session()
+    skip_sources = [] if args.include_fixed else fixed_category_sources(write_session)
+    pool = ClassifierPool(args.model, workers=args.workers)
+
+    def on_batch(state):
+        save_checkpoint(args.checkpoint, dict(state, model_version=version))
+        rate = state["processed"] / state["seconds"] if state["seconds"] else 0.0
+        print(f"  id <= {state['last_id']}: обработано {state['processed']}, обновлено {state['updated']}, "
+              f"сменили категорию {state['changed_category']} ({rate:.0f} новостей/с)")
+
+    print(f"Переклассификация моделью {args.model} начиная после id {start_after_id}"
+          + (f", пропускаются источники с фикс. категорией: {len(skip_sources)}" if skip_sources else ""))
+    try:
+        state = reclassify_news(
+            read_session, write_session, News, NewsCategory, pool,
+            batch_size=args.batch_size,
+            start_after_id=start_after_id,
+            skip_sources=skip_sources,
+            limit=args.limit,
+            on_batch=on_batch
+        )
+    finally:
+        pool.close()
+
+    print(f"Готово: обработано {state['processed']}, обновлено {state['updated']} за {state['seconds']:.1f} с")
+
+
+def record_feeds(args):
+    """Записывает ответы источников (тело и заголовки) в каталог фикстур"""
+    import asyncio
+    from utils.feed_registry import DEFAULT_RSS_SOURCES
+    from utils.feed_replay import record_feeds as record
+
+    sources = [source for source in DEFAULT_RSS_SOURCES if not args.source or source["name"] in args.source]
+    recorded = asyncio.run(record(sources, args.fixtures))
+    for name, result in recorded.items():
+        print(f"  {name}: {result}")
+    print(f"Фикстуры: {args.fixtures}")
+
+
+def replay_feeds(args):
+    """Запускает локальный сервер, отдающий записанные фиды"""
+    from utils.feed_replay import FeedReplayServer
+
+    server = FeedReplayServer(
+        args.fixtures,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_slugs=args.fail,
+        not_modified=not args.no_304
+    )
+    print(f"Воспроизведение {len(server.index)} фидов на {server.base_url} "
+          f"(в .env бота: FEED_REPLAY_URL=\"{server.base_url}\")")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Ответы: {server.counters}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    quantize = subparsers.add_parser("quantize-model", help="Квантовать модель fastText в .ftz")
+    quantize.add_argument("--model", default="models/fasttext_news_classifier.bin")
+    quantize.add_argument("--output", help="Путь к .ftz (по умолчанию рядом с .bin)")
+    quantize.add_argument("--dump", default="news_dump.json", help="Корпус для сравнения точности")
+    quantize.add_argument("--train-file", help="Обучающий файл fastText для дообучения при квантовании")
+    quantize.add_argument("--cutoff", type=int, default=100000, help="Размер словаря при дообучении")
+    quantize.set_defaults(func=quantize_model)
+
+    importer = subparsers.add_parser("import-dump", help="Импортировать JSON дамп новостей в БД")
+    importer.add_argument("--dump", default="news_dump.json")
+    importer.add_argument("--chunk-size", type=int, default=1000, help="Новостей в одной пачке/транзакции")
+    importer.add_argument("--method", choices=["copy", "insert"],
+                          help="COPY (PostgreSQL) или пакетный INSERT; по умолчанию по диалекту БД")
+    importer.add_argument("--now", action="store_true", help="Ставить created_at = текущее время, как при первом запуске бота")
+    importer.set_defaults(func=import_dump)
+
+    exporter = subparsers.add_parser("export-dump", help="Выгрузить таблицу news в JSON дамп")
+    exporter.add_argument("--output", default="news_dump.json")
+    exporter.add_argument("--chunk-size", type=int, default=1000, help="Строк на одну выборку курсора")
+    exporter.set_defaults(func=export_dump)
+
+    relabel = subparsers.add_parser("reclassify", help="Переразметить сохранённые новости текущей моделью")
+    relabel.add_argument("--model", default=os.getenv("CLASSIFIER_MODEL_PATH", "models/fasttext_news_classifier.bin"))
+    relabel.add_argument("--workers", type=int, default=os.cpu_count(), help="Процессов классификатора")
+    relabel.add_argument("--batch-size", type=int, default=2000, help="Новостей в одной пачке/транзакции")
+    relabel.add_argument("--checkpoint", default="reclassify.checkpoint.json", help="Файл контрольной точки")
+    relabel.add_argument("--resume", action="store_true", help="Продолжить с контрольной точки")
+    relabel.add_argument("--start-after-id", type=int, help="Начать с новостей, у которых id больше указанного")
+    relabel.add_argument("--include-fixed", action="store_true",
+                         help="Переразмечать и источники с фиксированной категорией")
+    relabel.add_argument("--limit", type=int, help="Обработать не больше N новостей")
+    relabel.set_defaults(func=reclassify)
+
+    recorder = subparsers.add_parser("record-feeds", help="Записать ответы RSS источников в фикстуры")
+    recorder.add_argument("--fixtures", default="fixtures/feeds", help="Каталог фикстур")
+    recorder.add_argument("--source", action="append", help="Записать только этот источник (можно несколько)")
+    recorder.set_defaults(func=record_feeds)
+
+    replayer = subparsers.add_parser("replay-feeds", help="Отдавать записанные фиды с локального HTTP сервера")
+    replayer.add_argument("--fixtures", default="fixtures/feeds", help="Каталог фикстур")
+    replayer.add_argument("--host", default="127.0.0.1")
+    replayer.add_argument("--port", type=int, default=8765)
+    replayer.add_argument("--latency", type=float, default=0.0, help="Задержка ответа, с")
+    replayer.add_argument("--jitter", type=float, default=0.0, help="Случайное отклонение задержки, с")
+    replayer.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+    replayer.add_argument("--fail", action="append", help="slug фида, который всегда отвечает 503")
+    replayer.add_argument("--no-304", action="store_true", help="Не отвечать 304 на условные запросы")
+    replayer.set_defaults(func=replay_feeds)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Enum, ForeignKey, UniqueConstraint, Index
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Enum, ForeignKey, UniqueConstraint, Index, BigInteger, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import declarative_base, relationship, deferred
 from datetime import datetime
 import enum
 
@@ -112,6 +113,13 @@ class News(Base):
     source_url = Column(String(500))
     source_name = Column(String(100))
     
+    fingerprint = Column(String(40), unique=True, index=True)
+    # id первой новости той же истории (почти-дубликаты из разных источников)
+    story_id = Column(Integer, index=True)
+    # Полнотекстовый вектор (russian): заголовок с весом A, текст с весом B.
+    # Заполняется триггером PostgreSQL при вставке и изменении текста
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
+    
     total_shown = Column(Integer, default=0)
     total_reactions = Column(Integer, default=0)
     
@@ -127,6 +135,9 @@ class News(Base):
     __table_args__ = (
         Index('idx_news_category_created', 'category', 'created_at'),
         Index('idx_news_created_at', 'created_at'),
+        Index('ix_news_search_vector', 'search_vector', postgresql_using='gin'),
+        # Триграммы для подстрок и опечаток в заголовках (расширение pg_trgm)
+        Index('ix_news_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
     )
 
 
@@ -215,3 +226,83 @@ class UserNewsScore(Base):
         UniqueConstraint('user_id', 'news_id', name='unique_user_news_score'),
         Index('idx_user_score', 'user_id', 'score'),
     )
+
+
+class NewsNeighbor(Base):
+    """Заранее посчитанные похожие новости той же категории (для кнопки «Похожие новости»)"""
+    __tablename__ = "news_neighbors"
+    
+    news_id = Column(
+        Integer, 
+        ForeignKey("news.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    rank = Column(Integer, primary_key=True)
+    neighbor_id = Column(
+        Integer, 
+        ForeignKey("news.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    
+    score = Column(Float, nullable=False)
+    calculated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class FeedHttpCache(Base):
+    __tablename__ = "feed_http_cache"
+
+    id = Column(Integer, primary_key=True)
+    source_name = Column(String(100), unique=True, nullable=False, index=True)
+    url = Column(String(500), nullable=False)
+
+    etag = Column(String(300))
+    last_modified = Column(String(100))
+    content_hash = Column(String(64))
+
+    total_requests = Column(Integer, default=0)
+    not_modified_hits = Column(Integer, default=0)
+    same_body_hits = Column(Integer, default=0)
+    bytes_downloaded = Column(BigInteger, default=0)
+
+    last_checked_at = Column(DateTime)
+    last_changed_at = Column(DateTime)
+
+
+class FeedCursor(Base):
+    __tablename__ = "feed_cursors"
+
+    id = Column(Integer, primary_key=True)
+    source_name = Column(String(100), unique=True, nullable=False, index=True)
+
+    last_guid = Column(String(500))
+    last_published_at = Column(DateTime)
+
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class FeedSource(Base):
+    __tablename__ = "feed_sources"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False, index=True)
+    url = Column(String(500), nullable=False)
+    fixed_category = Column(String(20))
+    enabled = Column(Boolean, default=True, nullable=False)
+
+    poll_interval = Column(Integer, default=600)
+    publish_rate = Column(Float)
+
+    next_poll_at = Column(DateTime, default=datetime.utcnow)
+    last_polled_at = Column(DateTime)
+    last_success_at = Column(DateTime)
+
+    consecutive_failures = Column(Integer, default=0)
+    circuit_open_until = Column(DateTime)
+    last_error = Column(String(300))
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_feed_source_next_poll', 'enabled', 'next_poll_at'),
+    )
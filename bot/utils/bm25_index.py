@@ -0,0 +1,323 @@
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+_WORD_RE = re.compile(r'\w+')
+
+# Окончания русских слов, длинные раньше коротких. Стемминг грубый, но одинаковый
+# для новостей и запросов: «газпрома», «газпрому» и «газпром» дают одну основу
+RUSSIAN_ENDINGS = tuple(sorted({
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией', 'иях', 'ием',
+    'ать', 'ять', 'ить', 'еть', 'уть', 'ешь', 'ишь', 'ете', 'ите', 'ют', 'ут', 'ат', 'ят',
+    'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ой', 'ей', 'ий', 'ый', 'ую', 'юю', 'ых', 'их',
+    'ым', 'им', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ия', 'ию', 'ии', 'ие',
+    'ал', 'ял', 'ил', 'ел', 'ла', 'ли', 'ло', 'ет', 'ит',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+}, key=len, reverse=True))
+MIN_STEM = 3
+MAX_STEM_CACHE = 200_000
+
+# Параметры BM25
+K1 = 1.2
+B = 0.75
+# Сколько мелких сегментов накапливается, прежде чем они сливаются между собой
+MAX_SEGMENTS = 8
+
+
+def stem_russian(word: str) -> str:
+    """
+    Отсекает возвратную частицу и окончания, пока остаётся основа от MIN_STEM букв
+
+    Окончание снимается до двух раз: иначе «газпрома» -> «газпром», а
+    «газпром» -> «газпр» (окончание творительного падежа «ом»), и формы
+    одного слова получают разные основы.
+    """
+    if len(word) > MIN_STEM + 2 and word[-2:] in ('ся', 'сь'):
+        word = word[:-2]
+    for _ in range(2):
+        for ending in RUSSIAN_ENDINGS:
+            if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+                word = word[:-len(ending)]
+                break
+        else:
+            break
+    return word
+
+
+class RussianTokenizer:
+    """Слова в нижнем регистре, ё -> е, без стоп-слов, приведённые к основе"""
+
+    def __init__(self, stopwords: Optional[Set[str]] = None):
+        self.stopwords = {word.replace('ё', 'е') for word in (stopwords or ())}
+        self._stems: Dict[str, str] = {}
+
+    def __call__(self, text: str) -> List[str]:
+        stems = self._stems
+        if len(stems) > MAX_STEM_CACHE:
+            stems.clear()
+        tokens = []
+        for word in _WORD_RE.findall(text.lower().replace('ё', 'е')):
+            if len(word) < 2 or word in self.stopwords:
+                continue
+            stem = stems.get(word)
+            if stem is None:
+                stem = stems[word] = stem_russian(word)
+            tokens.append(stem)
+        return tokens
+
+
+class PostingSegment:
+    """
+    Неизменяемый блок инвертированного индекса
+
+    Списки документов всех терминов лежат подряд в двух массивах:
+    docs[offsets[t]:offsets[t + 1]] — порядковые номера документов с
+    термином t по возрастанию, tfs — частоты термина в них.
+    """
+
+    __slots__ = ("terms", "offsets", "docs", "tfs")
+
+    def __init__(self, terms: Dict[str, int], offsets: np.ndarray, docs: np.ndarray, tfs: np.ndarray):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        row = self.terms.get(term)
+        if row is None:
+            return None
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    @staticmethod
+    def from_pairs(terms: Dict[str, int], term_col: np.ndarray, doc_col: np.ndarray, tf_col=None) -> "PostingSegment":
+        """Строит блок из пар (термин, документ); без tf_col повторы пары суммируются в частоту"""
+        keys = (term_col.astype(np.int64) << 32) | doc_col.astype(np.int64)
+        if tf_col is None:
+            keys, counts = np.unique(keys, return_counts=True)
+        else:
+            order = np.argsort(keys, kind='stable')
+            keys, counts = keys[order], tf_col[order]
+        term_rows = keys >> 32
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_rows, minlength=len(terms)), out=offsets[1:])
+        return PostingSegment(
+            terms,
+            offsets,
+            (keys & 0xFFFFFFFF).astype(np.int32),
+            np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16)
+        )
+
+    @staticmethod
+    def merge(segments: List["PostingSegment"]) -> "PostingSegment":
+        """Сливает блоки в один (документы разных блоков не пересекаются)"""
+        terms: Dict[str, int] = {}
+        term_cols, doc_cols, tf_cols = [], [], []
+        for segment in segments:
+            local_to_merged = np.empty(len(segment.terms), dtype=np.int64)
+            for term, row in segment.terms.items():
+                local_to_merged[row] = terms.setdefault(term, len(terms))
+            term_cols.append(np.repeat(local_to_merged, np.diff(segment.offsets)))
+            doc_cols.append(segment.docs)
+            tf_cols.append(segment.tfs)
+        return PostingSegment.from_pairs(
+            terms, np.concatenate(term_cols), np.concatenate(doc_cols), np.concatenate(tf_cols)
+        )
+
+
+class BM25State:
+    """Неизменяемое состояние индекса; добавление документов создаёт новое"""
+
+    __slots__ = ("segments", "doc_ids", "doc_len", "total_len", "bitsets")
+
+    def __init__(self, segments, doc_ids, doc_len, total_len, bitsets):
+        self.segments: Tuple[PostingSegment, ...] = tuple(segments)
+        # Порядковый номер документа -> id новости и длина в токенах
+        self.doc_ids: np.ndarray = doc_ids
+        self.doc_len: np.ndarray = doc_len
+        self.total_len: int = total_len
+        # Категория -> битовая маска порядковых номеров (слова по 64 бита)
+        self.bitsets: Dict[str, np.ndarray] = bitsets
+
+
+def _bitset_with(bitset: Optional[np.ndarray], ordinals: np.ndarray, size: int) -> np.ndarray:
+    words = np.zeros((size + 63) // 64, dtype=np.uint64)
+    if bitset is not None:
+        words[:bitset.size] = bitset
+    if ordinals.size:
+        np.bitwise_or.at(words, ordinals >> 6, np.left_shift(np.uint64(1), (ordinals & 63).astype(np.uint64)))
+    return words
+
+
+def bitset_contains(bitset: np.ndarray, ordinals: np.ndarray) -> np.ndarray:
+    """Маска: какие порядковые номера входят в битовое множество"""
+    words = ordinals >> 6
+    inside = words < bitset.size
+    result = np.zeros(ordinals.size, dtype=bool)
+    result[inside] = (bitset[words[inside]] >> (ordinals[inside] & 63).astype(np.uint64)) & np.uint64(1) == 1
+    return result
+
+
+class BM25Index:
+    """
+    Инвертированный индекс с ранжированием BM25 в памяти процесса
+
+    Новые документы добавляются отдельным блоком (PostingSegment); когда
+    мелких блоков становится больше MAX_SEGMENTS, они сливаются между
+    собой, а compact() сливает все блоки в один. Запрос читает состояние
+    одной ссылкой, поэтому добавление и слияние его не блокируют.
+    """
+
+    def __init__(self, tokenizer: RussianTokenizer):
+        self.tokenizer = tokenizer
+        self._state = BM25State((), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0, {})
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(self._state.doc_ids.size)
+
+    @property
+    def segments_count(self) -> int:
+        return len(self._state.segments)
+
+    @property
+    def max_id(self) -> int:
+        doc_ids = self._state.doc_ids
+        return int(doc_ids.max()) if doc_ids.size else 0
+
+    def add(self, documents: Iterable[Tuple[int, str, str]]) -> int:
+        """
+        Добавляет документы одним блоком
+
+        Args:
+            documents: Кортежи (id новости, категория, текст); уже
+                       проиндексированные id пропускаются. Вызывается из
+                       одного потока (загрузка новостей)
+
+        Returns:
+            Количество добавленных документов
+        """
+        documents = list(documents)
+        if documents:
+            known = set(np.intersect1d(self._state.doc_ids, [doc[0] for doc in documents]).tolist())
+            documents = [doc for doc in documents if doc[0] not in known]
+        if not documents:
+            return 0
+
+        # Токенизация и сборка блока без блокировки, с локальными номерами документов
+        terms: Dict[str, int] = {}
+        term_col, doc_col, lengths = [], [], []
+        for ordinal, (_, _, text) in enumerate(documents):
+            tokens = self.tokenizer(text)
+            lengths.append(len(tokens))
+            for token in tokens:
+                term_col.append(terms.setdefault(token, len(terms)))
+            doc_col.extend([ordinal] * len(tokens))
+        segment = PostingSegment.from_pairs(
+            terms, np.array(term_col, dtype=np.int64), np.array(doc_col, dtype=np.int64)
+        )
+        categories = np.array([doc[1] for doc in documents])
+
+        with self._lock:
+            state = self._state
+            first = state.doc_ids.size
+            size = first + len(documents)
+            segment.docs += first
+
+            ordinals = np.arange(first, size, dtype=np.int64)
+            bitsets = dict(state.bitsets)
+            for category in set(categories.tolist()):
+                bitsets[category] = _bitset_with(bitsets.get(category), ordinals[categories == category], size)
+
+            segments = state.segments + (segment,)
+            if len(segments) > MAX_SEGMENTS:
+                # Первый (большой) блок не трогаем: сливаются только недавние
+                segments = segments[:1] + (PostingSegment.merge(list(segments[1:])),)
+
+            self._state = BM25State(
+                segments,
+                np.concatenate([state.doc_ids, np.array([doc[0] for doc in documents], dtype=np.int64)]),
+                np.concatenate([state.doc_len, np.array(lengths, dtype=np.float32)]),
+                state.total_len + sum(lengths),
+                bitsets
+            )
+        return len(documents)
+
+    def compact(self) -> int:
+        """
+        Сливает все блоки в один
+
+        Returns:
+            Сколько блоков было до слияния
+        """
+        while True:
+            state = self._state
+            if len(state.segments) <= 1:
+                return len(state.segments)
+            merged = PostingSegment.merge(list(state.segments))
+            with self._lock:
+                current = self._state
+                prefix = current.segments[:len(state.segments)]
+                # Пока шло слияние, add() мог сам слить недавние блоки: тогда
+                # слитые здесь блоки уже не начало списка, и слияние повторяется
+                if len(prefix) != len(state.segments) or any(a is not b for a, b in zip(prefix, state.segments)):
+                    continue
+                self._state = BM25State(
+                    (merged,) + current.segments[len(state.segments):],
+                    current.doc_ids,
+                    current.doc_len,
+                    current.total_len,
+                    current.bitsets
+                )
+            return len(state.segments)
+
+    def scores(self, query: str, category: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Оценки BM25 документов, содержащих хотя бы одно слово запроса
+
+        Args:
+            query: Текст запроса
+            category: Учитывать только документы этой категории
+
+        Returns:
+            (id новостей, оценки); новости отсортированы по убыванию id
+        """
+        state = self._state
+        total_docs = state.doc_ids.size
+        terms = list(dict.fromkeys(self.tokenizer(query)))
+        if not total_docs or not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        bitset = None
+        if category is not None:
+            bitset = state.bitsets.get(category)
+            if bitset is None:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        avg_len = state.total_len / total_docs if state.total_len else 1.0
+        doc_parts, score_parts = [], []
+        for term in terms:
+            postings = [found for found in (segment.postings(term) for segment in state.segments) if found]
+            if not postings:
+                continue
+            docs = np.concatenate([found[0] for found in postings])
+            tfs = np.concatenate([found[1] for found in postings]).astype(np.float64)
+            idf = math.log(1 + (total_docs - docs.size + 0.5) / (docs.size + 0.5))
+            if bitset is not None:
+                keep = bitset_contains(bitset, docs)
+                docs, tfs = docs[keep], tfs[keep]
+            norm = K1 * (1 - B + B * state.doc_len[docs] / avg_len)
+            doc_parts.append(docs)
+            score_parts.append(idf * tfs * (K1 + 1) / (tfs + norm))
+
+        if not doc_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(score_parts))
+        # При равных оценках выше окажутся более свежие новости
+        return state.doc_ids[docs][::-1], totals[::-1]
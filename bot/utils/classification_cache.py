@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from utils.text_normalizer import preprocess_classifier_text
+
+
+def model_version(model_path: str) -> str:
+    """Версия модели по метаданным файла: меняется при замене или перезаписи файла"""
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return "missing"
+    return f"{os.path.basename(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class CachedClassifier:
+    """
+    LRU-кэш результатов классификации перед NewsClassifier / ClassifierPool
+
+    Ключ — хэш предобработанного текста и версии модели, поэтому одинаковые
+    тексты (повторы между циклами, синдицированные копии) классифицируются
+    один раз. При изменении файла модели кэш сбрасывается, а классификатор
+    выгружает старую модель (воркеры пула перезапускаются).
+    Опционально сохраняется в JSON файл и переживает перезапуск бота:
+    не чаще раза в save_interval_seconds и при close().
+    """
+
+    def __init__(
+        self,
+        classifier,
+        model_path: str,
+        max_size: int = 20000,
+        persist_path: Optional[str] = None,
+        save_interval_seconds: float = 300.0
+    ):
+        """
+        Args:
+            classifier: Классификатор с методом classify_batch
+            model_path: Путь к файлу модели (для отслеживания версии)
+            max_size: Максимальное количество записей в кэше
+            persist_path: JSON файл для сохранения кэша между запусками (опционально)
+            save_interval_seconds: Минимальный интервал между сохранениями в persist_path
+        """
+        self.classifier = classifier
+        self.model_path = model_path
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.save_interval_seconds = save_interval_seconds
+
+        self.entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.version = model_version(model_path)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+        if persist_path:
+            self._load()
+
+    def _key(self, title: str, content: str) -> str:
+        text = preprocess_classifier_text(title, content)
+        return hashlib.sha1(f"{self.version}\n{text}".encode("utf-8")).hexdigest()
+
+    def _check_version(self):
+        current = model_version(self.model_path)
+        if current != self.version:
+            self.entries.clear()
+            self.version = current
+            self.invalidations += 1
+            self._dirty = True
+            # Без выгрузки классификатор продолжил бы отвечать старой моделью
+            unload = getattr(self.classifier, "unload", None)
+            if unload is not None:
+                unload()
+
+    def classify_batch(self, items: List[Tuple[str, str]], k: int = 1) -> List[Tuple[str, float]]:
+        """Классифицирует пачку, отправляя в модель только отсутствующие в кэше тексты"""
+        with self._lock:
+            self._check_version()
+            keys = [self._key(title, content) for title, content in items]
+
+            results: List[Optional[Tuple[str, float]]] = [None] * len(items)
+            missing = {}
+            for i, key in enumerate(keys):
+                cached = self.entries.get(key)
+                if cached is not None:
+                    self.entries.move_to_end(key)
+                    results[i] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+
+        if missing:
+            first_indices = [indices[0] for indices in missing.values()]
+            computed = self.classifier.classify_batch([items[i] for i in first_indices])
+
+            with self._lock:
+                for (key, indices), result in zip(missing.items(), computed):
+                    result = (result[0], float(result[1]))
+                    for i in indices:
+                        results[i] = result
+                    self.entries[key] = result
+                    self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                self._dirty = True
+                save_due = time.monotonic() - self._last_save >= self.save_interval_seconds
+
+            if self.persist_path and save_due:
+                self.save()
+
+        return results
+
+    def classify(self, title: str, content: str, k: int = 1) -> Tuple[str, float]:
+        """Классифицирует одну новость"""
+        return self.classify_batch([(title, content)])[0]
+
+    def stats(self) -> Dict:
+        """Счётчики попаданий и промахов"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "model_version": self.version
+        }
+
+    def save(self):
+        """Сохраняет кэш в persist_path (атомарно через временный файл)"""
+        with self._lock:
+            data = {
+                "model_version": self.version,
+                "entries": [[key, category, probability] for key, (category, probability) in self.entries.items()]
+            }
+            self._dirty = False
+            self._last_save = time.monotonic()
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.persist_path)
+
+    def _load(self):
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("model_version") != self.version:
+            return
+        for key, category, probability in data.get("entries", [])[-self.max_size:]:
+            self.entries[key] = (category, probability)
+
+    def close(self):
+        """Сохраняет несохранённые записи и останавливает обёрнутый классификатор"""
+        if self.persist_path and self._dirty:
+            self.save()
+        close = getattr(self.classifier, "close", None)
+        if close is not None:
+            close()
+
+    def __getattr__(self, name):
+        # Остальные методы (unload, embed_batch, ...) делегируются обёрнутому классификатору
+        if name == "classifier":
+            raise AttributeError(name)
+        return getattr(self.classifier, name)
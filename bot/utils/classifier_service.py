@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Классификатор процесса-воркера; модель загружается при первом батче
+_worker_classifier = None
+
+
+def _init_worker(model_path: str, idle_unload_seconds: Optional[float]):
+    global _worker_classifier
+    from utils.rss_parser import NewsClassifier
+    _worker_classifier = NewsClassifier(model_path, idle_unload_seconds=idle_unload_seconds)
+
+
+def _classify_chunk(items: List[Tuple[str, str]]) -> List[Tuple[str, float]]:
+    return _worker_classifier.classify_batch(items)
+
+
+def _embed_chunk(texts: List[str]) -> np.ndarray:
+    return _worker_classifier.embed_batch(texts)
+
+
+class ClassifierPool:
+    """
+    Классификация новостей в отдельных процессах
+
+    Модель fastText загружается по одному разу в каждом воркере (лениво,
+    при первом батче), процесс бота её в памяти не держит и не делит GIL с инференсом. Интерфейс совпадает
+    с NewsClassifier (classify / classify_batch), поэтому пул можно передавать
+    везде, где ожидается классификатор, и так же подменять заглушкой в тестах.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        workers: Optional[int] = None,
+        min_chunk_size: int = 16,
+        idle_unload_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            model_path: Путь к модели fastText (.bin или .ftz)
+            workers: Количество процессов (по умолчанию CLASSIFIER_WORKERS или 1)
+            min_chunk_size: Меньшие батчи не дробятся между воркерами
+            idle_unload_seconds: Воркеры выгружают модель после N секунд простоя
+        """
+        self.model_path = model_path
+        self.idle_unload_seconds = idle_unload_seconds
+        self.workers = workers or int(os.getenv("CLASSIFIER_WORKERS", "1"))
+        self.min_chunk_size = min_chunk_size
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_path, self.idle_unload_seconds)
+            )
+        return self._executor
+
+    def classify_batch(self, items: List[Tuple[str, str]], k: int = 1) -> List[Tuple[str, float]]:
+        """
+        Классифицирует пачку новостей, распределяя её между воркерами
+
+        Args:
+            items: Список пар (title, content)
+            k: Не используется, оставлен для совместимости с NewsClassifier
+
+        Returns:
+            Список пар (category, probability) в том же порядке
+        """
+        if not items:
+            return []
+
+        results = []
+        for chunk_result in self._get_executor().map(_classify_chunk, self._chunks(items)):
+            results.extend(chunk_result)
+        return results
+
+    def _chunks(self, items: List) -> List[List]:
+        chunk_count = max(1, min(self.workers, len(items) // self.min_chunk_size))
+        chunk_size = -(-len(items) // chunk_count)
+        return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Векторы предложений fastText, посчитанные в воркерах
+
+        Returns:
+            Матрица float32 (len(texts), размерность модели)
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(list(self._get_executor().map(_embed_chunk, self._chunks(texts))))
+
+    def classify(self, title: str, content: str, k: int = 1) -> Tuple[str, float]:
+        """Классифицирует одну новость"""
+        return self.classify_batch([(title, content)])[0]
+
+    def unload(self):
+        """
+        Перезапускает воркеры: следующий батч загрузит модель заново
+
+        Старые воркеры дорабатывают уже отправленные батчи и завершаются.
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def close(self):
+        """Останавливает воркеры"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,256 @@
+import json
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+IVF_FILE = "ivf.npz"
+METADATA_ARRAYS = ("ids", "categories", "story_ids")
+
+# Меньше строк — точный перебор, он быстрее обучения центроидов и без потерь полноты
+IVF_MIN_ROWS = 20_000
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 32
+# Строк в одном блоке при назначении центроидов (ограничивает память)
+ASSIGN_CHUNK_ROWS = 16_384
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2 нормировка строк (float32); нулевые строки остаются нулевыми"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorStore:
+    """
+    Эмбеддинги новостей в файле float32, открытом через memory-map
+
+    Строки только дописываются в конец файла; число строк и массивы
+    метаданных (id, категории, истории) фиксируются в meta.json и .npy
+    после записи векторов, поэтому оборванная запись не видна при открытии.
+    В meta.json хранится и версия модели, посчитавшей векторы: векторы
+    другой модели несравнимы с новыми, и хранилище не открывается.
+    """
+
+    def __init__(self, path: str, dim: int, model_version: Optional[str] = None):
+        self.path = path
+        self.dim = dim
+        self.model_version = model_version
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.categories = np.empty(0, dtype="U16")
+        self.story_ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    @classmethod
+    def open(
+        cls, path: str, dim: Optional[int] = None, model_version: Optional[str] = None
+    ) -> Optional["VectorStore"]:
+        """Открывает сохранённое хранилище или возвращает None (нет, другая версия формата, модели или размерность)"""
+        try:
+            with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format_version") != FORMAT_VERSION or (dim is not None and meta["dim"] != dim):
+                return None
+            if model_version is not None and meta.get("model_version") != model_version:
+                return None
+            store = cls(path, meta["dim"], meta.get("model_version"))
+            arrays = {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r") for key in METADATA_ARRAYS}
+        except (OSError, ValueError, KeyError):
+            return None
+        store.ids, store.categories, store.story_ids = (arrays[key] for key in METADATA_ARRAYS)
+        store._map(meta["count"])
+        return store
+
+    def _map(self, count: int):
+        if count:
+            self.vectors = np.memmap(
+                os.path.join(self.path, VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, self.dim)
+            )
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+
+    def append(self, vectors: np.ndarray, ids: np.ndarray, categories: np.ndarray, story_ids: np.ndarray):
+        """Дописывает нормированные векторы и метаданные; открытые ранее memory-map остаются валидными"""
+        os.makedirs(self.path, exist_ok=True)
+        count = len(self)
+        vectors = normalize_rows(vectors)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        with open(vectors_path, "ab") as f:
+            # Хвост прерванной записи отбрасывается
+            f.truncate(count * self.dim * 4)
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        arrays = {
+            "ids": np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)]),
+            "categories": np.concatenate([self.categories, np.asarray(categories, dtype="U16")]),
+            "story_ids": np.concatenate([self.story_ids, np.asarray(story_ids, dtype=np.int64)])
+        }
+        for key, array in arrays.items():
+            tmp_path = os.path.join(self.path, f"{key}.tmp.npy")
+            np.save(tmp_path, array)
+            os.replace(tmp_path, os.path.join(self.path, f"{key}.npy"))
+
+        meta_tmp = os.path.join(self.path, META_FILE + ".tmp")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "dim": self.dim,
+                "count": count + len(vectors),
+                "model_version": self.model_version
+            }, f)
+        os.replace(meta_tmp, os.path.join(self.path, META_FILE))
+
+        self.ids, self.categories, self.story_ids = arrays["ids"], arrays["categories"], arrays["story_ids"]
+        self._map(count + len(vectors))
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        labels[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Сферический k-means на случайной выборке строк (косинусная близость)"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * KMEANS_SAMPLE_PER_LIST)
+    nlist = min(nlist, sample_size)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        labels = _nearest_centroids(sample, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=nlist)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.add.reduceat(sample[order], starts[counts > 0], axis=0)
+        updated = centroids.copy()
+        updated[counts > 0] = sums
+        # Пустые кластеры получают случайную точку выборки
+        empty = np.nonzero(counts == 0)[0]
+        if empty.size:
+            updated[empty] = sample[rng.choice(sample_size, empty.size, replace=False)]
+        centroids = normalize_rows(updated)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Приближённый поиск: инвертированные списки по центроидам k-means (IVF-Flat)
+
+    Строки базы разложены по ближайшему центроиду в один массив rows
+    (offsets как в CSR). Строки, добавленные после построения, лежат
+    в хвосте и перебираются целиком до следующего rebuild. Запрос
+    сравнивается с nprobe ближайшими списками и хвостом.
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, rows: np.ndarray, indexed_rows: int):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.indexed_rows = indexed_rows
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @staticmethod
+    def default_nlist(rows: int) -> int:
+        return int(np.clip(np.sqrt(rows), 16, 4096))
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: Optional[int] = None, seed: int = 0) -> "IVFIndex":
+        nlist = nlist or cls.default_nlist(len(vectors))
+        centroids = train_centroids(vectors, nlist, seed)
+        labels = _nearest_centroids(vectors, centroids)
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=len(centroids)), out=offsets[1:])
+        return cls(centroids, offsets, np.argsort(labels, kind="stable").astype(np.int64), len(vectors))
+
+    def save(self, path: str):
+        """Сохраняет списки рядом с векторами (ivf.npz), атомарно"""
+        tmp_path = os.path.join(path, IVF_FILE + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            offsets=self.offsets,
+            rows=self.rows,
+            indexed_rows=np.int64(self.indexed_rows)
+        )
+        os.replace(tmp_path, os.path.join(path, IVF_FILE))
+
+    @classmethod
+    def load(cls, path: str, total_rows: int) -> Optional["IVFIndex"]:
+        """Загружает списки; None если их нет или они построены по большему числу строк"""
+        try:
+            with np.load(os.path.join(path, IVF_FILE)) as data:
+                index = cls(data["centroids"], data["offsets"], data["rows"], int(data["indexed_rows"]))
+        except (OSError, ValueError, KeyError):
+            return None
+        return index if index.indexed_rows <= total_rows else None
+
+    def candidates(self, query: np.ndarray, nprobe: int, total_rows: int) -> np.ndarray:
+        """Номера строк из nprobe ближайших списков и всего хвоста"""
+        nprobe = min(nprobe, self.nlist)
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        parts = [self.rows[self.offsets[item]:self.offsets[item + 1]] for item in lists]
+        if total_rows > self.indexed_rows:
+            parts.append(np.arange(self.indexed_rows, total_rows, dtype=np.int64))
+        return np.concatenate(parts)
+
+
+def search_vectors(
+    vectors: np.ndarray,
+    query: np.ndarray,
+    top_n: int,
+    ivf: Optional[IVFIndex] = None,
+    nprobe: int = 16,
+    allowed=None,
+    rows: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ближайшие по косинусу строки матрицы (векторы нормированы)
+
+    Args:
+        vectors: Матрица (memory-map) нормированных векторов
+        query: Нормированный вектор запроса
+        top_n: Сколько строк вернуть
+        ivf: Приближённый индекс; без него — точный перебор
+        nprobe: Сколько списков IVF просматривать
+        allowed: Функция rows -> bool маска допустимых строк (фильтры)
+        rows: Перебрать точно только эти строки (по возрастанию), например раздел категории
+
+    Returns:
+        (номера строк, оценки) по убыванию оценки
+    """
+    total = len(vectors)
+    if rows is not None:
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+    elif ivf is not None:
+        # По возрастанию номера строки чтение memory-map идёт подряд
+        rows = np.sort(ivf.candidates(query, nprobe, total))
+        scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+    else:
+        rows = np.arange(total, dtype=np.int64)
+        scores = np.asarray(vectors, dtype=np.float32) @ query
+    if allowed is not None:
+        keep = allowed(rows)
+        rows, scores = rows[keep], scores[keep]
+    if rows.size > top_n:
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        rows, scores = rows[top], scores[top]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
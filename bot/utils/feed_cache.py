@@ -0,0 +1,135 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import FeedHttpCache
+
+
+def content_hash(content: bytes) -> str:
+    """Хэш тела фида для обнаружения неизменившихся ответов"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def load_feed_cache(session: Session, sources: List[Dict]) -> Dict[str, FeedHttpCache]:
+    """
+    Загружает (или создаёт) записи кэша валидаторов для источников одним запросом
+
+    Args:
+        session: SQLAlchemy session
+        sources: Список источников {"url": "...", "name": "..."}
+
+    Returns:
+        Словарь {source_name: FeedHttpCache}
+    """
+    names = [source['name'] for source in sources]
+    cache = {
+        entry.source_name: entry
+        for entry in session.query(FeedHttpCache).filter(FeedHttpCache.source_name.in_(names)).all()
+    }
+
+    for source in sources:
+        entry = cache.get(source['name'])
+        if entry is None:
+            entry = FeedHttpCache(
+                source_name=source['name'],
+                url=source['url'],
+                total_requests=0,
+                not_modified_hits=0,
+                same_body_hits=0,
+                bytes_downloaded=0
+            )
+            session.add(entry)
+            cache[source['name']] = entry
+        elif entry.url != source['url']:
+            # Источник переехал: старые валидаторы к новому URL не относятся
+            entry.url = source['url']
+            entry.etag = None
+            entry.last_modified = None
+            entry.content_hash = None
+
+    return cache
+
+
+def conditional_headers(entry: Optional[FeedHttpCache]) -> Dict[str, str]:
+    """Заголовки условного GET запроса по сохранённым валидаторам"""
+    headers = {}
+    if entry is None:
+        return headers
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+
+def check_feed_changed(entry: FeedHttpCache, fetched: Dict) -> bool:
+    """
+    Обновляет кэш по результату загрузки и решает, нужно ли разбирать фид
+
+    Args:
+        entry: Запись кэша источника
+        fetched: Результат feed_fetcher.fetch_feed
+
+    Returns:
+        True если тело фида изменилось и его нужно разбирать
+    """
+    now = datetime.utcnow()
+    entry.total_requests = (entry.total_requests or 0) + 1
+    entry.last_checked_at = now
+
+    if fetched['status'] == 304:
+        entry.not_modified_hits = (entry.not_modified_hits or 0) + 1
+        return False
+
+    content = fetched['content'] or b''
+    entry.bytes_downloaded = (entry.bytes_downloaded or 0) + len(content)
+
+    headers = {key.lower(): value for key, value in fetched['headers'].items()}
+    entry.etag = (headers.get('etag') or '')[:300] or None
+    entry.last_modified = (headers.get('last-modified') or '')[:100] or None
+
+    body_hash = content_hash(content)
+    if body_hash == entry.content_hash:
+        entry.same_body_hits = (entry.same_body_hits or 0) + 1
+        return False
+
+    entry.content_hash = body_hash
+    entry.last_changed_at = now
+    return True
+
+
+def get_feed_cache_stats(session: Session) -> List[Dict]:
+    """
+    Статистика попаданий в кэш по каждому источнику
+
+    Returns:
+        Список словарей с количеством запросов, попаданий и долей попаданий
+    """
+    stats = []
+    for entry in session.query(FeedHttpCache).order_by(FeedHttpCache.source_name).all():
+        total = entry.total_requests or 0
+        hits = (entry.not_modified_hits or 0) + (entry.same_body_hits or 0)
+        stats.append({
+            'source': entry.source_name,
+            'requests': total,
+            'not_modified': entry.not_modified_hits or 0,
+            'same_body': entry.same_body_hits or 0,
+            'hit_rate': hits / total if total else 0.0,
+            'bytes_downloaded': entry.bytes_downloaded or 0,
+            'last_changed_at': entry.last_changed_at
+        })
+    return stats
+
+
+def format_feed_cache_stats(stats: List[Dict]) -> str:
+    """Человекочитаемая сводка по кэшу фидов для логов"""
+    lines = []
+    for item in stats:
+        lines.append(
+            f"  {item['source']}: {item['hit_rate']:.0%} попаданий "
+            f"(304: {item['not_modified']}, то же тело: {item['same_body']}, "
+            f"запросов: {item['requests']}, скачано: {item['bytes_downloaded'] / 1024:.0f} КБ)"
+        )
+    return "\n".join(lines)
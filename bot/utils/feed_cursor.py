@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models import FeedCursor
+
+
+# Фиды не всегда строго упорядочены по времени: записи чуть старше курсора
+# всё равно просматриваются, повторы отсекает отпечаток новости
+CURSOR_OVERLAP = timedelta(minutes=30)
+
+
+def entry_guid(entry: dict) -> str:
+    """Устойчивый идентификатор записи фида: guid/id, иначе ссылка"""
+    return (entry.get('id') or entry.get('guid') or entry.get('link') or '').strip()[:500]
+
+
+def load_feed_cursor(session: Session, source_name: str) -> Optional[FeedCursor]:
+    """Курсор источника или None, если источник ещё ни разу не обрабатывался"""
+    return session.query(FeedCursor).filter(FeedCursor.source_name == source_name).first()
+
+
+def is_behind_cursor(cursor: Optional[FeedCursor], published: Optional[datetime]) -> bool:
+    """True если запись заведомо старее уже обработанных (с учётом перекрытия)"""
+    if cursor is None or cursor.last_published_at is None or published is None:
+        return False
+    return published < cursor.last_published_at - CURSOR_OVERLAP
+
+
+def advance_feed_cursor(
+    session: Session,
+    source_name: str,
+    cursor: Optional[FeedCursor],
+    newest_guid: Optional[str],
+    newest_published: Optional[datetime]
+) -> FeedCursor:
+    """
+    Сдвигает курсор источника вперёд (коммит остаётся за вызывающим кодом)
+
+    Args:
+        session: SQLAlchemy session
+        source_name: Название источника
+        cursor: Текущий курсор (None — будет создан)
+        newest_guid: Идентификатор самой свежей (первой) записи фида
+        newest_published: Максимальное время публикации среди записей
+
+    Returns:
+        Обновлённый курсор
+    """
+    if cursor is None:
+        cursor = FeedCursor(source_name=source_name)
+        session.add(cursor)
+
+    if newest_guid:
+        cursor.last_guid = newest_guid
+    if newest_published and (cursor.last_published_at is None or newest_published > cursor.last_published_at):
+        cursor.last_published_at = newest_published
+    cursor.updated_at = datetime.utcnow()
+
+    return cursor
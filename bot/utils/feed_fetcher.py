@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_CONCURRENCY = 6
+USER_AGENT = "EmetBot/1.0 (+https://github.com/YatsenkoYura/max-emet-bot)"
+
+
+def create_http_client(
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT
+) -> httpx.AsyncClient:
+    """
+    Создаёт HTTP клиент с пулом keep-alive соединений
+
+    Args:
+        concurrency: Максимальное количество одновременных соединений
+        timeout: Таймаут запроса по умолчанию в секундах
+
+    Returns:
+        Асинхронный httpx клиент
+    """
+    limits = httpx.Limits(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+        keepalive_expiry=30.0
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(timeout),
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT}
+    )
+
+
+async def fetch_feed(
+    client: httpx.AsyncClient,
+    source: Dict,
+    semaphore: asyncio.Semaphore,
+    timeout: float = DEFAULT_TIMEOUT,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict:
+    """
+    Скачивает один RSS фид, не блокируя event loop
+
+    Args:
+        client: HTTP клиент
+        source: Словарь источника {"url": "...", "name": "...", "timeout": ... (опционально)}
+        semaphore: Ограничитель количества одновременных запросов
+        timeout: Таймаут по умолчанию, если у источника не задан свой
+        headers: Дополнительные заголовки запроса (например, условный GET)
+
+    Returns:
+        Словарь {"source", "status", "content", "headers", "error", "elapsed"}
+    """
+    result = {
+        "source": source,
+        "status": None,
+        "content": None,
+        "headers": {},
+        "error": None,
+        "elapsed": 0.0
+    }
+    source_timeout = source.get("timeout", timeout)
+
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                client.get(source["url"], headers=headers, timeout=source_timeout),
+                timeout=source_timeout
+            )
+            result["status"] = response.status_code
+            result["headers"] = dict(response.headers)
+            if response.status_code >= 400:
+                result["error"] = f"HTTP {response.status_code}"
+            elif response.status_code != 304:
+                result["content"] = response.content
+        except asyncio.TimeoutError:
+            result["error"] = f"таймаут {source_timeout:.0f} с"
+        except Exception as e:
+            # Любая ошибка (httpx.InvalidURL не наследует HTTPError) — сбой только этого источника
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            result["elapsed"] = time.perf_counter() - started
+
+    return result
+
+
+async def fetch_feeds(
+    sources: List[Dict],
+    client: Optional[httpx.AsyncClient] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    request_headers: Optional[Dict[str, Dict[str, str]]] = None
+):
+    """
+    Скачивает все фиды параллельно и отдаёт результаты по мере готовности
+
+    Args:
+        sources: Список источников
+        client: HTTP клиент (если не передан, создаётся на время вызова)
+        concurrency: Максимальное количество одновременных запросов
+        timeout: Таймаут на один источник в секундах
+        request_headers: Заголовки запроса по имени источника {source_name: {...}}
+
+    Yields:
+        Результаты fetch_feed в порядке завершения
+    """
+    own_client = client is None
+    if own_client:
+        client = create_http_client(concurrency=concurrency, timeout=timeout)
+
+    request_headers = request_headers or {}
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.create_task(
+            fetch_feed(client, source, semaphore, timeout, headers=request_headers.get(source["name"]))
+        )
+        for source in sources
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        if own_client:
+            await client.aclose()
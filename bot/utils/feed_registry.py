@@ -0,0 +1,180 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models import FeedSource
+
+
+DEFAULT_RSS_SOURCES = [
+    {"url": "https://www.kommersant.ru/rss/section-sport.xml",
+     "name": "Kommersant Sport",
+     "fixed_category": "SPORTS"},
+    {"url": "https://www.kommersant.ru/rss/section-culture.xml",
+     "name": "Kommersant Culture",
+     "fixed_category": "CULTURE"},
+    {"url": "https://habr.com/ru/rss/hubs/health/articles/?fl=ru",
+     "name": "Habr Health",
+     "fixed_category": "HEALTH"},
+    {"url": "https://habr.com/ru/rss/hubs/Ecology/articles/?fl=ru",
+     "name": "Habr Ecology",
+     "fixed_category": "CLIMATE"},
+    {"url": "https://lenta.ru/rss/news/travel",
+     "name": "Lenta Travel",
+     "fixed_category": "TRAVEL"},
+    {"url": "https://elementy.ru/rss/news/it", "name": "Elementy IT"},
+    {"url": "https://www.cnews.ru/inc/rss/news.xml", "name": "CNews"},
+    {"url": "https://news.mail.ru/rss/", "name": "Mail.ru News"},
+    {"url": "https://rssexport.rbc.ru/rbcnews/news/30/full.rss", "name": "RBC"},
+]
+
+DEFAULT_POLL_INTERVAL = 600
+MIN_POLL_INTERVAL = 120
+MAX_POLL_INTERVAL = 4 * 3600
+# Сколько новых записей в среднем хотим забирать за один опрос
+TARGET_ITEMS_PER_POLL = 3
+RATE_SMOOTHING = 0.3
+JITTER_FRACTION = 0.1
+
+MAX_BACKOFF = 6 * 3600
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_DURATION = timedelta(hours=12)
+
+
+def sync_feed_sources(session: Session, sources: List[Dict] = DEFAULT_RSS_SOURCES) -> int:
+    """
+    Добавляет в реестр источники из конфигурации, которых там ещё нет
+
+    Уже существующие записи не трогаются: реестр в БД главнее конфига,
+    источники можно отключать и менять прямо в таблице feed_sources.
+
+    Returns:
+        Количество добавленных источников
+    """
+    existing = {name for (name,) in session.query(FeedSource.name).all()}
+    added = 0
+    for source in sources:
+        if source['name'] in existing:
+            continue
+        session.add(FeedSource(
+            name=source['name'],
+            url=source['url'],
+            fixed_category=source.get('fixed_category'),
+            enabled=True,
+            poll_interval=DEFAULT_POLL_INTERVAL,
+            consecutive_failures=0,
+            next_poll_at=datetime.utcnow() + timedelta(seconds=random.uniform(0, 60))
+        ))
+        added += 1
+    if added:
+        session.commit()
+    return added
+
+
+def get_due_sources(session: Session, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Источники, которые пора опрашивать: включены, срок наступил, предохранитель не разомкнут
+
+    Returns:
+        Список словарей в формате parse_multiple_rss_sources
+    """
+    now = now or datetime.utcnow()
+    due = session.query(FeedSource).filter(
+        FeedSource.enabled.is_(True),
+        or_(FeedSource.next_poll_at.is_(None), FeedSource.next_poll_at <= now),
+        or_(FeedSource.circuit_open_until.is_(None), FeedSource.circuit_open_until <= now)
+    ).order_by(FeedSource.next_poll_at).all()
+
+    sources = []
+    for feed_source in due:
+        source = {"url": feed_source.url, "name": feed_source.name}
+        if feed_source.fixed_category:
+            source["fixed_category"] = feed_source.fixed_category
+        sources.append(source)
+    return sources
+
+
+def _with_jitter(seconds: float) -> timedelta:
+    return timedelta(seconds=seconds * (1 + random.uniform(-JITTER_FRACTION, JITTER_FRACTION)))
+
+
+def adaptive_interval(publish_rate: Optional[float]) -> int:
+    """Интервал опроса по наблюдаемой частоте публикаций (записей в час)"""
+    if not publish_rate:
+        return MAX_POLL_INTERVAL
+    interval = TARGET_ITEMS_PER_POLL / publish_rate * 3600
+    return int(max(MIN_POLL_INTERVAL, min(MAX_POLL_INTERVAL, interval)))
+
+
+def record_poll_success(feed_source: FeedSource, new_items: int, now: Optional[datetime] = None):
+    """Обновляет оценку частоты публикаций и планирует следующий опрос"""
+    now = now or datetime.utcnow()
+    elapsed_hours = None
+    if feed_source.last_success_at:
+        elapsed_hours = (now - feed_source.last_success_at).total_seconds() / 3600
+
+    if elapsed_hours and elapsed_hours > 0:
+        observed_rate = new_items / elapsed_hours
+        # Априорная частота соответствует интервалу по умолчанию,
+        # чтобы один пустой опрос не отправлял источник сразу на максимум
+        prior_rate = feed_source.publish_rate
+        if prior_rate is None:
+            prior_rate = TARGET_ITEMS_PER_POLL * 3600 / DEFAULT_POLL_INTERVAL
+        feed_source.publish_rate = RATE_SMOOTHING * observed_rate + (1 - RATE_SMOOTHING) * prior_rate
+
+        current_interval = feed_source.poll_interval or DEFAULT_POLL_INTERVAL
+        feed_source.poll_interval = min(adaptive_interval(feed_source.publish_rate), current_interval * 2)
+    else:
+        # Первый успешный опрос: частоты ещё не знаем
+        feed_source.poll_interval = feed_source.poll_interval or DEFAULT_POLL_INTERVAL
+
+    feed_source.last_polled_at = now
+    feed_source.last_success_at = now
+    feed_source.consecutive_failures = 0
+    feed_source.circuit_open_until = None
+    feed_source.last_error = None
+    feed_source.next_poll_at = now + _with_jitter(feed_source.poll_interval)
+
+
+def record_poll_failure(feed_source: FeedSource, error: str, now: Optional[datetime] = None):
+    """Экспоненциальная задержка повтора; после серии ошибок размыкает предохранитель"""
+    now = now or datetime.utcnow()
+    failures = (feed_source.consecutive_failures or 0) + 1
+    feed_source.consecutive_failures = failures
+    feed_source.last_polled_at = now
+    feed_source.last_error = (error or '')[:300]
+
+    if failures >= CIRCUIT_FAILURE_THRESHOLD:
+        # Разомкнут: следующая попытка (полуоткрытое состояние) только через CIRCUIT_OPEN_DURATION
+        feed_source.circuit_open_until = now + CIRCUIT_OPEN_DURATION
+        feed_source.next_poll_at = feed_source.circuit_open_until
+        print(f"🔌 {feed_source.name}: {failures} ошибок подряд, источник отключён до "
+              f"{feed_source.circuit_open_until:%d.%m %H:%M}")
+        return
+
+    base = feed_source.poll_interval or DEFAULT_POLL_INTERVAL
+    backoff = min(MAX_BACKOFF, base * 2 ** failures)
+    feed_source.next_poll_at = now + _with_jitter(backoff)
+
+
+def record_poll_results(session: Session, source_stats: Dict[str, Dict]):
+    """
+    Записывает результаты цикла опроса в реестр
+
+    Args:
+        session: SQLAlchemy session
+        source_stats: {source_name: {"ok": bool, "new_items": int, "error": str | None}}
+    """
+    if not source_stats:
+        return
+    feed_sources = session.query(FeedSource).filter(FeedSource.name.in_(list(source_stats))).all()
+    now = datetime.utcnow()
+    for feed_source in feed_sources:
+        stats = source_stats[feed_source.name]
+        if stats.get('ok'):
+            record_poll_success(feed_source, stats.get('new_items', 0), now)
+        else:
+            record_poll_failure(feed_source, stats.get('error'), now)
+    session.commit()
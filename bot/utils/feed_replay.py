@@ -0,0 +1,219 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from utils.feed_fetcher import fetch_feeds
+
+
+INDEX_FILE = "index.json"
+# Заголовки ответа, которые сохраняются и воспроизводятся
+REPLAYED_HEADERS = ("content-type", "etag", "last-modified", "cache-control")
+
+
+def fixture_slug(name: str) -> str:
+    """Имя файла фикстуры по названию источника"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or "feed"
+
+
+def write_fixture(fixtures_dir: str, source: Dict, body: bytes, headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    Сохраняет тело и заголовки фида и добавляет источник в index.json
+
+    Returns:
+        slug фикстуры
+    """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    slug = fixture_slug(source["name"])
+    headers = {key.lower(): value for key, value in (headers or {}).items() if key.lower() in REPLAYED_HEADERS}
+
+    with open(os.path.join(fixtures_dir, f"{slug}.xml"), "wb") as f:
+        f.write(body)
+
+    index = load_fixture_index(fixtures_dir)
+    index[slug] = {
+        "name": source["name"],
+        "url": source["url"],
+        "fixed_category": source.get("fixed_category"),
+        "headers": headers,
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds")
+    }
+    with open(os.path.join(fixtures_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return slug
+
+
+def load_fixture_index(fixtures_dir: str) -> Dict[str, Dict]:
+    """Содержимое index.json: {slug: {"name", "url", "fixed_category", "headers", "recorded_at"}}"""
+    try:
+        with open(os.path.join(fixtures_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+async def record_feeds(sources: List[Dict], fixtures_dir: str, **fetch_kwargs) -> Dict[str, str]:
+    """
+    Скачивает фиды и сохраняет ответы с заголовками в каталог фикстур
+
+    Args:
+        sources: Список источников [{"url", "name", "fixed_category"}]
+        fixtures_dir: Каталог фикстур
+        **fetch_kwargs: Параметры fetch_feeds (concurrency, timeout, client)
+
+    Returns:
+        Словарь {source_name: slug или текст ошибки}
+    """
+    recorded = {}
+    async for fetched in fetch_feeds(sources, **fetch_kwargs):
+        name = fetched["source"]["name"]
+        if fetched["error"] or fetched["content"] is None:
+            recorded[name] = fetched["error"] or f"HTTP {fetched['status']}"
+            continue
+        recorded[name] = write_fixture(fixtures_dir, fetched["source"], fetched["content"], fetched["headers"])
+    return recorded
+
+
+def replay_sources(sources: List[Dict], base_url: str) -> List[Dict]:
+    """Подменяет URL источников на адреса сервера воспроизведения (по slug названия)"""
+    base_url = base_url.rstrip("/")
+    return [dict(source, url=f"{base_url}/{fixture_slug(source['name'])}") for source in sources]
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server: "FeedReplayServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        replay = self.server
+        slug = self.path.lstrip("/").split("?", 1)[0]
+        meta = replay.index.get(slug)
+
+        if replay.latency or replay.jitter:
+            time.sleep(max(0.0, replay.latency + random.uniform(-replay.jitter, replay.jitter)))
+
+        if meta is None:
+            self.send_error(404)
+            return
+        if slug in replay.error_slugs or (replay.error_rate and random.random() < replay.error_rate):
+            replay.count("errors")
+            self.send_error(503)
+            return
+
+        headers = meta.get("headers", {})
+        if replay.not_modified and self._is_not_modified(headers):
+            replay.count("not_modified")
+            self.send_response(304)
+            for key in ("etag", "last-modified"):
+                if key in headers:
+                    self.send_header(key, headers[key])
+            self.end_headers()
+            return
+
+        with open(os.path.join(replay.fixtures_dir, f"{slug}.xml"), "rb") as f:
+            body = f.read()
+        replay.count("ok")
+        self.send_response(200)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if "content-type" not in headers:
+            self.send_header("content-type", "application/rss+xml; charset=utf-8")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _is_not_modified(self, headers: Dict[str, str]) -> bool:
+        etag = self.headers.get("If-None-Match")
+        if etag and headers.get("etag"):
+            return etag == headers["etag"]
+        since = self.headers.get("If-Modified-Since")
+        if since and headers.get("last-modified"):
+            try:
+                return parsedate_to_datetime(headers["last-modified"]) <= parsedate_to_datetime(since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class FeedReplayServer(ThreadingHTTPServer):
+    """
+    Локальный HTTP сервер, отдающий записанные фиды вместо реальных сайтов
+
+    Каждый фид доступен по адресу http://host:port/<slug>. Воспроизводятся
+    сохранённые заголовки, условные запросы получают 304 (если не отключено),
+    можно добавить задержку и случайные ошибки 503.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixtures_dir: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_slugs: Optional[List[str]] = None,
+        not_modified: bool = True
+    ):
+        """
+        Args:
+            fixtures_dir: Каталог фикстур (index.json и <slug>.xml)
+            host: Адрес для прослушивания
+            port: Порт (0 — любой свободный)
+            latency: Задержка ответа в секундах
+            jitter: Случайное отклонение задержки в секундах
+            error_rate: Доля запросов, на которые отвечать 503
+            error_slugs: Фиды, которые всегда отвечают 503
+            not_modified: Отвечать 304 на условные запросы с совпадающим ETag / Last-Modified
+        """
+        super().__init__((host, port), _ReplayHandler)
+        self.fixtures_dir = fixtures_dir
+        self.index = load_fixture_index(fixtures_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_slugs = set(error_slugs or [])
+        self.not_modified = not_modified
+        self.counters = {"ok": 0, "not_modified": 0, "errors": 0}
+        self._counters_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str):
+        with self._counters_lock:
+            self.counters[key] += 1
+
+    def sources(self) -> List[Dict]:
+        """Источники из фикстур с URL, указывающими на этот сервер"""
+        return [
+            {
+                "url": f"{self.base_url}/{slug}",
+                "name": meta["name"],
+                **({"fixed_category": meta["fixed_category"]} if meta.get("fixed_category") else {})
+            }
+            for slug, meta in self.index.items()
+        ]
+
+    def start(self) -> "FeedReplayServer":
+        """Запускает сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
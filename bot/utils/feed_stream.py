@@ -0,0 +1,145 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator, Optional, Union
+
+from feedparser.util import FeedParserDict
+
+from utils.feed_cursor import entry_guid
+
+
+CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+ITEM_TAGS = {"item", f"{{{ATOM_NS}}}entry"}
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """RFC 822 (RSS) или ISO 8601 (Atom) дата -> naive UTC datetime"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _element_text(element: ET.Element) -> str:
+    """Текст элемента вместе с вложенной разметкой (для description/content без CDATA)"""
+    if len(element) == 0:
+        return element.text or ""
+    return (element.text or "") + "".join(
+        ET.tostring(child, encoding="unicode") for child in element
+    )
+
+
+def _normalize_entry(item: ET.Element, prefixes: dict) -> FeedParserDict:
+    """
+    Приводит <item>/<entry> к FeedParserDict с ключами, как у feedparser:
+    title, link, id, summary, content, published_parsed, <prefix>_<name> для
+    прочих пространств имён (например, rbc_news_full-text)
+    """
+    entry = FeedParserDict()
+    published = None
+
+    for child in item:
+        tag = child.tag
+        namespace = None
+        if tag.startswith("{"):
+            namespace, tag = tag[1:].split("}", 1)
+
+        if namespace in (None, ATOM_NS):
+            if tag == "title":
+                entry["title"] = _element_text(child)
+            elif tag == "link":
+                entry["link"] = child.get("href") or (child.text or "")
+            elif tag in ("guid", "id"):
+                entry["id"] = child.text or ""
+            elif tag in ("description", "summary"):
+                entry["summary"] = _element_text(child)
+            elif tag == "content":
+                entry["content"] = [FeedParserDict(value=_element_text(child))]
+            elif tag in ("pubDate", "published") or (tag == "updated" and published is None):
+                published = _parse_date(child.text) or published
+        elif namespace == CONTENT_NS and tag == "encoded":
+            entry["content"] = [FeedParserDict(value=_element_text(child))]
+        else:
+            prefix = prefixes.get(namespace)
+            key = f"{prefix}_{tag}" if prefix else tag
+            entry.setdefault(key, _element_text(child))
+
+    if published is not None:
+        entry["published_parsed"] = published.timetuple()
+    return entry
+
+
+def iter_feed_entries(
+    source: Union[bytes, Iterable[bytes]],
+    stop_guid: Optional[str] = None,
+    not_before: Optional[datetime] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[FeedParserDict]:
+    """
+    Потоковый разбор RSS/Atom: записи отдаются по одной, дерево фида не строится
+
+    Обработанные <item> сразу удаляются из памяти. Разбор прекращается на
+    первой уже виденной записи (stop_guid) или первой записи старше not_before,
+    остаток документа не читается.
+
+    Args:
+        source: Тело фида целиком или итератор кусков байт
+        stop_guid: guid/ссылка последней обработанной записи
+        not_before: Записи старше этого времени (naive UTC) считаются уже обработанными
+        chunk_size: Размер куска при подаче bytes в парсер
+
+    Yields:
+        Записи фида в формате, совместимом с feedparser entries
+
+    Raises:
+        xml.etree.ElementTree.ParseError: Если фид не является корректным XML
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = source
+        chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+    else:
+        chunks = source
+
+    parser = ET.XMLPullParser(events=("start", "end", "start-ns"))
+    prefixes = {}
+    stack = []
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, payload in parser.read_events():
+            if event == "start-ns":
+                prefix, uri = payload
+                if prefix:
+                    prefixes.setdefault(uri, prefix)
+            elif event == "start":
+                stack.append(payload)
+            elif event == "end":
+                element = stack.pop()
+                if element.tag not in ITEM_TAGS:
+                    continue
+
+                entry = _normalize_entry(element, prefixes)
+                if stack:
+                    stack[-1].remove(element)
+
+                if stop_guid and entry_guid(entry) == stop_guid:
+                    return
+                if not_before is not None and entry.get("published_parsed"):
+                    if datetime(*entry["published_parsed"][:6]) < not_before:
+                        return
+                yield entry
+
+    parser.close()
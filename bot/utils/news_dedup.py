@@ -0,0 +1,81 @@
+import hashlib
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+_TITLE_PUNCT_RE = re.compile(r'[^\w\s]+')
+_TITLE_SPACE_RE = re.compile(r'\s+')
+
+TRACKING_PARAMS = {'from', 'ref', 'rss', 'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content'}
+
+
+def normalize_title(title: str) -> str:
+    """Нормализует заголовок: регистр, ё, пунктуация и пробелы не влияют на отпечаток"""
+    title = (title or '').lower().replace('ё', 'е')
+    title = _TITLE_PUNCT_RE.sub(' ', title)
+    return _TITLE_SPACE_RE.sub(' ', title).strip()
+
+
+def canonicalize_url(url: Optional[str]) -> str:
+    """
+    Приводит URL новости к каноническому виду
+
+    Убирает схему, www., фрагмент, завершающий слэш и трекинговые параметры
+    (utm_*, from, ref, rss), сортирует оставшиеся параметры.
+    """
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit(('', host, path, query, ''))
+
+
+def news_fingerprint(title: str, url: Optional[str] = None) -> str:
+    """Отпечаток новости: SHA-1 от нормализованного заголовка и канонического URL"""
+    key = f"{normalize_title(title)}\n{canonicalize_url(url)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def insert_news_ignore_duplicates(session: Session, News, rows: List[Dict]) -> Dict[str, int]:
+    """
+    Вставляет новости одним INSERT ... ON CONFLICT (fingerprint) DO NOTHING RETURNING id
+
+    Проверка дубликатов и вставка выполняются на сервере за один запрос,
+    конкурентные вставки того же отпечатка безопасно пропускаются.
+    Коммит остаётся за вызывающим кодом.
+
+    Args:
+        session: SQLAlchemy session
+        News: ORM модель News
+        rows: Словари колонок, у каждого должен быть заполнен 'fingerprint'
+
+    Returns:
+        Словарь {fingerprint: id} только для реально вставленных строк
+    """
+    unique_rows = {}
+    for row in rows:
+        unique_rows.setdefault(row['fingerprint'], row)
+    if not unique_rows:
+        return {}
+
+    dialect = session.get_bind().dialect.name
+    insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+
+    stmt = (
+        insert(News)
+        .values(list(unique_rows.values()))
+        .on_conflict_do_nothing(index_elements=['fingerprint'])
+        .returning(News.id, News.fingerprint)
+    )
+    return {fingerprint: news_id for news_id, fingerprint in session.execute(stmt)}
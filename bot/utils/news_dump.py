@@ -0,0 +1,226 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from utils.news_dedup import news_fingerprint, insert_news_ignore_duplicates
+
+
+DEFAULT_CHUNK_SIZE = 1000
+READ_SIZE = 1 << 16
+
+# Колонки news, которые пишутся при импорте (порядок важен для COPY)
+IMPORT_COLUMNS = [
+    "fingerprint", "title", "content", "summary", "category", "category_confidence",
+    "source_url", "source_name", "total_shown", "total_reactions", "created_at"
+]
+
+
+def iter_dump_items(path: str, read_size: int = READ_SIZE) -> Iterator[Dict]:
+    """
+    Потоково читает JSON массив объектов (формат news_dump.json)
+
+    Файл читается кусками по read_size символов, в памяти одновременно
+    находится не больше одного куска и одного разбираемого объекта.
+
+    Yields:
+        Объекты массива по одному
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        opened = False
+
+        while True:
+            # Пропускаем пробелы, открывающую скобку и запятые между объектами
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == "," or (buffer[pos] == "[" and not opened)):
+                if buffer[pos] == "[":
+                    opened = True
+                pos += 1
+
+            if pos < len(buffer):
+                if buffer[pos] == "]" and opened:
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    pos = end
+                    yield item
+                    continue
+            elif eof:
+                raise ValueError(f"{path}: неожиданный конец файла, массив не закрыт")
+
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def dump_item_to_row(item: Dict, NewsCategory, created_at: Optional[datetime] = None) -> Dict:
+    """Объект дампа -> словарь колонок news (с отпечатком)"""
+    if created_at is None:
+        created_at = datetime.fromisoformat(item["created_at"]) if item.get("created_at") else datetime.utcnow()
+    confidence = item.get("category_confidence")
+    return {
+        "fingerprint": news_fingerprint(item["title"], item.get("source_url")),
+        "title": item["title"][:300],
+        "content": item["content"],
+        "summary": item.get("summary"),
+        "category": NewsCategory(item["category"]),
+        "category_confidence": float(confidence) if confidence is not None else None,
+        "source_url": item.get("source_url"),
+        "source_name": item.get("source_name"),
+        "total_shown": 0,
+        "total_reactions": 0,
+        "created_at": created_at
+    }
+
+
+def news_to_dump_item(news) -> Dict:
+    """Строка news -> объект дампа в формате news_dump.json"""
+    return {
+        "title": news.title,
+        "content": news.content,
+        "summary": news.summary,
+        "category": news.category.value,
+        "category_confidence": news.category_confidence,
+        "source_url": news.source_url,
+        "source_name": news.source_name,
+        "created_at": news.created_at.isoformat(timespec="seconds") if news.created_at else None
+    }
+
+
+def _copy_value(row: Dict, column: str):
+    value = row[column]
+    if value is None:
+        return "\\N"
+    if column == "category":
+        return value.name
+    return value
+
+
+def _copy_chunk(session: Session, rows: List[Dict]) -> int:
+    """
+    Вставка пачки через COPY во временную таблицу и INSERT ... SELECT ON CONFLICT DO NOTHING
+
+    Returns:
+        Количество реально вставленных строк
+    """
+    columns = ", ".join(IMPORT_COLUMNS)
+    session.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS news_import AS SELECT {columns} FROM news WITH NO DATA"
+    ))
+    session.execute(text("TRUNCATE news_import"))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row, column) for column in IMPORT_COLUMNS])
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(f"COPY news_import ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+    result = session.execute(text(
+        f"INSERT INTO news ({columns}) SELECT {columns} FROM news_import "
+        f"ON CONFLICT (fingerprint) DO NOTHING"
+    ))
+    return result.rowcount
+
+
+def import_news_dump(
+    session: Session,
+    News,
+    NewsCategory,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    keep_dates: bool = True,
+    method: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Импортирует дамп новостей пачками с постоянным потреблением памяти
+
+    Каждая пачка вставляется и коммитится отдельно; уже существующие новости
+    (по уникальному отпечатку) пропускаются, поэтому импорт можно безопасно
+    повторять и прерывать.
+
+    Args:
+        session: SQLAlchemy session
+        News: ORM модель News
+        NewsCategory: Enum категорий
+        path: Путь к JSON дампу
+        chunk_size: Размер пачки
+        keep_dates: Брать created_at из дампа (иначе — текущее время)
+        method: "copy" (только PostgreSQL) или "insert"; по умолчанию copy для PostgreSQL
+
+    Returns:
+        Словарь {"read": ..., "inserted": ..., "skipped": ...}
+    """
+    if method is None:
+        method = "copy" if session.get_bind().dialect.name == "postgresql" else "insert"
+
+    now = None if keep_dates else datetime.utcnow()
+    stats = {"read": 0, "inserted": 0, "skipped": 0}
+
+    def flush(rows: List[Dict]):
+        if method == "copy":
+            inserted = _copy_chunk(session, rows)
+        else:
+            inserted = len(insert_news_ignore_duplicates(session, News, rows))
+        session.commit()
+        stats["inserted"] += inserted
+        stats["skipped"] += len(rows) - inserted
+
+    rows = []
+    for item in iter_dump_items(path):
+        rows.append(dump_item_to_row(item, NewsCategory, now))
+        stats["read"] += 1
+        if len(rows) >= chunk_size:
+            flush(rows)
+            rows = []
+    if rows:
+        flush(rows)
+
+    return stats
+
+
+def export_news_dump(session: Session, News, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Выгружает таблицу news в JSON дамп того же формата, что news_dump.json
+
+    Строки читаются серверным курсором пачками по chunk_size и сразу пишутся
+    в файл; запись атомарная (через временный файл).
+
+    Returns:
+        Количество выгруженных новостей
+    """
+    tmp_path = f"{path}.tmp"
+    count = 0
+    # Колонки, а не ORM объекты: строки не копятся в identity map сессии
+    query = session.query(
+        News.title, News.content, News.summary, News.category, News.category_confidence,
+        News.source_url, News.source_name, News.created_at
+    ).order_by(News.id).execution_options(yield_per=chunk_size)
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for news in query:
+            item = json.dumps(news_to_dump_item(news), ensure_ascii=False, indent=2)
+            f.write(",\n  " if count else "\n  ")
+            f.write(item.replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "]")
+
+    os.replace(tmp_path, path)
+    return count
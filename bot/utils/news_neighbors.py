@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+
+# Соседей хранится с запасом: кнопка показывает 3
+NEIGHBORS_TOP_N = 10
+
+
+def store_neighbors(session: Session, NewsNeighbor, neighbors: Dict[int, List[Tuple[int, float]]]) -> int:
+    """
+    Заменяет списки соседей новостей одним DELETE и одной пакетной вставкой
+
+    Коммит остаётся за вызывающим кодом.
+
+    Returns:
+        Количество записанных строк
+    """
+    if not neighbors:
+        return 0
+    session.execute(delete(NewsNeighbor).where(NewsNeighbor.news_id.in_(list(neighbors))))
+    now = datetime.utcnow()
+    rows = [
+        {'news_id': news_id, 'rank': rank, 'neighbor_id': neighbor_id, 'score': score, 'calculated_at': now}
+        for news_id, items in neighbors.items()
+        for rank, (neighbor_id, score) in enumerate(items)
+    ]
+    if rows:
+        session.execute(insert(NewsNeighbor), rows)
+    return len(rows)
+
+
+def update_neighbors(
+    session: Session,
+    NewsNeighbor,
+    search_engine,
+    news_ids: List[int],
+    top_n: int = NEIGHBORS_TOP_N
+) -> int:
+    """
+    Считает соседей новостей по поисковому индексу и сохраняет их
+
+    Args:
+        session: SQLAlchemy session
+        NewsNeighbor: ORM модель NewsNeighbor
+        search_engine: NewsSearchEngine, в индексе которого уже есть эти новости
+        news_ids: id новостей
+        top_n: Соседей на новость
+
+    Returns:
+        Для скольких новостей посчитаны соседи
+    """
+    neighbors = search_engine.batch_neighbors(news_ids, top_n=top_n)
+    store_neighbors(session, NewsNeighbor, neighbors)
+    session.commit()
+    return len(neighbors)
+
+
+def get_neighbors(session: Session, News, NewsNeighbor, news_id: int, limit: int = 3) -> Optional[List]:
+    """
+    Готовые похожие новости одним запросом по первичному ключу news_neighbors
+
+    Returns:
+        Список News по убыванию близости или None, если соседи ещё не посчитаны
+    """
+    rows = session.query(News).join(
+        NewsNeighbor, NewsNeighbor.neighbor_id == News.id
+    ).filter(
+        NewsNeighbor.news_id == news_id
+    ).order_by(NewsNeighbor.rank).limit(limit).all()
+    return rows or None
+
+
+def backfill_neighbors(
+    session: Session,
+    News,
+    NewsNeighbor,
+    search_engine,
+    before_id: Optional[int] = None,
+    after_id: int = 0,
+    retention_days: Optional[float] = None,
+    limit: int = 2000,
+    top_n: int = NEIGHBORS_TOP_N
+) -> Tuple[int, Optional[int]]:
+    """
+    Досчитывает соседей для новостей индекса, у которых их ещё нет
+
+    Новости обходятся от новых к старым пачками по limit; курсор before_id
+    позволяет не возвращаться к новостям, у которых похожих не нашлось.
+    Обход ограничен окном хранения индекса и новостями после after_id,
+    поэтому законченный обход не начинается заново со всей таблицы.
+
+    Args:
+        before_id: Курсор текущего обхода (None — с самой новой новости)
+        after_id: Новости с id не больше этого уже обойдены
+        retention_days: Окно хранения поискового индекса (None — все новости)
+
+    Returns:
+        (сколько новостей обработано, курсор для следующего вызова или None, если обход закончен)
+    """
+    query = session.query(News.id).filter(
+        News.id > after_id,
+        ~session.query(NewsNeighbor.news_id).filter(NewsNeighbor.news_id == News.id).exists()
+    )
+    if retention_days:
+        query = query.filter(News.created_at >= datetime.utcnow() - timedelta(days=retention_days))
+    if before_id is not None:
+        query = query.filter(News.id < before_id)
+    news_ids = [row.id for row in query.order_by(News.id.desc()).limit(limit)]
+    if not news_ids:
+        return 0, None
+    update_neighbors(session, NewsNeighbor, search_engine, news_ids, top_n=top_n)
+    if len(news_ids) < limit:
+        return len(news_ids), None
+    return len(news_ids), min(news_ids)
+
+
+def expire_neighbors(session: Session, News, NewsNeighbor, retention_days: float) -> int:
+    """
+    Удаляет списки соседей новостей старше окна хранения поискового индекса
+
+    При удалении самой новости её списки удаляются каскадно (ON DELETE CASCADE).
+
+    Returns:
+        Количество удалённых строк
+    """
+    not_before = datetime.utcnow() - timedelta(days=retention_days)
+    expired = session.query(News.id).filter(News.created_at < not_before)
+    result = session.execute(
+        delete(NewsNeighbor).where(NewsNeighbor.news_id.in_(expired.scalar_subquery()))
+    )
+    session.commit()
+    return result.rowcount or 0
@@ -0,0 +1,157 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from models import FeedSource
+
+
+DEFAULT_BATCH_SIZE = 2000
+# Изменения уверенности меньше порога не записываются
+CONFIDENCE_EPSILON = 1e-4
+
+
+def load_checkpoint(path: str) -> Dict:
+    """Состояние прерванной переклассификации или пустой словарь"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_checkpoint(path: str, state: Dict):
+    """Атомарно сохраняет состояние (через временный файл)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def fixed_category_sources(session: Session) -> List[str]:
+    """Источники с фиксированной категорией: их новости модель не размечает"""
+    return [
+        name for (name,) in session.query(FeedSource.name).filter(FeedSource.fixed_category.isnot(None))
+    ]
+
+
+def _write_batch(session: Session, News, updates: List[Dict]):
+    if updates:
+        session.execute(
+            update(News.__table__)
+            .where(News.__table__.c.id == bindparam('news_id'))
+            .values(category=bindparam('new_category'), category_confidence=bindparam('new_confidence')),
+            updates
+        )
+    session.commit()
+
+
+def _batches(query, batch_size: int):
+    rows = []
+    for row in query:
+        rows.append(row)
+        if len(rows) >= batch_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+def reclassify_news(
+    read_session: Session,
+    write_session: Session,
+    News,
+    NewsCategory,
+    classifier,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    start_after_id: int = 0,
+    skip_sources: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    on_batch: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Переразмечает уже сохранённые новости текущей моделью
+
+    Новости читаются по возрастанию id серверным курсором (yield_per) в
+    отдельной сессии, классифицируются пачками (с ClassifierPool — во всех
+    воркерах, параллельно с чтением следующей пачки) и записываются пакетным
+    UPDATE только там, где категория или уверенность изменились. Каждая пачка
+    коммитится отдельно, короткими транзакциями, поэтому бот продолжает
+    работать с таблицей.
+
+    Args:
+        read_session: Сессия для потокового чтения (держит курсор открытым)
+        write_session: Сессия для UPDATE и коммитов
+        News: ORM модель News
+        NewsCategory: Enum категорий
+        classifier: Объект с методом classify_batch (NewsClassifier / ClassifierPool)
+        batch_size: Новостей в одной пачке
+        start_after_id: Продолжить с новостей, у которых id больше этого (контрольная точка)
+        skip_sources: Источники, новости которых не переразмечаются
+        limit: Обработать не больше N новостей
+        on_batch: Вызывается после каждой записанной пачки с текущим состоянием
+
+    Returns:
+        Состояние {"last_id", "processed", "updated", "changed_category", "seconds"}
+    """
+    state = {
+        "last_id": start_after_id,
+        "processed": 0,
+        "updated": 0,
+        "changed_category": 0,
+        "seconds": 0.0
+    }
+    started = time.perf_counter()
+
+    query = read_session.query(
+        News.id, News.title, News.content, News.category, News.category_confidence
+    ).filter(News.id > start_after_id)
+    if skip_sources:
+        query = query.filter(News.source_name.notin_(skip_sources) | News.source_name.is_(None))
+    query = query.order_by(News.id).execution_options(yield_per=batch_size)
+    if limit:
+        query = query.limit(limit)
+
+    def write(rows, predictions):
+        updates = []
+        for row, (category_str, confidence) in zip(rows, predictions):
+            try:
+                category = NewsCategory[category_str]
+            except KeyError:
+                category = NewsCategory.SOCIETY
+                confidence = 0.0
+            if (
+                category == row.category
+                and row.category_confidence is not None
+                and abs(row.category_confidence - confidence) < CONFIDENCE_EPSILON
+            ):
+                continue
+            if category != row.category:
+                state["changed_category"] += 1
+            updates.append({'news_id': row.id, 'new_category': category, 'new_confidence': confidence})
+
+        _write_batch(write_session, News, updates)
+        state["last_id"] = rows[-1].id
+        state["processed"] += len(rows)
+        state["updated"] += len(updates)
+        state["seconds"] = time.perf_counter() - started
+        if on_batch:
+            on_batch(dict(state))
+
+    # Пока пачка классифицируется, читается следующая и записывается предыдущая
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = None
+        for rows in _batches(query, batch_size):
+            future = executor.submit(classifier.classify_batch, [(row.title, row.content) for row in rows])
+            if pending is not None:
+                write(pending[0], pending[1].result())
+            pending = (rows, future)
+        if pending is not None:
+            write(pending[0], pending[1].result())
+
+    read_session.rollback()
+    return state
@@ -89,6 +89,24 @@ def precompute_scores_for_user(
     
     news_list = query.all()
     
+    # Одна новость на историю: копии одного сюжета из разных источников
+    # не занимают несколько мест в ленте, а просмотренные истории пропускаются
+    viewed_story_ids = set()
+    if viewed_ids:
+        viewed_story_ids = {
+            row[0] or row[1] for row in session.query(News.story_id, News.id).filter(
+                News.id.in_(viewed_ids)
+            ).all()
+        }
+    
+    representatives = {}
+    for news in sorted(news_list, key=lambda n: n.id):
+        story_id = news.story_id or news.id
+        if story_id in viewed_story_ids:
+            continue
+        representatives.setdefault(story_id, news)
+    news_list = list(representatives.values())
+    
     session.query(UserNewsScore).filter(
         UserNewsScore.user_id == user.id
     ).delete(synchronize_session=False)
@@ -1,26 +1,57 @@
+import asyncio
 import fasttext
-import re
+import threading
+import time
+from itertools import islice
 from typing import Tuple, Optional, List, Dict
 from datetime import datetime, timedelta
+from xml.etree.ElementTree import ParseError
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
 import feedparser
+import numpy as np
 from sqlalchemy.orm import Session
-from html import unescape
+
+from utils.feed_fetcher import fetch_feeds, DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT
+from utils.news_dedup import news_fingerprint, insert_news_ignore_duplicates
+from utils.story_clustering import StoryIndex, assign_story_ids
+from utils.feed_cursor import (
+    CURSOR_OVERLAP,
+    entry_guid,
+    load_feed_cursor,
+    is_behind_cursor,
+    advance_feed_cursor
+)
+from utils.feed_stream import iter_feed_entries
+from utils.text_normalizer import clean_html, preprocess_classifier_text, preprocess_text
+from utils.feed_cache import (
+    load_feed_cache,
+    conditional_headers,
+    check_feed_changed,
+    get_feed_cache_stats,
+    format_feed_cache_stats
+)
 
 
 class NewsClassifier:
     """Классификатор новостей на основе fastText"""
 
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, lazy: bool = True, idle_unload_seconds: Optional[float] = None):
         """
         Инициализация классификатора
 
         Args:
-            model_path: Путь к обученной модели fastText (.bin файл)
+            model_path: Путь к обученной модели fastText (.bin или квантованный .ftz)
+            lazy: Загружать модель при первом использовании, а не сразу
+            idle_unload_seconds: Выгружать модель из памяти после N секунд простоя
         """
-        self.model = fasttext.load_model(model_path)
+        self.model_path = model_path
+        self.idle_unload_seconds = idle_unload_seconds
+        self._model = None
+        self._lock = threading.Lock()
+        self._last_used = 0.0
+        self._unload_timer = None
 
         self.label_mapping = {
             '__label__climate': 'CLIMATE',
@@ -36,39 +67,163 @@ class NewsClassifier:
             '__label__travel': 'TRAVEL',
         }
 
+        if not lazy:
+            _ = self.model
+
+    @property
+    def model(self):
+        """Модель fastText; загружается при первом обращении"""
+        with self._lock:
+            if self._model is None:
+                self._model = fasttext.load_model(self.model_path)
+            self._last_used = time.monotonic()
+            if self.idle_unload_seconds and self._unload_timer is None:
+                self._arm_unload_timer(self.idle_unload_seconds)
+            return self._model
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def is_quantized(self) -> bool:
+        return self.model_path.endswith('.ftz')
+
+    def _arm_unload_timer(self, delay: float):
+        self._unload_timer = threading.Timer(delay, self._unload_if_idle)
+        self._unload_timer.daemon = True
+        self._unload_timer.start()
+
+    def _unload_if_idle(self):
+        with self._lock:
+            idle = time.monotonic() - self._last_used
+            if idle >= self.idle_unload_seconds:
+                self._model = None
+                self._unload_timer = None
+            else:
+                self._arm_unload_timer(self.idle_unload_seconds - idle)
+
+    def unload(self):
+        """Выгружает модель из памяти; следующий вызов загрузит её снова"""
+        with self._lock:
+            if self._unload_timer is not None:
+                self._unload_timer.cancel()
+                self._unload_timer = None
+            self._model = None
+
     def preprocess_text(self, text: str) -> str:
         """Предобработка текста для классификации"""
-        text = text.lower()
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = re.sub(r'http\S+|www.\S+', '', text)
-        return text
+        return preprocess_text(text)
+
+    def _to_category(self, label: str) -> str:
+        """Переводит метку fastText в название категории"""
+        top_label = label.replace('__label__', '')
+        full_label = f'__label__{top_label}'
+        return self.label_mapping.get(full_label, 'SOCIETY')
 
     def classify(self, title: str, content: str, k: int = 1) -> Tuple[str, float]:
         """Классифицирует новость"""
-        combined_text = f"{title} {title} {content}"
-        processed_text = self.preprocess_text(combined_text)
+        processed_text = preprocess_classifier_text(title, content)
 
         labels, probabilities = self.model.predict(processed_text, k=k)
 
-        top_label = labels[0].replace('__label__', '')
-        top_probability = float(probabilities[0])
+        return self._to_category(labels[0]), float(probabilities[0])
 
-        full_label = f'__label__{top_label}'
-        category = self.label_mapping.get(full_label, 'SOCIETY')
+    def classify_batch(self, items: List[Tuple[str, str]], k: int = 1) -> List[Tuple[str, float]]:
+        """
+        Классифицирует пачку новостей одним вызовом модели
+
+        Args:
+            items: Список пар (title, content)
+            k: Количество меток, запрашиваемых у модели
+
+        Returns:
+            Список пар (category, probability) в том же порядке
+        """
+        if not items:
+            return []
 
-        return category, top_probability
+        texts = [preprocess_classifier_text(title, content) for title, content in items]
+        labels, probabilities = self.model.predict(texts, k=k)
 
+        return [
+            (self._to_category(item_labels[0]), float(item_probabilities[0]))
+            for item_labels, item_probabilities in zip(labels, probabilities)
+        ]
 
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Векторы предложений fastText (среднее нормированных векторов слов)
+
+        Args:
+            texts: Тексты (заголовок и текст новости или поисковый запрос)
+
+        Returns:
+            Матрица float32 размером (len(texts), размерность модели)
+        """
+        model = self.model
+        if not texts:
+            return np.empty((0, model.get_dimension()), dtype=np.float32)
+        return np.vstack([model.get_sentence_vector(preprocess_text(text)) for text in texts]).astype(np.float32)
+
+
+
+def classify_cascade(
+    classifier,
+    entries: List[Dict],
+    threshold: float
+) -> Tuple[List[Tuple[str, float]], Dict]:
+    """
+    Двухэтапная классификация: сначала дёшево, полный текст — только при сомнениях
+
+    Этап 1 классифицирует заголовок с коротким описанием и принимает ответ,
+    если уверенность не ниже порога. Этап 2 переоценивает по полному тексту
+    только оставшиеся записи, у которых полный текст длиннее описания.
+
+    Args:
+        classifier: NewsClassifier или совместимый (classify_batch)
+        entries: Записи с ключами title, content, full_text_cleaned
+        threshold: Минимальная уверенность для принятия ответа этапа 1
 
-def clean_html(html_text: str) -> str:
-    """Удаляет HTML теги и декодирует HTML сущности"""
-    if not html_text:
-        return ""
-    text = re.sub(r'<!\[CDATA\[(.*?)\]\]>', r'\1', html_text, flags=re.DOTALL)
-    text = re.sub(r'<[^>]+>', ' ', text)
-    text = unescape(text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    Returns:
+        (классификации в порядке entries, статистика этапов)
+    """
+    started = time.perf_counter()
+    results = classifier.classify_batch([(entry['title'], entry['content']) for entry in entries])
+    stage1_seconds = time.perf_counter() - started
+
+    retry_indices = [
+        i for i, (entry, (_, confidence)) in enumerate(zip(entries, results))
+        if confidence < threshold and len(entry['full_text_cleaned']) > len(entry['content'])
+    ]
+
+    stage2_seconds = 0.0
+    if retry_indices:
+        started = time.perf_counter()
+        retried = classifier.classify_batch([
+            (entries[i]['title'], entries[i]['full_text_cleaned']) for i in retry_indices
+        ])
+        stage2_seconds = time.perf_counter() - started
+        for i, result in zip(retry_indices, retried):
+            results[i] = result
+
+    # Экономия в символах полного текста, которые не ушли в модель: время,
+    # измеренное через пул воркеров, включает IPC и загрузку модели и
+    # не годится для оценки сэкономленного CPU
+    retry_set = set(retry_indices)
+    skipped_chars = sum(
+        len(entry['full_text_cleaned'])
+        for i, entry in enumerate(entries)
+        if i not in retry_set and len(entry['full_text_cleaned']) > len(entry['content'])
+    )
+
+    return results, {
+        'stage1': len(entries) - len(retry_indices),
+        'stage2': len(retry_indices),
+        'stage1_seconds': stage1_seconds,
+        'stage2_seconds': stage2_seconds,
+        'skipped_chars': skipped_chars
+    }
 
 
 def extract_full_text_from_rss(entry: dict) -> str:
@@ -124,6 +279,29 @@ def is_recent_news(published_time: Optional[datetime], hours: int = 1) -> bool:
     return published_time >= time_threshold
 
 
+def _stream_new_entries(
+    feed_content: bytes,
+    cursor,
+    hours_filter: int,
+    limit: Optional[int]
+) -> Optional[List[Dict]]:
+    """Записи новее курсора (или окна hours_filter) потоковым парсером; None при ошибке XML"""
+    if cursor is not None and cursor.last_published_at is not None:
+        not_before = cursor.last_published_at - CURSOR_OVERLAP
+    else:
+        not_before = datetime.utcnow() - timedelta(hours=hours_filter)
+
+    stream = iter_feed_entries(
+        feed_content,
+        stop_guid=cursor.last_guid if cursor is not None else None,
+        not_before=not_before
+    )
+    try:
+        return list(islice(stream, limit) if limit else stream)
+    except ParseError:
+        return None
+
+
 def parse_rss_and_populate_db(
     rss_url: str,
     source_name: str,
@@ -134,17 +312,28 @@ def parse_rss_and_populate_db(
     hours_filter: int = 1,
     limit: Optional[int] = None,
     fixed_category: Optional[str] = None,
-    skip_classification: bool = False
-) -> List[Dict]:
+    skip_classification: bool = False,
+    feed_content: Optional[bytes] = None,
+    story_index: Optional[StoryIndex] = None,
+    use_cursor: bool = True,
+    cascade_threshold: Optional[float] = None,
+    cascade_report: Optional[Dict] = None,
+    parser_backend: str = "feedparser",
+    stage_timings: Optional[Dict[str, float]] = None
+) -> Optional[List[Dict]]:
     """
     Универсальный парсер RSS с опциональной классификацией
-    Парсит только новости за последние N часов
+    Парсит только записи новее курсора источника (последний guid и время
+    публикации); при первом запуске — новости за последние N часов
     Извлекает максимум текста из самого RSS (без парсинга HTML)
     
     Оптимизации:
-    - Батчевая вставка через bulk_insert_mappings
-    - Предварительная проверка существующих новостей одним запросом
+    - Батчевая вставка через INSERT ... ON CONFLICT (fingerprint) DO NOTHING
+    - Предварительная проверка существующих отпечатков одним запросом по индексу
+    - Классификация всех новых записей одним батчем (classify_batch)
     - Опциональная классификация через fixed_category
+    - Почти-дубликаты из разных источников объединяются в истории (story_id)
+    - Разбор останавливается на уже виденной записи, после простоя догоняет пропущенное
 
     Args:
         rss_url: URL RSS фида
@@ -153,33 +342,80 @@ def parse_rss_and_populate_db(
         News: ORM модель News
         NewsCategory: Enum категорий
         classifier: Объект NewsClassifier для классификации (опционально)
-        hours_filter: Парсить новости за последние N часов (по умолчанию 1)
+        hours_filter: Окно в часах для первого запуска, пока у источника нет курсора
         limit: Максимальное количество записей
         fixed_category: Если указана, все новости получат эту категорию (минус AI)
         skip_classification: Если True, пропускает вызов классификатора
+        feed_content: Уже скачанное тело фида (если передано, rss_url не запрашивается)
+        story_index: Индекс историй для кластеризации почти-дубликатов (опционально)
+        use_cursor: Использовать курсор источника (таблица feed_cursors)
+        cascade_threshold: Порог уверенности каскадной классификации (None — без каскада)
+        cascade_report: Если передан, в него суммируется статистика этапов каскада
+        parser_backend: "feedparser" или "streaming" — потоковый разбор уже скачанного
+                        тела фида, который останавливается на первой виденной или
+                        слишком старой записи (при некорректном XML — откат на feedparser)
+        stage_timings: Если передан, в него суммируется время этапов в секундах
+                       (parse, clean, dedup, classify, insert, cluster)
 
     Returns:
-        Список добавленных новостей с ID
+        Список добавленных новостей с ID или None, если фид не удалось
+        разобрать или сохранить (транзакция откачена)
     """
     try:
-        feed = feedparser.parse(rss_url)
         added_news = []
         skipped_old = 0
 
-        entries = feed.entries[:limit] if limit else feed.entries
+        cursor = load_feed_cursor(session, source_name) if use_cursor else None
+
+        timer = time.perf_counter()
 
-        titles_to_check = []
+        def mark(stage: str):
+            nonlocal timer
+            now = time.perf_counter()
+            if stage_timings is not None:
+                stage_timings[stage] = stage_timings.get(stage, 0.0) + now - timer
+            timer = now
+
+        entries = None
+        if parser_backend == "streaming" and feed_content is not None:
+            entries = _stream_new_entries(feed_content, cursor, hours_filter, limit)
+            if entries is None:
+                print(f"⚠️  {source_name}: потоковый разбор не удался, используем feedparser")
+
+        if entries is None:
+            feed = feedparser.parse(feed_content if feed_content is not None else rss_url)
+            entries = feed.entries[:limit] if limit else feed.entries
+        mark('parse')
+
+        newest_guid = None
+        newest_published = None
+
+        fingerprints_to_check = []
         entries_data = []
 
         for entry in entries:
             try:
+                guid = entry_guid(entry)
+                if newest_guid is None:
+                    newest_guid = guid
+                if cursor is not None and guid and guid == cursor.last_guid:
+                    # Дальше идут уже обработанные записи
+                    break
+
                 published = None
                 if 'published_parsed' in entry and entry.published_parsed:
                     published = datetime(*entry.published_parsed[:6])
                 elif 'updated_parsed' in entry and entry.updated_parsed:
                     published = datetime(*entry.updated_parsed[:6])
 
-                if not is_recent_news(published, hours=hours_filter):
+                if published and (newest_published is None or published > newest_published):
+                    newest_published = published
+
+                if cursor is not None and cursor.last_published_at is not None:
+                    if is_behind_cursor(cursor, published):
+                        skipped_old += 1
+                        continue
+                elif not is_recent_news(published, hours=hours_filter):
                     skipped_old += 1
                     continue
 
@@ -197,8 +433,10 @@ def parse_rss_and_populate_db(
                 if not title or not content:
                     continue
 
-                titles_to_check.append(title[:300])
+                fingerprint = news_fingerprint(title, source_url)
+                fingerprints_to_check.append(fingerprint)
                 entries_data.append({
+                    'fingerprint': fingerprint,
                     'title': title,
                     'content': content,
                     'full_text_cleaned': full_text_cleaned,
@@ -209,23 +447,54 @@ def parse_rss_and_populate_db(
             except Exception as e:
                 print(f"⚠️  Ошибка при обработке записи: {str(e)}")
                 continue
-
-        existing_titles = set()
-        if titles_to_check:
-            existing_news = session.query(News.title).filter(
-                News.title.in_(titles_to_check),
-                News.source_name == source_name
+        mark('clean')
+
+        # Отсекаем уже известные новости до классификации; окончательную
+        # защиту от дублей (в т.ч. между источниками) даёт уникальный индекс
+        existing_fingerprints = set()
+        if fingerprints_to_check:
+            existing_news = session.query(News.fingerprint).filter(
+                News.fingerprint.in_(fingerprints_to_check)
             ).all()
-            existing_titles = {title[0] for title in existing_news}
-
-        news_to_insert = []
+            existing_fingerprints = {fingerprint[0] for fingerprint in existing_news}
 
+        new_entries = []
         for entry_data in entries_data:
-            title = entry_data['title']
-            
-            if title[:300] in existing_titles:
+            if entry_data['fingerprint'] in existing_fingerprints:
                 continue
+            existing_fingerprints.add(entry_data['fingerprint'])
+            new_entries.append(entry_data)
+        mark('dedup')
+
+        # Все новости без фиксированной категории классифицируются одним вызовом модели
+        classifications = []
+        if not fixed_category and not skip_classification and new_entries:
+            if not classifier:
+                raise ValueError("Classifier required when fixed_category is not set")
+
+            if cascade_threshold is not None:
+                classifications, cascade_stats = classify_cascade(classifier, new_entries, cascade_threshold)
+                print(f"🪜 {source_name}: каскад — этап 1: {cascade_stats['stage1']}, "
+                      f"этап 2: {cascade_stats['stage2']}, "
+                      f"не классифицировано символов полного текста: {cascade_stats['skipped_chars']}")
+                if cascade_report is not None:
+                    for key, value in cascade_stats.items():
+                        cascade_report[key] = cascade_report.get(key, 0) + value
+            else:
+                batch_items = []
+                for entry_data in new_entries:
+                    content = entry_data['content']
+                    full_text_cleaned = entry_data['full_text_cleaned']
+                    classification_text = full_text_cleaned if len(full_text_cleaned) > len(content) else content
+                    batch_items.append((entry_data['title'], classification_text))
+
+                classifications = classifier.classify_batch(batch_items)
+        mark('classify')
 
+        news_to_insert = []
+
+        for i, entry_data in enumerate(new_entries):
+            title = entry_data['title']
             content = entry_data['content']
             full_text_cleaned = entry_data['full_text_cleaned']
             source_url = entry_data['source_url']
@@ -238,11 +507,7 @@ def parse_rss_and_populate_db(
                 category_str = 'SOCIETY'
                 confidence = 0.5
             else:
-                if not classifier:
-                    raise ValueError("Classifier required when fixed_category is not set")
-                
-                classification_text = full_text_cleaned if len(full_text_cleaned) > len(content) else content
-                category_str, confidence = classifier.classify(title, classification_text)
+                category_str, confidence = classifications[i]
 
             # Преобразуем в enum
             try:
@@ -253,8 +518,8 @@ def parse_rss_and_populate_db(
 
             summary = content[:300] if len(content) > 300 else None
 
-            # Подготавливаем словарь для bulk_insert_mappings
             news_to_insert.append({
+                'fingerprint': entry_data['fingerprint'],
                 'title': title[:300],
                 'content': content,
                 'summary': summary,
@@ -268,6 +533,7 @@ def parse_rss_and_populate_db(
             })
 
             added_news.append({
+                'fingerprint': entry_data['fingerprint'],
                 'title': title[:50] + '...' if len(title) > 50 else title,
                 'source': source_name,
                 'category': category_str,
@@ -280,9 +546,29 @@ def parse_rss_and_populate_db(
 
         # Батчевая вставка всех новостей
         if news_to_insert:
+            stories = {}
             try:
-                session.bulk_insert_mappings(News, news_to_insert)
+                inserted = insert_news_ignore_duplicates(session, News, news_to_insert)
+                mark('insert')
+
+                if story_index is not None and inserted:
+                    stories = assign_story_ids(session, News, story_index, [
+                        {
+                            'id': inserted[row['fingerprint']],
+                            'title': row['title'],
+                            'content': row['content'],
+                            'created_at': row['created_at']
+                        }
+                        for row in news_to_insert if row['fingerprint'] in inserted
+                    ])
+                mark('cluster')
+
                 session.commit()
+
+                added_news = [item for item in added_news if item['fingerprint'] in inserted]
+                for item in added_news:
+                    item['id'] = inserted[item.pop('fingerprint')]
+                    item['story_id'] = stories.get(item['id'], item['id'])
                 
                 full_rss_count = sum(1 for item in added_news if item.get('used_full_rss'))
                 fixed_cat_count = sum(1 for item in added_news if item.get('used_fixed_category'))
@@ -292,16 +578,26 @@ def parse_rss_and_populate_db(
                       f"пропущено старых: {skipped_old})")
             except Exception as e:
                 session.rollback()
+                # Откатившиеся новости не должны оставаться в индексе историй
+                if story_index is not None:
+                    story_index.discard(stories)
                 print(f"❌ Ошибка при сохранении: {str(e)}")
-                return []
+                return None
         else:
             print(f"ℹ️  {source_name}: новых новостей не найдено (пропущено старых: {skipped_old})")
 
+        if use_cursor and newest_guid is not None:
+            advance_feed_cursor(session, source_name, cursor, newest_guid, newest_published)
+            session.commit()
+        mark('insert')
+
         return added_news
 
     except Exception as e:
+        # Откат отменяет и несохранённые изменения кэша валидаторов этого фида
+        session.rollback()
         print(f"❌ Ошибка при парсинге {rss_url}: {str(e)}")
-        return []
+        return None
 
 
 def parse_multiple_rss_sources(
@@ -350,6 +646,154 @@ def parse_multiple_rss_sources(
             skip_classification=False
         )
         
-        results[name] = added
+        results[name] = added or []
     
     return results
+
+
+async def parse_multiple_rss_sources_async(
+    sources: List[Dict],
+    session: Session,
+    News,
+    NewsCategory,
+    classifier: Optional[NewsClassifier] = None,
+    hours_filter: int = 1,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    client=None,
+    use_http_cache: bool = True,
+    story_index: Optional[StoryIndex] = None,
+    source_stats: Optional[Dict[str, Dict]] = None,
+    cascade_threshold: Optional[float] = None,
+    parser_backend: str = "feedparser",
+    stage_timings: Optional[Dict[str, float]] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Парсит несколько RSS источников параллельно, не блокируя event loop
+
+    Все фиды скачиваются одновременно через общий пул keep-alive соединений.
+    Разбор, классификация и запись в БД выполняются в рабочем потоке по мере
+    готовности фидов, по одному источнику за раз (сессия не потокобезопасна).
+    Время цикла ограничено самым медленным источником, а не суммой всех.
+
+    С use_http_cache запросы условные (ETag / Last-Modified): при ответе 304
+    или неизменившемся теле фида разбор, очистка и запросы к БД пропускаются.
+
+    Args:
+        sources: Список словарей с параметрами источников (как в parse_multiple_rss_sources)
+        session: SQLAlchemy session, принадлежащая только этому вызову: она
+                 используется из рабочих потоков и не должна одновременно
+                 использоваться в event loop (например, обработчиками бота)
+        News: ORM модель News
+        NewsCategory: Enum категорий
+        classifier: Объект NewsClassifier
+        hours_filter: Парсить новости за последние N часов
+        concurrency: Максимальное количество одновременных запросов
+        timeout: Таймаут на один источник в секундах
+        client: Общий httpx.AsyncClient (опционально)
+        use_http_cache: Использовать кэш HTTP валидаторов (таблица feed_http_cache)
+        story_index: Индекс историй для кластеризации почти-дубликатов (опционально)
+        source_stats: Если передан, заполняется итогами по источникам
+                      {source_name: {"ok", "status", "new_items", "error", "elapsed"}}
+        cascade_threshold: Порог уверенности каскадной классификации (None — без каскада)
+        parser_backend: Парсер фидов: "feedparser" или "streaming"
+        stage_timings: Если передан, в него суммируется время этапов в секундах;
+                       fetch — сумма времени запросов (они идут параллельно)
+
+    Returns:
+        Словарь {source_name: [added_news]}
+    """
+    if source_stats is None:
+        source_stats = {}
+
+    valid_sources = []
+    for source in sources:
+        if not source.get('url') or not source.get('name'):
+            print(f"⚠️  Пропущен источник: отсутствует url или name")
+            continue
+        valid_sources.append(source)
+
+    results = {source['name']: [] for source in valid_sources}
+    cascade_report = {}
+
+    feed_cache = {}
+    request_headers = {}
+    if use_http_cache:
+        feed_cache = await asyncio.to_thread(load_feed_cache, session, valid_sources)
+        request_headers = {name: conditional_headers(entry) for name, entry in feed_cache.items()}
+        # Новые записи кэша сохраняются сразу: откат вставки новостей одного
+        # источника не должен удалять записи остальных
+        await asyncio.to_thread(session.commit)
+
+    async for fetched in fetch_feeds(
+        valid_sources,
+        client=client,
+        concurrency=concurrency,
+        timeout=timeout,
+        request_headers=request_headers
+    ):
+        source = fetched['source']
+        name = source['name']
+        source_stats[name] = {
+            'ok': not fetched['error'],
+            'status': fetched['status'],
+            'new_items': 0,
+            'error': fetched['error'],
+            'elapsed': fetched['elapsed']
+        }
+        if stage_timings is not None:
+            stage_timings['fetch'] = stage_timings.get('fetch', 0.0) + fetched['elapsed']
+
+        if fetched['error']:
+            print(f"❌ Ошибка при загрузке {source['url']}: {fetched['error']}")
+            continue
+
+        if use_http_cache:
+            changed = await asyncio.to_thread(check_feed_changed, feed_cache[name], fetched)
+            if not changed:
+                await asyncio.to_thread(session.commit)
+                print(f"💾 {name}: фид не изменился, пропускаем (HTTP {fetched['status']})")
+                continue
+            # Новые валидаторы фиксируются в одной транзакции с новостями (commit
+            # внутри разбора); при ошибке разбор откатывает транзакцию, старые
+            # ETag / Last-Modified / хэш остаются, и фид будет разобран повторно
+
+        added = await asyncio.to_thread(
+            parse_rss_and_populate_db,
+            rss_url=source['url'],
+            source_name=name,
+            session=session,
+            News=News,
+            NewsCategory=NewsCategory,
+            classifier=classifier,
+            hours_filter=hours_filter,
+            fixed_category=source.get('fixed_category'),
+            skip_classification=False,
+            feed_content=fetched['content'],
+            story_index=story_index,
+            cascade_threshold=cascade_threshold,
+            cascade_report=cascade_report,
+            parser_backend=parser_backend,
+            stage_timings=stage_timings
+        )
+        if added is None:
+            # Скачанный, но не разобранный фид — ошибка, а не «новых записей нет»:
+            # иначе адаптивное расписание увеличит интервал опроса
+            source_stats[name]['ok'] = False
+            source_stats[name]['error'] = 'ошибка разбора или сохранения'
+            continue
+        if use_http_cache:
+            # Если новостей не было, валидаторы ещё не зафиксированы
+            await asyncio.to_thread(session.commit)
+        results[name] = added
+        source_stats[name]['new_items'] = len(added)
+
+    if cascade_report:
+        print(f"🪜 Каскад за цикл: этап 1 — {cascade_report['stage1']}, этап 2 — {cascade_report['stage2']}, "
+              f"не классифицировано символов полного текста: {cascade_report['skipped_chars']}")
+
+    if use_http_cache:
+        stats = await asyncio.to_thread(get_feed_cache_stats, session)
+        print(f"📊 Кэш RSS фидов:\n{format_feed_cache_stats(stats)}")
+
+    return results
@@ -0,0 +1,168 @@
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.text_normalizer import normalize_whitespace
+
+
+SearchKey = Tuple[str, str, int]
+
+
+def normalize_query(query: str) -> str:
+    """Запрос для ключа кэша: нижний регистр и одиночные пробелы"""
+    return normalize_whitespace(query.lower())
+
+
+class _Entry:
+    __slots__ = ("generation", "stored_at", "ids", "scores", "hits")
+
+    def __init__(self, generation: int, stored_at: float, results: List[Tuple[int, float]], hits: int = 0):
+        self.generation = generation
+        self.stored_at = stored_at
+        self.ids = array("q", [news_id for news_id, _ in results])
+        self.scores = array("d", [score for _, score in results])
+        self.hits = hits
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self.ids) + sys.getsizeof(self.scores)
+
+
+class SearchResultCache:
+    """
+    LRU-кэш результатов поиска: только id новостей и оценки
+
+    Ключ — нормализованный запрос, категория и limit. Результаты сбрасываются
+    не по времени, а по поколению индекса: загрузка новостей вызывает
+    invalidate(), и записи прошлого поколения считаются промахом. ttl_seconds —
+    дополнительный предел для оценок, зависящих от времени (свежесть в
+    полнотекстовом поиске). Устаревшие записи популярных запросов остаются
+    в кэше, чтобы prewarm() мог пересчитать их после загрузки.
+    """
+
+    def __init__(
+        self,
+        compute: Callable[[str, str, int], List[Tuple[int, float]]],
+        max_size: int = 1000,
+        ttl_seconds: Optional[float] = 600.0
+    ):
+        """
+        Args:
+            compute: Поиск compute(query, category, limit) -> [(id новости, оценка)];
+                     category — имя категории (или нескольких через запятую) либо ""
+            max_size: Максимальное количество записей
+            ttl_seconds: Предельный возраст записи (None — без ограничения)
+        """
+        self.compute = compute
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self.entries: "OrderedDict[SearchKey, _Entry]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key_size(key: SearchKey) -> int:
+        return sys.getsizeof(key[0]) + sys.getsizeof(key[1])
+
+    def _store(self, key: SearchKey, results: List[Tuple[int, float]], generation: int, hits: int):
+        entry = _Entry(generation, time.monotonic(), results, hits)
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= old.size + self._key_size(key)
+        self.entries[key] = entry
+        self.memory_bytes += entry.size + self._key_size(key)
+        while len(self.entries) > self.max_size:
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.memory_bytes -= evicted.size + self._key_size(evicted_key)
+
+    def _is_fresh(self, entry: _Entry) -> bool:
+        if entry.generation != self.generation:
+            self.stale += 1
+            return False
+        if self.ttl_seconds is not None and time.monotonic() - entry.stored_at > self.ttl_seconds:
+            self.expired += 1
+            return False
+        return True
+
+    def search(self, query: str, category: str = "", limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Результаты из кэша или новый поиск через compute
+
+        Returns:
+            Список (id новости, оценка) в порядке выдачи
+        """
+        key = (normalize_query(query), category, limit)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self.entries.move_to_end(key)
+                entry.hits += 1
+                self.hits += 1
+                return list(zip(entry.ids, entry.scores))
+            self.misses += 1
+            generation = self.generation
+            hits = entry.hits + 1 if entry is not None else 1
+
+        # Поиск вне блокировки: параллельные запросы не ждут друг друга
+        results = self.compute(key[0], category, limit)
+        with self._lock:
+            # Если за время поиска индекс обновился, запись уже устарела
+            if generation == self.generation:
+                self._store(key, results, generation, hits)
+        return results
+
+    def invalidate(self):
+        """Новое поколение индекса: все записи становятся устаревшими"""
+        with self._lock:
+            self.generation += 1
+
+    def popular(self, count: int) -> List[SearchKey]:
+        """Ключи самых частых запросов"""
+        with self._lock:
+            ranked = sorted(self.entries.items(), key=lambda item: item[1].hits, reverse=True)
+        return [key for key, _ in ranked[:count]]
+
+    def prewarm(self, count: int = 20) -> int:
+        """
+        Пересчитывает устаревшие записи самых частых запросов (после загрузки новостей)
+
+        Returns:
+            Количество пересчитанных запросов
+        """
+        warmed = 0
+        for key in self.popular(count):
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry is None or entry.generation == self.generation:
+                    continue
+                generation, hits = self.generation, entry.hits
+            results = self.compute(*key)
+            with self._lock:
+                if generation == self.generation:
+                    self._store(key, results, generation, hits)
+                    warmed += 1
+        return warmed
+
+    def stats(self) -> Dict:
+        """Счётчики попаданий и промахов и оценка занятой памяти"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "stale": self.stale,
+            "expired": self.expired,
+            "generation": self.generation,
+            "memory_bytes": self.memory_bytes
+        }
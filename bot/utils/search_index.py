@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+# Версия формата снимка; снимки другой версии игнорируются и индекс строится заново
+FORMAT_VERSION = 2
+CURRENT_FILE = "CURRENT"
+KEEP_SNAPSHOTS = 2
+
+ARRAYS = ("data", "indices", "indptr", "idf", "ids", "categories", "story_ids", "created_at")
+
+
+def category_partitions(categories: np.ndarray) -> Dict[str, Tuple[int, int]]:
+    """
+    Диапазоны строк категорий в массиве, отсортированном по категории
+
+    Returns:
+        Словарь {категория: (начало, конец)}; пустой, если массив не отсортирован
+    """
+    if categories.size == 0 or (categories[1:] < categories[:-1]).any():
+        return {}
+    names, starts = np.unique(categories, return_index=True)
+    ends = np.append(starts[1:], categories.size)
+    return {str(name): (int(start), int(end)) for name, start, end in zip(names, starts, ends)}
+
+
+class IndexState:
+    """
+    Неизменяемое состояние поискового индекса
+
+    Матрица хранится сегментами: основной (после слияния) и добавленные
+    загрузкой новостей. Массивы метаданных общие для всех сегментов в том же
+    порядке строк. Изменения создают новый объект, который подменяет старый
+    одним присваиванием, поэтому запрос, взявший ссылку, видит согласованный индекс.
+
+    Строки основного сегмента отсортированы по категории (partitions — их
+    диапазоны), поэтому запрос с фильтром по категории считает близость
+    только к строкам своей категории.
+    """
+
+    __slots__ = ("segments", "ids", "categories", "story_ids", "created_at", "partitions")
+
+    def __init__(
+        self,
+        segments: Tuple[sparse.csr_matrix, ...],
+        ids: np.ndarray,
+        categories: np.ndarray,
+        story_ids: np.ndarray,
+        created_at: np.ndarray,
+        partitions: Optional[Dict[str, Tuple[int, int]]] = None
+    ):
+        self.segments = tuple(segments)
+        self.ids = ids
+        self.categories = categories
+        self.story_ids = story_ids
+        self.created_at = created_at
+        if partitions is None:
+            partitions = category_partitions(categories[:self.segments[0].shape[0]])
+        self.partitions = partitions
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids.max()) if self.ids.size else 0
+
+    @property
+    def vectors(self) -> sparse.csr_matrix:
+        """Вся матрица одним CSR (копия, если сегментов несколько)"""
+        if len(self.segments) == 1:
+            return self.segments[0]
+        return sparse.vstack(self.segments, format="csr")
+
+    def similarities(self, query_vector) -> np.ndarray:
+        """Косинусная близость запроса ко всем строкам, по сегментам"""
+        return np.concatenate([cosine_similarity(query_vector, segment)[0] for segment in self.segments])
+
+    def category_rows(self, names: List[str]) -> np.ndarray:
+        """Номера строк указанных категорий: диапазоны основного сегмента и совпадения в остальных"""
+        head = self.segments[0].shape[0]
+        if self.partitions:
+            parts = [np.arange(*self.partitions[name]) for name in names if name in self.partitions]
+        else:
+            parts = [np.flatnonzero(np.isin(self.categories[:head], names))]
+        parts.append(head + np.flatnonzero(np.isin(self.categories[head:], names)))
+        return np.concatenate(parts).astype(np.int64, copy=False)
+
+    def partition_similarities(self, query_vector, names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Косинусная близость запроса только к строкам указанных категорий
+
+        Диапазоны категорий в основном сегменте считаются по отдельности и
+        склеиваются; в сегментах загрузки строки категорий выбираются маской.
+
+        Returns:
+            (номера строк, близость)
+        """
+        if not self.partitions:
+            rows = self.category_rows(names)
+            return rows, self.similarities(query_vector)[rows]
+        rows, scores = [], []
+        for name in names:
+            if name in self.partitions:
+                start, end = self.partitions[name]
+                rows.append(np.arange(start, end))
+                scores.append(cosine_similarity(query_vector, self.segments[0][start:end])[0])
+        offset = self.segments[0].shape[0]
+        for segment in self.segments[1:]:
+            matched = np.flatnonzero(np.isin(self.categories[offset:offset + segment.shape[0]], names))
+            if matched.size:
+                rows.append(offset + matched)
+                scores.append(cosine_similarity(query_vector, segment[matched])[0])
+            offset += segment.shape[0]
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return np.concatenate(rows).astype(np.int64, copy=False), np.concatenate(scores)
+
+    def append(
+        self,
+        vectors: sparse.csr_matrix,
+        ids: np.ndarray,
+        categories: np.ndarray,
+        story_ids: np.ndarray,
+        created_at: np.ndarray
+    ) -> "IndexState":
+        """Новое состояние с ещё одним сегментом; существующие матрицы не копируются"""
+        return IndexState(
+            self.segments + (vectors,),
+            np.concatenate([self.ids, ids]),
+            np.concatenate([self.categories, categories]),
+            np.concatenate([self.story_ids, story_ids]),
+            np.concatenate([self.created_at, created_at]),
+            self.partitions
+        )
+
+    def merged(self, not_before: Optional[np.datetime64] = None) -> "IndexState":
+        """
+        Сливает сегменты в один, отбрасывает строки старше not_before
+        и сортирует строки по категории
+
+        Returns:
+            Новое состояние с одним сегментом (self, если менять нечего)
+        """
+        rows = None
+        if not_before is not None:
+            keep = self.created_at >= not_before
+            if not keep.all():
+                rows = np.flatnonzero(keep)
+        if rows is None:
+            if len(self.segments) == 1 and self.partitions:
+                return self
+            rows = np.arange(self.ids.size)
+        # Сортировка устойчивая: внутри категории строки остаются по порядку добавления
+        rows = rows[np.argsort(self.categories[rows], kind="stable")]
+        return IndexState(
+            (self.vectors[rows],),
+            self.ids[rows],
+            self.categories[rows],
+            self.story_ids[rows],
+            self.created_at[rows]
+        )
+
+
+def vectorizer_signature(vectorizer: TfidfVectorizer) -> str:
+    """Хэш параметров векторизатора: снимок с другими параметрами (стоп-слова, n-граммы) не подходит"""
+    params = {
+        key: value for key, value in vectorizer.get_params().items()
+        if key not in ("vocabulary", "dtype", "stop_words", "tokenizer", "preprocessor", "analyzer")
+    }
+    params["stop_words"] = sorted(vectorizer.stop_words or [])
+    params["analyzer"] = vectorizer.analyzer if isinstance(vectorizer.analyzer, str) else repr(vectorizer.analyzer)
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def oov_counts(vectorizer: TfidfVectorizer, corpus: List[str]) -> Tuple[int, int]:
+    """
+    Сколько терминов текстов не входит в словарь обученного векторизатора
+
+    Returns:
+        (терминов вне словаря, всего терминов)
+    """
+    analyzer = vectorizer.build_analyzer()
+    vocabulary = vectorizer.vocabulary_
+    oov = total = 0
+    for document in corpus:
+        terms = analyzer(document)
+        total += len(terms)
+        oov += sum(1 for term in terms if term not in vocabulary)
+    return oov, total
+
+
+def save_index(
+    path: str,
+    vectorizer: TfidfVectorizer,
+    state: IndexState,
+    vocabulary_meta: Optional[Dict] = None
+) -> str:
+    """
+    Сохраняет обученный индекс в новый каталог снимка и атомарно переключает CURRENT
+
+    Массивы пишутся в формате .npy, поэтому читаются через np.load(mmap_mode='r')
+    без копирования в память, и несколько процессов могут делить один снимок.
+    vocabulary_meta (когда обучен словарь, доля терминов вне словаря) пишется
+    в meta.json и переживает снимки, сделанные без переобучения.
+
+    Returns:
+        Путь к каталогу снимка
+    """
+    os.makedirs(path, exist_ok=True)
+    name = f"snapshot-{time.time_ns()}"
+    snapshot_dir = os.path.join(path, name)
+    tmp_dir = snapshot_dir + ".tmp"
+    os.makedirs(tmp_dir)
+
+    vectors = sparse.csr_matrix(state.vectors, dtype=np.float64)
+    arrays = {
+        "data": vectors.data,
+        # Типы индексов scipy сохраняются как есть, иначе при загрузке будет копия
+        "indices": vectors.indices,
+        "indptr": vectors.indptr,
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64),
+        "ids": np.asarray(state.ids, dtype=np.int64),
+        "categories": np.asarray(state.categories, dtype="U16"),
+        "story_ids": np.asarray(state.story_ids, dtype=np.int64),
+        "created_at": np.asarray(state.created_at, dtype="datetime64[s]")
+    }
+    for key, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{key}.npy"), array)
+
+    with open(os.path.join(tmp_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+        json.dump({term: int(index) for term, index in vectorizer.vocabulary_.items()}, f, ensure_ascii=False)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "signature": vectorizer_signature(vectorizer),
+        "shape": list(vectors.shape),
+        "max_id": int(arrays["ids"].max()) if arrays["ids"].size else 0,
+        "vocabulary": vocabulary_meta or {}
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    os.replace(tmp_dir, snapshot_dir)
+    current_tmp = os.path.join(path, CURRENT_FILE + ".tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(current_tmp, os.path.join(path, CURRENT_FILE))
+
+    _prune_snapshots(path, keep=name)
+    return snapshot_dir
+
+
+def _prune_snapshots(path: str, keep: str):
+    # Оставляем несколько последних снимков: процессы, уже открывшие старый, дочитают его
+    snapshots = sorted(
+        entry for entry in os.listdir(path)
+        if entry.startswith("snapshot-") and entry != keep
+    )
+    for entry in snapshots[:-(KEEP_SNAPSHOTS - 1) or None]:
+        shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+
+def load_index(path: str, vectorizer: TfidfVectorizer) -> Optional[Dict]:
+    """
+    Открывает текущий снимок индекса через memory-map
+
+    Args:
+        path: Каталог индекса
+        vectorizer: Ненастроенный векторизатор с нужными параметрами; в него
+                    загружаются словарь и IDF снимка
+
+    Returns:
+        Словарь {"state": IndexState, "meta"} или None,
+        если снимка нет, он другой версии формата или других параметров
+    """
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            snapshot_dir = os.path.join(path, f.read().strip())
+        with open(os.path.join(snapshot_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("format_version") != FORMAT_VERSION or meta.get("signature") != vectorizer_signature(vectorizer):
+        return None
+
+    try:
+        arrays = {key: np.load(os.path.join(snapshot_dir, f"{key}.npy"), mmap_mode="r") for key in ARRAYS}
+        with open(os.path.join(snapshot_dir, "vocabulary.json"), "r", encoding="utf-8") as f:
+            vocabulary = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    vectorizer.set_params(vocabulary=vocabulary)
+    vectorizer.idf_ = np.asarray(arrays["idf"])
+    vectorizer.vocabulary_ = vocabulary
+
+    vectors = sparse.csr_matrix(
+        (arrays["data"], arrays["indices"], arrays["indptr"]),
+        shape=tuple(meta["shape"]),
+        copy=False
+    )
+    state = IndexState(
+        (vectors,), arrays["ids"], arrays["categories"], arrays["story_ids"], arrays["created_at"]
+    )
+    return {"state": state, "meta": meta}
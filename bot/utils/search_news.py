@@ -1,7 +1,22 @@
-from sqlalchemy import func, or_
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sklearn.base import clone
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sqlalchemy import func, literal, or_
 from sqlalchemy.orm import Session
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from models import News, NewsCategory
+from utils.search_index import IndexState, save_index, load_index, oov_counts
+from utils.bm25_index import BM25Index, RussianTokenizer
+from utils.dense_index import IVF_MIN_ROWS, IVFIndex, VectorStore, normalize_rows, search_vectors
+from utils.search_cache import SearchResultCache
+from utils.classification_cache import model_version
 
 def search_news_by_keyword(
     session : Session, 
@@ -42,10 +57,175 @@ def search_news_by_keyword(
     return query.limit(limit).all()
 
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
-from typing import List, Tuple
+# Конфигурация PostgreSQL для tsvector / tsquery (стемминг и стоп-слова)
+FULLTEXT_CONFIG = 'russian'
+# Сколько самых свежих совпадений ранжируется по ts_rank
+FULLTEXT_CANDIDATES = 200
+# За столько дней вес новости в выдаче уменьшается вдвое
+RECENCY_HALF_LIFE_DAYS = 3.0
+# Кандидаты сначала ищутся только среди новостей за столько дней
+FULLTEXT_WINDOW_DAYS = 30
+# Короче триграммный индекс не используется, и поиск подстроки читает всю таблицу
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _prefix_tsquery(keyword: str) -> Optional[str]:
+    # Недописанное слово ("прода") ищется как префикс лексемы по тому же GIN индексу
+    words = re.findall(r"[^\W_]+", keyword)
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def _fulltext_ids(
+    session: Session,
+    tsquery,
+    limit: int,
+    category: Optional[NewsCategory],
+    window_days: Optional[float] = None
+) -> List[Tuple[int, float]]:
+    # Свежие совпадения по GIN индексу; ранжируется ограниченный набор кандидатов,
+    # поэтому частые слова не заставляют считать ts_rank по всей таблице.
+    # В подзапросе только id: сортировка по дате не таскает за собой tsvector
+    candidates = session.query(News.id).filter(News.search_vector.op('@@')(tsquery))
+    if category:
+        candidates = candidates.filter(News.category == category)
+    if window_days:
+        candidates = candidates.filter(
+            News.created_at >= func.timezone('utc', func.now()) - func.make_interval(0, 0, 0, int(window_days))
+        )
+    candidates = candidates.order_by(News.created_at.desc()).limit(FULLTEXT_CANDIDATES).subquery()
+
+    age_days = func.greatest(
+        func.extract('epoch', func.timezone('utc', func.now()) - News.created_at) / 86400.0, 0
+    )
+    score = func.ts_rank(News.search_vector, tsquery) * func.power(0.5, age_days / RECENCY_HALF_LIFE_DAYS)
+    rows = session.query(
+        News.id, score.label('score')
+    ).join(candidates, candidates.c.id == News.id).order_by(score.desc(), News.id.desc()).limit(limit).all()
+    return [(row.id, float(row.score)) for row in rows]
+
+
+def _ranked_fulltext_ids(
+    session: Session, tsquery, limit: int, category: Optional[NewsCategory]
+) -> List[Tuple[int, float]]:
+    # Сначала окно FULLTEXT_WINDOW_DAYS: старые новости из-за поправки на свежесть
+    # почти не попадают в выдачу, а условие по дате делает план предсказуемым для
+    # слов средней частоты. Вся таблица — только если в окне мало совпадений
+    found = _fulltext_ids(session, tsquery, limit, category, FULLTEXT_WINDOW_DAYS)
+    if len(found) < limit:
+        found = _fulltext_ids(session, tsquery, limit, category)
+    return found
+
+
+def _trigram_ids(
+    session: Session, keyword: str, limit: int, category: Optional[NewsCategory]
+) -> List[Tuple[int, float]]:
+    # Подстрока или слово с опечаткой в заголовке: оба условия обслуживает триграммный GIN индекс
+    pattern = '%' + keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    similarity = func.word_similarity(keyword, News.title)
+    query = session.query(News.id, similarity.label('score')).filter(
+        or_(
+            News.title.ilike(pattern, escape='\\'),
+            literal(keyword).op('<%')(News.title)
+        )
+    )
+    if category:
+        query = query.filter(News.category == category)
+    rows = query.order_by(
+        similarity.desc(),
+        News.created_at.desc()
+    ).limit(limit).all()
+    return [(row.id, float(row.score)) for row in rows]
+
+
+def search_news_fulltext_ids(
+    session: Session,
+    keyword: str,
+    limit: int = 3,
+    category: Optional[NewsCategory] = None
+) -> List[Tuple[int, float]]:
+    """
+    Полнотекстовый поиск без загрузки новостей (см. search_news_fulltext)
+    
+    Returns:
+        Список (id новости, оценка) по убыванию релевантности; у поиска
+        через LIKE (не PostgreSQL) оценки нет, там 0.0
+    """
+    keyword = keyword.strip()
+    if not keyword:
+        return []
+    if session.get_bind().dialect.name != 'postgresql':
+        return [(news.id, 0.0) for news in search_news_by_keyword(session, keyword, limit=limit, category=category)]
+    found = _ranked_fulltext_ids(session, func.websearch_to_tsquery(FULLTEXT_CONFIG, keyword), limit, category)
+    prefix = _prefix_tsquery(keyword)
+    if not found and prefix:
+        found = _ranked_fulltext_ids(session, func.to_tsquery(FULLTEXT_CONFIG, prefix), limit, category)
+    if not found and len(keyword) >= TRIGRAM_MIN_LENGTH:
+        found = _trigram_ids(session, keyword, limit, category)
+    return found
+
+
+def search_news_fulltext(
+    session: Session,
+    keyword: str,
+    limit: int = 3,
+    category: Optional[NewsCategory] = None
+) -> List[News]:
+    """
+    Полнотекстовый поиск новостей (PostgreSQL)
+    
+    Запрос разбирается websearch_to_tsquery с русской морфологией и ищется
+    по колонке search_vector (GIN индекс). Результаты ранжируются ts_rank
+    с поправкой на свежесть. Если совпадений нет, слова запроса ищутся как
+    префиксы лексем, затем подстрока или похожее слово в заголовках через
+    pg_trgm. На других СУБД используется search_news_by_keyword.
+    
+    Args:
+        session: SQLAlchemy session
+        keyword: Текст запроса
+        limit: Максимальное количество результатов
+        category: Опциональная фильтрация по категории
+    
+    Returns:
+        Список найденных новостей по убыванию релевантности
+    """
+    keyword = keyword.strip()
+    if not keyword:
+        return []
+    if session.get_bind().dialect.name != 'postgresql':
+        return search_news_by_keyword(session, keyword, limit=limit, category=category)
+    
+    news_ids = [news_id for news_id, _ in search_news_fulltext_ids(session, keyword, limit, category)]
+    found = hydrate_news(session, news_ids)
+    return [found[news_id] for news_id in news_ids if news_id in found]
+
+
+def keyword_search_ids(session: Session, keyword_engine, keyword: str, category: str = "", limit: int = 10):
+    """
+    Поиск /search без загрузки новостей (функция для SearchResultCache)
+    
+    Args:
+        session: SQLAlchemy session
+        keyword_engine: KeywordSearchEngine или None (тогда полнотекстовый поиск в БД)
+        keyword: Текст запроса
+        category: Имя категории или "" без фильтра
+        limit: Максимальное количество результатов
+    
+    Returns:
+        Список (id новости, оценка) по убыванию релевантности
+    """
+    category = NewsCategory[category] if category else None
+    if keyword_engine is not None:
+        return keyword_engine.search_ids(keyword, limit, category)
+    return search_news_fulltext_ids(session, keyword, limit, category)
+
+
+# models/stopwords-ru.txt репозитория (в контейнере это /app/models/stopwords-ru.txt)
+STOPWORDS_PATH = os.getenv(
+    "STOPWORDS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models", "stopwords-ru.txt")
+)
 
 def load_stopwords(filepath: str) -> Set[str]:
     """
@@ -65,41 +245,440 @@ def load_stopwords(filepath: str) -> Set[str]:
         print(f"⚠️ Ошибка при загрузке стоп-слов: {e}")
         return set()
 
+def hydrate_news(session: Session, news_ids: List[int]) -> Dict[int, News]:
+    """
+    Загружает новости одним запросом WHERE id IN (...)
+
+    Returns:
+        Словарь {id: News}; удалённых новостей в нём нет
+    """
+    if not news_ids:
+        return {}
+    news_list = session.query(News).filter(News.id.in_([int(news_id) for news_id in news_ids])).all()
+    return {news.id: news for news in news_list}
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Индексы k наибольших значений по убыванию: argpartition O(n) + сортировка только k элементов"""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= scores.size:
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def hydrate_ranked(session: Session, found: List[Tuple[int, float]]) -> List[Tuple[News, float]]:
+    """Загрузка найденных (id, оценка) одним запросом с сохранением порядка"""
+    news_map = hydrate_news(session, [news_id for news_id, _ in found])
+    return [(news_map[news_id], score) for news_id, score in found if news_id in news_map]
+
+
+def category_names(
+    category: Optional[NewsCategory] = None,
+    categories: Optional[List[NewsCategory]] = None
+) -> Optional[List[str]]:
+    """Имена категорий фильтра поиска (одна категория или несколько) или None без фильтра"""
+    selected = list(categories or []) + ([category] if category else [])
+    if not selected:
+        return None
+    return sorted({item.name for item in selected})
+
+
+# Доля терминов вне словаря считается только после стольких терминов новых новостей
+OOV_MIN_TERMS = 20_000
+
+
 class NewsSearchEngine:
-    """Движок поиска похожих новостей на основе TF-IDF"""
-    def __init__(self):
+    """
+    Движок поиска похожих новостей на основе TF-IDF
+    
+    Словарь (max_features самых частых терминов) и IDF фиксируются при обучении,
+    новые новости векторизуются ими без переобучения. Это дёшево, но со временем
+    словарь устаревает: новые имена и темы не попадают в векторы. Поэтому фоновое
+    слияние переобучает векторизатор на окне хранения, если словарю больше
+    vocabulary_max_age_days дней или доля терминов вне словаря у новых новостей
+    выросла больше чем на oov_drift относительно обучающего корпуса.
+    """
+    def __init__(
+        self,
+        retention_days: Optional[float] = None,
+        text_cache_size: int = 0,
+        vocabulary_max_age_days: Optional[float] = None,
+        oov_drift: float = 0.1
+    ):
+        """
+        Args:
+            retention_days: Хранить в индексе только новости за последние N дней
+                            (None — все); старые отбрасываются при слиянии сегментов
+            text_cache_size: Размер кэша результатов search_by_text (0 — без кэша)
+            vocabulary_max_age_days: Переобучать словарь старше N дней
+                                     (по умолчанию retention_days; None и 0 — не по возрасту)
+            oov_drift: Переобучать, если доля терминов вне словаря выросла на столько
+                       (None — не по доле)
+        """
         self.vectorizer = TfidfVectorizer(
             max_features=1000,
-            stop_words=list(load_stopwords("/app/models/")),
+            stop_words=sorted(load_stopwords(STOPWORDS_PATH)),
             ngram_range=(1, 2),
             min_df=1
         )
-        self.news_vectors = None
-        self.news_ids = None
+        self.retention_days = retention_days
+        self.vocabulary_max_age_days = vocabulary_max_age_days if vocabulary_max_age_days is not None else retention_days
+        self.oov_drift = oov_drift
+        # Когда обучен словарь (time.time()) и доля терминов вне словаря в обучающем корпусе
+        self.vocabulary_fitted_at: Optional[float] = None
+        self.fit_oov_rate: Optional[float] = None
+        # Термины новостей, добавленных после обучения: всего и вне словаря
+        self._new_terms = 0
+        self._new_oov_terms = 0
+        # Неизменяемое состояние индекса; изменения подменяют ссылку целиком
+        self._state: Optional[IndexState] = None
+        # Сериализует подмену состояния между загрузкой новостей и слиянием
+        self._lock = threading.Lock()
+        # Сбрасывается (новое поколение) при каждой подмене состояния
+        self.text_cache = SearchResultCache(
+            self._cached_text_ids, max_size=text_cache_size, ttl_seconds=None
+        ) if text_cache_size else None
+    
+    def _invalidate_cache(self):
+        if self.text_cache is not None:
+            self.text_cache.invalidate()
+    
+    @property
+    def news_vectors(self):
+        return None if self._state is None else self._state.vectors
+    
+    @property
+    def news_ids(self):
+        return None if self._state is None else self._state.ids
+    
+    @property
+    def news_categories(self):
+        return None if self._state is None else self._state.categories
+    
+    @property
+    def news_story_ids(self):
+        return None if self._state is None else self._state.story_ids
+    
+    @property
+    def max_id(self) -> int:
+        return 0 if self._state is None else self._state.max_id
+    
+    @property
+    def segments_count(self) -> int:
+        return 0 if self._state is None else len(self._state.segments)
+    
+    def _not_before(self) -> Optional[datetime]:
+        if not self.retention_days:
+            return None
+        return datetime.utcnow() - timedelta(days=self.retention_days)
+    
+    def _query_rows(self, session, after_id: int = 0, news_ids: Optional[List[int]] = None):
+        query = session.query(
+            News.id, News.title, News.content, News.category, News.story_id, News.created_at
+        )
+        if news_ids is not None:
+            query = query.filter(News.id.in_(news_ids))
+        else:
+            query = query.filter(News.id > after_id)
+        not_before = self._not_before()
+        if not_before is not None:
+            query = query.filter(News.created_at >= not_before)
+        return query.order_by(News.id).all()
+    
+    @staticmethod
+    def _row_arrays(rows):
+        now = datetime.utcnow()
+        corpus = [f"{row.title} {row.content}" for row in rows]
+        ids = np.array([row.id for row in rows], dtype=np.int64)
+        categories = np.array([row.category.name for row in rows], dtype="U16")
+        story_ids = np.array([row.story_id or row.id for row in rows], dtype=np.int64)
+        created_at = np.array([row.created_at or now for row in rows], dtype="datetime64[s]")
+        return corpus, ids, categories, story_ids, created_at
+    
+    def _snapshot(self) -> Tuple[TfidfVectorizer, Optional[IndexState]]:
+        # Переобучение меняет словарь и матрицу вместе: берём согласованную пару
+        with self._lock:
+            return self.vectorizer, self._state
     
     def fit(self, session):
         """
-        Обучение на всех новостях из базы
-        Вызывайте периодически для обновления индекса
+        Обучение на всех новостях из базы (в пределах окна хранения)
+        
+        Словарь и IDF после обучения фиксируются: новые новости добавляются
+        сегментами через add_news / update без повторного обучения. Повторный
+        вызов (переобучение) строит новый векторизатор и подменяет его вместе
+        с матрицей; запросы в это время работают со старой парой.
         """
-        news_list = session.query(News).all()
+        rows = self._query_rows(session)
         
-        if not news_list:
+        if not rows:
             return
+        # Строки по категориям: основной сегмент сразу разбит на диапазоны категорий
+        rows = sorted(rows, key=lambda row: row.category.name)
         
         # Создаем корпус текстов
-        corpus = [f"{news.title} {news.content}" for news in news_list]
-        self.news_ids = [news.id for news in news_list]
+        corpus, ids, categories, story_ids, created_at = self._row_arrays(rows)
         
         # Векторизация
-        self.news_vectors = self.vectorizer.fit_transform(corpus)
+        vectorizer = clone(self.vectorizer)
+        vectors = vectorizer.fit_transform(corpus)
+        oov, total = oov_counts(vectorizer, corpus)
+        with self._lock:
+            self.vectorizer = vectorizer
+            self._state = IndexState((vectors,), ids, categories, story_ids, created_at)
+            self.vocabulary_fitted_at = time.time()
+            self.fit_oov_rate = oov / total if total else 0.0
+            self._new_terms = self._new_oov_terms = 0
+        self._invalidate_cache()
+    
+    def _append_rows(self, rows) -> int:
+        corpus, ids, categories, story_ids, created_at = self._row_arrays(rows)
+        # Векторизация вне блокировки: запросы и слияние в это время не ждут.
+        # Если за это время словарь переобучили, векторы считаются заново
+        while True:
+            vectorizer = self.vectorizer
+            vectors = vectorizer.transform(corpus)
+            oov, total = oov_counts(vectorizer, corpus)
+            with self._lock:
+                if vectorizer is not self.vectorizer:
+                    continue
+                self._new_terms += total
+                self._new_oov_terms += oov
+                known = np.isin(ids, self._state.ids)
+                if known.any():
+                    keep = ~known
+                    vectors, ids, categories, story_ids, created_at = (
+                        vectors[keep], ids[keep], categories[keep], story_ids[keep], created_at[keep]
+                    )
+                if ids.size:
+                    self._state = self._state.append(vectors, ids, categories, story_ids, created_at)
+                break
+        if ids.size:
+            self._invalidate_cache()
+        return int(ids.size)
+    
+    def add_news(self, session, news_ids: List[int]) -> int:
+        """
+        Добавляет только что сохранённые новости в индекс новым сегментом
+        
+        Вызывается загрузкой новостей после вставки: тексты читаются одним
+        запросом WHERE id IN (...) и векторизуются обученным векторизатором.
+        Уже проиндексированные id пропускаются.
+        
+        Args:
+            session: SQLAlchemy session
+            news_ids: id добавленных новостей
+        
+        Returns:
+            Количество добавленных в индекс новостей
+        """
+        if self._state is None:
+            self.fit(session)
+            return 0 if self._state is None else len(self._state.ids)
+        if not news_ids:
+            return 0
+        
+        rows = self._query_rows(session, news_ids=[int(news_id) for news_id in news_ids])
+        if not rows:
+            return 0
+        return self._append_rows(rows)
+    
+    def update(self, session) -> int:
+        """
+        Добавляет в индекс новости, появившиеся после последней проиндексированной
+        
+        Словарь и IDF не пересчитываются: новые тексты векторизуются уже
+        обученным векторизатором.
+        
+        Returns:
+            Количество добавленных новостей
+        """
+        if self._state is None:
+            self.fit(session)
+            return 0 if self._state is None else len(self._state.ids)
+        
+        rows = self._query_rows(session, after_id=self.max_id)
+        if not rows:
+            return 0
+        return self._append_rows(rows)
+    
+    def merge(self) -> Dict[str, int]:
+        """
+        Сливает сегменты в одну матрицу и удаляет новости старше окна хранения
+        
+        Тяжёлая часть выполняется без блокировки над снимком состояния;
+        сегменты, добавленные за это время, переносятся в новое состояние.
+        Безопасно вызывать из фонового потока.
+        
+        Returns:
+            Статистика {"segments", "rows", "expired"}
+        """
+        state = self._state
+        if state is None:
+            return {"segments": 0, "rows": 0, "expired": 0}
+        
+        not_before = self._not_before()
+        merged = state.merged(np.datetime64(not_before, "s") if not_before else None)
+        expired = int(state.ids.size - merged.ids.size)
+        
+        with self._lock:
+            current = self._state
+            prefix = current.segments[:len(state.segments)]
+            if len(prefix) != len(state.segments) or any(a is not b for a, b in zip(prefix, state.segments)):
+                # Индекс переобучили за время слияния: сливать уже нечего
+                return {"segments": len(state.segments), "rows": int(current.ids.size), "expired": 0}
+            appended = len(current.segments) - len(state.segments)
+            if appended:
+                tail = current.ids.size - state.ids.size
+                merged = IndexState(
+                    merged.segments + current.segments[-appended:],
+                    np.concatenate([merged.ids, current.ids[-tail:]]),
+                    np.concatenate([merged.categories, current.categories[-tail:]]),
+                    np.concatenate([merged.story_ids, current.story_ids[-tail:]]),
+                    np.concatenate([merged.created_at, current.created_at[-tail:]])
+                )
+            self._state = merged
+        if merged is not state:
+            self._invalidate_cache()
+        
+        return {
+            "segments": len(state.segments),
+            "rows": int(merged.ids.size),
+            "expired": expired
+        }
+    
+    def merge_and_save(self, path: str, session: Optional[Session] = None) -> Dict:
+        """
+        Слияние сегментов и запись нового снимка на диск (для фоновой задачи)
+        
+        Если передана сессия и словарь устарел (см. refit_reason), вместо
+        слияния индекс обучается заново на окне хранения: полный проход по
+        новостям окна, зато новые термины снова попадают в векторы.
+        
+        Returns:
+            Статистика {"segments", "rows", "expired", "refit"}
+        """
+        reason = self.refit_reason() if session is not None else None
+        if reason:
+            segments = self.segments_count
+            self.fit(session)
+            # Новости, сохранённые во время обучения
+            self.update(session)
+            self.merge()
+            self.save(path)
+            return {"segments": segments, "rows": len(self.news_ids), "expired": 0, "refit": reason}
+        
+        stats = self.merge()
+        stats["refit"] = None
+        if self._state is not None and (stats["segments"] > 1 or stats["expired"]):
+            self.save(path)
+        return stats
+    
+    def refit_reason(self) -> Optional[str]:
+        """
+        Нужно ли переобучить словарь и IDF
+        
+        Returns:
+            "age" — словарь старше vocabulary_max_age_days, "oov" — доля терминов
+            вне словаря у новых новостей выросла больше чем на oov_drift, иначе None
+        """
+        if self._state is None or self.vocabulary_fitted_at is None:
+            return None
+        if self.vocabulary_max_age_days and time.time() - self.vocabulary_fitted_at > self.vocabulary_max_age_days * 86400:
+            return "age"
+        if (
+            self.oov_drift is not None and self.fit_oov_rate is not None
+            and self._new_terms >= OOV_MIN_TERMS
+            and self._new_oov_terms / self._new_terms - self.fit_oov_rate > self.oov_drift
+        ):
+            return "oov"
+        return None
+    
+    def save(self, path: str) -> str:
+        """Сохраняет индекс на диск (см. utils.search_index)"""
+        vectorizer, state = self._snapshot()
+        return save_index(path, vectorizer, state, {
+            "fitted_at": self.vocabulary_fitted_at,
+            "oov_rate": self.fit_oov_rate
+        })
+    
+    def load(self, path: str) -> bool:
+        """
+        Открывает сохранённый индекс через memory-map
+        
+        Returns:
+            False если снимка нет или он не подходит (другая версия формата или параметры)
+        """
+        index = load_index(path, self.vectorizer)
+        if index is None:
+            return False
+        vocabulary = index["meta"].get("vocabulary", {})
+        with self._lock:
+            self._state = index["state"]
+            # В старых снимках времени обучения нет: считаем от записи снимка
+            self.vocabulary_fitted_at = vocabulary.get("fitted_at") or index["meta"].get("created_at")
+            self.fit_oov_rate = vocabulary.get("oov_rate")
+            self._new_terms = self._new_oov_terms = 0
+        self._invalidate_cache()
+        return True
+    
+    def load_or_fit(self, session, path: str):
+        """
+        Быстрый старт: снимок с диска плюс дообучение только на новых строках
+        
+        Если снимка нет или он устарел по формату, индекс строится заново и
+        сохраняется. Если после снимка появились новости, они добавляются
+        и снимок перезаписывается.
+        """
+        if self.load(path):
+            added = self.update(session)
+            print(f"🔎 Поисковый индекс загружен с диска: {len(self.news_ids)} новостей, новых: {added}")
+            if not added:
+                return
+            self.merge()
+        else:
+            self.fit(session)
+            print(f"🔎 Поисковый индекс построен заново: {0 if self.news_ids is None else len(self.news_ids)} новостей")
+        
+        if self._state is not None:
+            self.save(path)
+    
+    @staticmethod
+    def _top(
+        state: IndexState,
+        similarities: np.ndarray,
+        top_n: int,
+        mask: Optional[np.ndarray] = None,
+        min_score: Optional[float] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Отбор top_n (id, оценка) по маске и порогу
+        
+        rows — номера строк индекса, к которым относятся similarities
+        (запрос по разделам категорий); без них — все строки.
+        """
+        scores = similarities.astype(np.float64, copy=True)
+        if mask is not None:
+            scores[~mask] = -np.inf
+        
+        indices = top_k_indices(scores, top_n)
+        indices = indices[np.isfinite(scores[indices])]
+        if min_score is not None:
+            indices = indices[scores[indices] > min_score]
+        
+        news_ids = state.ids[indices if rows is None else rows[indices]].tolist()
+        return [(news_id, float(scores[idx])) for idx, news_id in zip(indices, news_ids)]
     
     def find_similar(
         self, 
         news: News, 
         session : Session,
         top_n: int = 10,
-        exclude_same_category: bool = False
+        exclude_same_category: bool = False,
+        category: Optional[NewsCategory] = None
     ) -> List[Tuple[News, float]]:
         """
         Поиск похожих новостей
@@ -109,48 +688,123 @@ class NewsSearchEngine:
             session: SQLAlchemy session
             top_n: Количество результатов
             exclude_same_category: Исключить новости той же категории
+            category: Искать только среди новостей этой категории
         
         Returns:
             Список кортежей (News, similarity_score)
         """
-        if self.news_vectors is None:
+        if self._state is None:
             self.fit(session)
+        return hydrate_ranked(session, self.similar_ids(news, top_n, exclude_same_category, category))
+    
+    def similar_ids(
+        self,
+        news: News,
+        top_n: int = 10,
+        exclude_same_category: bool = False,
+        category: Optional[NewsCategory] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Поиск похожих новостей без обращения к БД (для asyncio.to_thread)
+        
+        Читаются только загруженные поля news (id, title, content, story_id, category).
+        
+        Returns:
+            Список (id новости, оценка) по убыванию оценки
+        """
+        # Одна ссылка на состояние на весь запрос: фоновое слияние его не меняет
+        vectorizer, state = self._snapshot()
+        if state is None:
+            return []
         
         query_text = f"{news.title} {news.content}"
-        query_vector = self.vectorizer.transform([query_text])
+        query_vector = vectorizer.transform([query_text])
         
-        similarities = cosine_similarity(query_vector, self.news_vectors)[0]
-        similar_indices = np.argsort(similarities)[::-1]
+        rows = None
+        if category:
+            # Только раздел категории, а не вся матрица
+            rows, similarities = state.partition_similarities(query_vector, [category.name])
+            ids, story_ids, categories = state.ids[rows], state.story_ids[rows], state.categories[rows]
+        else:
+            similarities = state.similarities(query_vector)
+            ids, story_ids, categories = state.ids, state.story_ids, state.categories
         
-        results = []
-        for idx in similar_indices:
-            news_id = self.news_ids[idx]
-            
-            if news_id == news.id:
-                continue
-            
-            similar_news = session.query(News).get(news_id)
-            
-            if not similar_news:
-                continue
-            
-            if exclude_same_category and similar_news.category == news.category:
-                continue
-            
-            similarity_score = float(similarities[idx])
-            results.append((similar_news, similarity_score))
-            
-            if len(results) >= top_n:
-                break
+        mask = ids != news.id
+        # Копии той же истории из других источников похожими не считаем
+        if news.story_id:
+            mask &= story_ids != news.story_id
+        if exclude_same_category:
+            mask &= categories != news.category.name
         
-        return results
+        return self._top(state, similarities, top_n, mask, rows=rows)
+    
+    def batch_neighbors(
+        self,
+        news_ids: List[int],
+        top_n: int = 10,
+        max_chunk_cells: int = 8_000_000
+    ) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        Похожие новости той же категории сразу для многих новостей
+        
+        Новости группируются по категории, и векторы группы умножаются пачками
+        только на строки своей категории (разреженное произведение, строки
+        TF-IDF нормированы, поэтому это косинус); в пачке не больше
+        max_chunk_cells оценок. Исключаются сама новость и копии той же
+        истории, как в find_similar.
+        
+        Args:
+            news_ids: id новостей (должны быть в индексе, остальные пропускаются)
+            top_n: Соседей на новость
+            max_chunk_cells: Ограничение размера плотного блока оценок
+        
+        Returns:
+            Словарь {news_id: [(neighbor_id, score), ...]} по убыванию оценки
+        """
+        state = self._state
+        if state is None or not news_ids:
+            return {}
+        
+        positions = np.nonzero(np.isin(state.ids, np.asarray(news_ids, dtype=np.int64)))[0]
+        # Фоновая задача: сегменты склеиваются один раз на вызов
+        matrix = state.vectors
+        
+        neighbors = {}
+        for name in np.unique(state.categories[positions]):
+            group = positions[state.categories[positions] == name]
+            partition = state.category_rows([str(name)])
+            block = matrix[partition]
+            chunk_size = max(1, max_chunk_cells // partition.size)
+            
+            for start in range(0, group.size, chunk_size):
+                rows = group[start:start + chunk_size]
+                scores = (matrix[rows] @ block.T).toarray()
+                
+                excluded = state.story_ids[rows][:, None] == state.story_ids[partition][None, :]
+                excluded |= rows[:, None] == partition[None, :]
+                scores[excluded] = -np.inf
+                
+                k = min(top_n, partition.size)
+                candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+                order = np.argsort(-candidate_scores, axis=1, kind='stable')
+                candidates = partition[np.take_along_axis(candidates, order, axis=1)]
+                candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+                
+                for row, row_candidates, row_scores in zip(rows, candidates, candidate_scores):
+                    keep = row_scores > 0
+                    neighbors[int(state.ids[row])] = list(zip(
+                        state.ids[row_candidates[keep]].tolist(), row_scores[keep].tolist()
+                    ))
+        return neighbors
     
     def search_by_text(
         self, 
         query_text: str, 
         session,
         top_n: int = 10,
-        category: Optional[NewsCategory] = None
+        category: Optional[NewsCategory] = None,
+        categories: Optional[List[NewsCategory]] = None
     ) -> List[Tuple[News, float]]:
         """
         Поиск новостей по произвольному тексту запроса
@@ -160,36 +814,523 @@ class NewsSearchEngine:
             session: SQLAlchemy session
             top_n: Количество результатов
             category: Опциональная фильтрация по категории
+            categories: Несколько категорий: результаты их разделов сливаются в общий топ
         
         Returns:
             Список кортежей (News, relevance_score)
         """
-        if self.news_vectors is None:
+        if self._state is None:
             self.fit(session)
+        names = category_names(category, categories)
+        if self.text_cache is not None:
+            found = self.text_cache.search(query_text, ",".join(names or []), top_n)
+        else:
+            found = self.search_text_ids(query_text, top_n, names)
+        return hydrate_ranked(session, found)
+    
+    def _cached_text_ids(self, query_text: str, category: str, top_n: int) -> List[Tuple[int, float]]:
+        return self.search_text_ids(query_text, top_n, category.split(",") if category else None)
+    
+    def search_text_ids(
+        self,
+        query_text: str,
+        top_n: int = 10,
+        names: Optional[List[str]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Поиск по тексту без обращения к БД
         
-        query_vector = self.vectorizer.transform([query_text])
+        Args:
+            query_text: Текст запроса
+            top_n: Количество результатов
+            names: Имена категорий фильтра (None — все)
         
-        similarities = cosine_similarity(query_vector, self.news_vectors)[0]
+        Returns:
+            Список (id новости, оценка) по убыванию оценки
+        """
+        vectorizer, state = self._snapshot()
+        if state is None:
+            return []
         
-        similar_indices = np.argsort(similarities)[::-1][:top_n * 2]
+        query_vector = vectorizer.transform([query_text])
         
-        results = []
-        for idx in similar_indices:
-            news_id = self.news_ids[idx]
-            similar_news = session.query(News).get(news_id)
-            
-            if not similar_news:
-                continue
-            
-            if category and similar_news.category != category:
+        if names:
+            rows, similarities = state.partition_similarities(query_vector, names)
+            return self._top(state, similarities, top_n, min_score=0.1, rows=rows)
+        
+        similarities = state.similarities(query_vector)
+        return self._top(state, similarities, top_n, min_score=0.1)
+
+
+class DenseSearchEngine:
+    """
+    Поиск похожих новостей по векторам предложений fastText
+    
+    Векторы новостей считаются при загрузке и дописываются в файл float32
+    (VectorStore, memory-map). Поиск — приближённый по спискам IVF, пока
+    новостей меньше IVF_MIN_ROWS — точный перебор. Интерфейс совпадает с
+    NewsSearchEngine (find_similar, search_by_text, add_news, batch_neighbors).
+    
+    Для фильтра по категории хранятся номера строк каждой категории,
+    дополняемые при дописывании: небольшой раздел перебирается точно,
+    иначе после IVF в редкой категории могло бы остаться меньше top_n новостей.
+    
+    Векторы привязаны к версии файла модели: у каждой версии свой каталог
+    внутри path, после замены модели векторы пересчитываются (при старте или
+    фоновой задачей), а каталоги прежних моделей удаляются.
+    """
+    def __init__(
+        self,
+        embedder,
+        nprobe: int = 16,
+        retention_days: Optional[float] = None,
+        text_cache_size: int = 0
+    ):
+        """
+        Args:
+            embedder: Объект с методом embed_batch(texts) и атрибутом model_path
+                      (NewsClassifier / ClassifierPool / CachedClassifier)
+            nprobe: Сколько списков IVF просматривать на запрос (больше — точнее и медленнее)
+            retention_days: Окно хранения похожих новостей (news_neighbors)
+            text_cache_size: Размер кэша результатов search_by_text (0 — без кэша)
+        """
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self.retention_days = retention_days
+        self.path: Optional[str] = None
+        # Версия модели, которой посчитаны векторы хранилища
+        self.version: Optional[str] = None
+        self._store: Optional[VectorStore] = None
+        self._ivf: Optional[IVFIndex] = None
+        # {категория: (сколько строк просмотрено, номера строк категории)}
+        self._partitions: Dict[str, Tuple[int, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        # Сбрасывается при дописывании векторов и перестроении списков IVF
+        self.text_cache = SearchResultCache(
+            self._cached_text_ids, max_size=text_cache_size, ttl_seconds=None
+        ) if text_cache_size else None
+    
+    @property
+    def news_ids(self):
+        return None if self._store is None else self._store.ids
+    
+    @property
+    def max_id(self) -> int:
+        return int(self._store.ids.max()) if self._store is not None and len(self._store) else 0
+    
+    @property
+    def segments_count(self) -> int:
+        # Списки IVF и хвост строк, добавленных после их построения
+        if self._store is None:
+            return 0
+        indexed = self._ivf.indexed_rows if self._ivf is not None else 0
+        return int(self._ivf is not None) + int(len(self._store) > indexed)
+    
+    def _append_rows(self, rows, batch_size: int = 1000) -> int:
+        added = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            vectors = self.embedder.embed_batch([f"{row.title} {row.content}" for row in batch])
+            with self._lock:
+                if self._store is None:
+                    self._store = VectorStore(self._store_path(self.version), vectors.shape[1], self.version)
+                known = np.isin([row.id for row in batch], self._store.ids)
+                keep = ~known
+                if not keep.any():
+                    continue
+                batch = [row for row, flag in zip(batch, keep) if flag]
+                self._store.append(
+                    vectors[keep],
+                    np.array([row.id for row in batch], dtype=np.int64),
+                    np.array([row.category.name for row in batch], dtype="U16"),
+                    np.array([row.story_id or row.id for row in batch], dtype=np.int64)
+                )
+            added += len(batch)
+        if added and self.text_cache is not None:
+            self.text_cache.invalidate()
+        return added
+    
+    @staticmethod
+    def _query_rows(session, after_id: int = 0, news_ids: Optional[List[int]] = None):
+        query = session.query(News.id, News.title, News.content, News.category, News.story_id)
+        if news_ids is not None:
+            query = query.filter(News.id.in_(news_ids))
+        else:
+            query = query.filter(News.id > after_id)
+        return query.order_by(News.id).all()
+    
+    def _model_version(self) -> str:
+        return model_version(self.embedder.model_path)
+    
+    def _store_path(self, version: str) -> str:
+        return os.path.join(self.path, "vectors-" + hashlib.sha1(version.encode("utf-8")).hexdigest()[:12])
+    
+    def _remove_stale_stores(self):
+        # Векторы прежних моделей (и файлы раскладки без версии прямо в path)
+        keep = os.path.basename(self._store_path(self.version))
+        for entry in os.listdir(self.path):
+            if entry == keep:
                 continue
-            
-            similarity_score = float(similarities[idx])
-            
-            if similarity_score > 0.1:
-                results.append((similar_news, similarity_score))
-            
-            if len(results) >= top_n:
-                break
+            entry_path = os.path.join(self.path, entry)
+            if os.path.isdir(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+            else:
+                os.remove(entry_path)
+    
+    def load_or_fit(self, session, path: str):
+        """
+        Открывает сохранённые векторы и списки IVF, досчитывает векторы новых новостей
+        
+        При первом запуске и после замены модели векторы считаются для всех
+        новостей (пачками через embedder).
+        """
+        self.path = path
+        self.version = self._model_version()
+        with self._lock:
+            self._store = VectorStore.open(self._store_path(self.version), model_version=self.version)
+            self._partitions = {}
+        added = self._append_rows(self._query_rows(session, after_id=self.max_id))
+        if self._store is not None:
+            self._ivf = IVFIndex.load(self._store.path, len(self._store))
+        self.rebuild()
+        if os.path.isdir(path):
+            self._remove_stale_stores()
+        total = 0 if self._store is None else len(self._store)
+        print(f"🔎 Векторный индекс: {total} новостей, новых: {added}, IVF: {'да' if self._ivf else 'нет'}")
+    
+    def reembed(self, session, batch_size: int = 1000) -> int:
+        """
+        Пересчитывает векторы всех новостей после замены модели
         
-        return results
+        Новое хранилище строится в отдельном каталоге, запросы до подмены
+        работают со старым. После подмены дописываются новости, сохранённые
+        за время пересчёта, и векторы прежней модели удаляются.
+        
+        Returns:
+            Количество новостей в новом хранилище
+        """
+        version = self._model_version()
+        rows = self._query_rows(session)
+        store = None
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            vectors = self.embedder.embed_batch([f"{row.title} {row.content}" for row in batch])
+            if store is None:
+                store = VectorStore(self._store_path(version), vectors.shape[1], version)
+            store.append(
+                vectors,
+                np.array([row.id for row in batch], dtype=np.int64),
+                np.array([row.category.name for row in batch], dtype="U16"),
+                np.array([row.story_id or row.id for row in batch], dtype=np.int64)
+            )
+        with self._lock:
+            self._store = store
+            self.version = version
+            self._ivf = None
+            self._partitions = {}
+        self._append_rows(self._query_rows(session, after_id=self.max_id))
+        if self.text_cache is not None:
+            self.text_cache.invalidate()
+        self.rebuild()
+        self._remove_stale_stores()
+        return 0 if self._store is None else len(self._store)
+    
+    def add_news(self, session, news_ids: List[int]) -> int:
+        """Дописывает векторы только что сохранённых новостей (один запрос WHERE id IN)"""
+        if not news_ids or self.path is None:
+            return 0
+        rows = self._query_rows(session, news_ids=[int(news_id) for news_id in news_ids])
+        return self._append_rows(rows)
+    
+    def rebuild(self, tail_ratio: float = 0.1) -> bool:
+        """
+        Перестраивает списки IVF, если хвост без индекса больше tail_ratio от базы
+        
+        Returns:
+            True если списки перестроены
+        """
+        store = self._store
+        if store is None or len(store) < IVF_MIN_ROWS:
+            return False
+        indexed = self._ivf.indexed_rows if self._ivf is not None else 0
+        if self._ivf is not None and len(store) - indexed <= indexed * tail_ratio:
+            return False
+        ivf = IVFIndex.build(store.vectors)
+        self._ivf = ivf
+        if self.text_cache is not None:
+            self.text_cache.invalidate()
+        ivf.save(store.path)
+        return True
+    
+    def merge_and_save(self, path: str, session: Optional[Session] = None) -> Dict:
+        """
+        Фоновая задача: перестроение списков IVF при большом хвосте
+        
+        Векторы уже на диске (дописываются в add_news), path оставлен для
+        совместимости с NewsSearchEngine.merge_and_save. Если файл модели
+        заменён и передана сессия, векторы пересчитываются (reembed).
+        """
+        segments = self.segments_count
+        if session is not None and self.path is not None and self._model_version() != self.version:
+            rows = self.reembed(session)
+            return {"segments": segments, "rows": rows, "expired": 0, "refit": "model"}
+        rebuilt = self.rebuild()
+        return {
+            "segments": segments if rebuilt else 1,
+            "rows": 0 if self._store is None else len(self._store),
+            "expired": 0,
+            "refit": None
+        }
+    
+    def _category_rows(self, store: VectorStore, categories: np.ndarray, count: int, name: str) -> np.ndarray:
+        """
+        Номера строк категории среди первых count строк; дописанные строки досматриваются
+        
+        Разделы относятся к хранилищу store: после подмены хранилища (reembed)
+        запрос, начатый со старым, считает раздел заново и не кэширует его.
+        """
+        empty = (0, np.empty(0, dtype=np.int64))
+        with self._lock:
+            seen, rows = self._partitions.get(name, empty) if self._store is store else empty
+        if seen < count:
+            rows = np.concatenate([rows, seen + np.flatnonzero(categories[seen:count] == name)])
+            with self._lock:
+                if self._store is store and self._partitions.get(name, (0,))[0] < count:
+                    self._partitions[name] = (count, rows)
+        return rows[:np.searchsorted(rows, count)]
+    
+    def _search(
+        self,
+        query: np.ndarray,
+        top_n: int,
+        exclude_id: Optional[int] = None,
+        exclude_story: Optional[int] = None,
+        categories: Optional[List[str]] = None,
+        exclude_category: Optional[str] = None
+    ) -> List[Tuple[int, float]]:
+        store = self._store
+        if store is None:
+            return []
+        # Массивы берутся один раз: дописывание во время запроса их не меняет
+        vectors, ids, row_categories, story_ids = store.vectors, store.ids, store.categories, store.story_ids
+        
+        def allowed(rows):
+            mask = np.ones(rows.size, dtype=bool)
+            if exclude_id is not None:
+                mask &= ids[rows] != exclude_id
+            if exclude_story is not None:
+                mask &= story_ids[rows] != exclude_story
+            if categories:
+                mask &= np.isin(row_categories[rows], categories)
+            if exclude_category is not None:
+                mask &= row_categories[rows] != exclude_category
+            return mask
+        
+        partition = None
+        if categories:
+            parts = [self._category_rows(store, row_categories, len(vectors), name) for name in categories]
+            # Большой раздел хорошо представлен в списках IVF, небольшой дешевле перебрать
+            if self._ivf is None or sum(part.size for part in parts) <= IVF_MIN_ROWS:
+                partition = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+        
+        rows, scores = search_vectors(
+            vectors, query, top_n, ivf=self._ivf, nprobe=self.nprobe, allowed=allowed, rows=partition
+        )
+        return list(zip(ids[rows].tolist(), scores.tolist()))
+    
+    def _news_vector(self, news: News) -> np.ndarray:
+        store = self._store
+        positions = np.nonzero(store.ids[:len(store.vectors)] == news.id)[0]
+        if positions.size:
+            return np.asarray(store.vectors[positions[0]], dtype=np.float32)
+        return normalize_rows(self.embedder.embed_batch([f"{news.title} {news.content}"]))[0]
+    
+    def find_similar(
+        self, 
+        news: News, 
+        session : Session,
+        top_n: int = 10,
+        exclude_same_category: bool = False,
+        category: Optional[NewsCategory] = None
+    ) -> List[Tuple[News, float]]:
+        """Поиск похожих новостей (см. NewsSearchEngine.find_similar)"""
+        return hydrate_ranked(session, self.similar_ids(news, top_n, exclude_same_category, category))
+    
+    def similar_ids(
+        self,
+        news: News,
+        top_n: int = 10,
+        exclude_same_category: bool = False,
+        category: Optional[NewsCategory] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Поиск похожих новостей без обращения к БД (см. NewsSearchEngine.similar_ids)
+        
+        Если вектора новости ещё нет в хранилище, он считается через embedder
+        (обращение к пулу процессов), поэтому из цикла событий — только через
+        asyncio.to_thread.
+        """
+        if self._store is None:
+            return []
+        return self._search(
+            self._news_vector(news),
+            top_n,
+            exclude_id=news.id,
+            exclude_story=news.story_id or None,
+            categories=[category.name] if category else None,
+            exclude_category=news.category.name if exclude_same_category else None
+        )
+    
+    def search_by_text(
+        self, 
+        query_text: str, 
+        session,
+        top_n: int = 10,
+        category: Optional[NewsCategory] = None,
+        categories: Optional[List[NewsCategory]] = None
+    ) -> List[Tuple[News, float]]:
+        """
+        Поиск новостей по тексту запроса (см. NewsSearchEngine.search_by_text)
+        
+        Вектор запроса считается через embedder (пул процессов): из цикла событий
+        вызывать search_text_ids через asyncio.to_thread и загружать новости
+        hydrate_ranked, как в NewsManager.handle_similar_news.
+        """
+        if self._store is None or not query_text.strip():
+            return []
+        names = category_names(category, categories)
+        if self.text_cache is not None:
+            found = self.text_cache.search(query_text, ",".join(names or []), top_n)
+        else:
+            found = self.search_text_ids(query_text, top_n, names)
+        return hydrate_ranked(session, found)
+    
+    def _cached_text_ids(self, query_text: str, category: str, top_n: int) -> List[Tuple[int, float]]:
+        return self.search_text_ids(query_text, top_n, category.split(",") if category else None)
+    
+    def search_text_ids(
+        self,
+        query_text: str,
+        top_n: int = 10,
+        names: Optional[List[str]] = None
+    ) -> List[Tuple[int, float]]:
+        """Поиск по тексту без обращения к БД (см. NewsSearchEngine.search_text_ids)"""
+        query = normalize_rows(self.embedder.embed_batch([query_text]))[0]
+        return self._search(query, top_n, categories=names)
+    
+    def batch_neighbors(self, news_ids: List[int], top_n: int = 10) -> Dict[int, List[Tuple[int, float]]]:
+        """Похожие новости той же категории для многих новостей (см. NewsSearchEngine.batch_neighbors)"""
+        store = self._store
+        if store is None or not news_ids:
+            return {}
+        vectors, ids, categories, story_ids = store.vectors, store.ids, store.categories, store.story_ids
+        neighbors = {}
+        for row in np.nonzero(np.isin(ids[:len(vectors)], np.asarray(news_ids, dtype=np.int64)))[0]:
+            found = self._search(
+                np.asarray(vectors[row], dtype=np.float32),
+                top_n,
+                exclude_id=int(ids[row]),
+                exclude_story=int(story_ids[row]),
+                categories=[str(categories[row])]
+            )
+            neighbors[int(ids[row])] = [(news_id, score) for news_id, score in found if score > 0]
+        return neighbors
+
+
+class KeywordSearchEngine:
+    """
+    Поиск по ключевым словам без обращения к БД: BM25 по инвертированному индексу в памяти
+    
+    Альтернатива search_news_by_keyword / search_news_fulltext для /search.
+    Слова и оценки считаются в памяти процесса, из БД по первичному ключу
+    загружаются только найденные новости для показа.
+    """
+    def __init__(self, stopwords_path: str = STOPWORDS_PATH):
+        self.index = BM25Index(RussianTokenizer(load_stopwords(stopwords_path)))
+    
+    @property
+    def segments_count(self) -> int:
+        return self.index.segments_count
+    
+    @staticmethod
+    def _documents(rows):
+        return ((row.id, row.category.name, f"{row.title} {row.content}") for row in rows)
+    
+    def fit(self, session, batch_size: int = 5000) -> int:
+        """
+        Индексирует все новости из базы, читая их пачками
+        
+        Returns:
+            Количество проиндексированных новостей
+        """
+        query = session.query(News.id, News.title, News.content, News.category).filter(
+            News.id > self.index.max_id
+        ).order_by(News.id).execution_options(yield_per=batch_size)
+        
+        batch = []
+        for row in query:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.index.add(self._documents(batch))
+                batch = []
+        if batch:
+            self.index.add(self._documents(batch))
+        self.index.compact()
+        return len(self.index)
+    
+    def add_news(self, session, news_ids: List[int]) -> int:
+        """
+        Добавляет только что сохранённые новости (один запрос WHERE id IN)
+        
+        Returns:
+            Количество добавленных в индекс новостей
+        """
+        if not news_ids:
+            return 0
+        rows = session.query(News.id, News.title, News.content, News.category).filter(
+            News.id.in_([int(news_id) for news_id in news_ids])
+        ).all()
+        return self.index.add(self._documents(rows))
+    
+    def compact(self) -> int:
+        """Сливает блоки индекса в один (для фоновой задачи)"""
+        return self.index.compact()
+    
+    def search_ids(
+        self,
+        keyword: str,
+        limit: int = 3,
+        category: Optional[NewsCategory] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Поиск без обращения к БД
+        
+        Returns:
+            Список (id новости, оценка BM25) по убыванию оценки
+        """
+        news_ids, scores = self.index.scores(keyword, category.name if category else None)
+        indices = top_k_indices(scores, limit)
+        return [(int(news_ids[idx]), float(scores[idx])) for idx in indices]
+    
+    def search(
+        self,
+        session: Session,
+        keyword: str,
+        limit: int = 3,
+        category: Optional[NewsCategory] = None
+    ) -> List[News]:
+        """
+        Поиск новостей по ключевым словам
+        
+        Args:
+            session: SQLAlchemy session (только для загрузки найденных новостей)
+            keyword: Текст запроса
+            limit: Максимальное количество результатов
+            category: Опциональная фильтрация по категории
+        
+        Returns:
+            Список найденных новостей по убыванию релевантности
+        """
+        news_ids = [news_id for news_id, _ in self.search_ids(keyword, limit, category)]
+        found = hydrate_news(session, news_ids)
+        return [found[news_id] for news_id in news_ids if news_id in found]
@@ -0,0 +1,213 @@
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from utils.news_dedup import normalize_title
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def story_shingles(title: str, content: str, size: int = 3, content_chars: int = 600) -> set:
+    """
+    Множество словесных шинглов по заголовку и началу текста новости
+
+    Args:
+        title: Заголовок
+        content: Текст новости
+        size: Длина шингла в словах
+        content_chars: Сколько символов текста учитывать (лид важнее хвоста)
+
+    Returns:
+        Множество шинглов-строк
+    """
+    tokens = normalize_title(f"{title} {(content or '')[:content_chars]}").split()
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """MinHash сигнатуры для оценки сходства Жаккара между наборами шинглов"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: set) -> np.ndarray:
+        """Сигнатура длины num_perm (пустое множество даёт сигнатуру из максимумов)"""
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+class StoryIndex:
+    """
+    Онлайн-детектор почти-дубликатов: MinHash + LSH по полосам (banding)
+
+    Каждой новости назначается story_id: id первой новости истории.
+    Кандидаты ищутся по совпадению хотя бы одной полосы сигнатуры,
+    затем проверяются оценкой сходства Жаккара по полной сигнатуре.
+    Хранятся только новости за последние window_hours часов.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.5,
+        window_hours: int = 72
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window = timedelta(hours=window_hours)
+
+        self.buckets = defaultdict(set)
+        self.signatures: Dict[int, np.ndarray] = {}
+        self.story_ids: Dict[int, int] = {}
+        self.created_at: Dict[int, datetime] = {}
+        self.is_warm = False
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _add(self, news_id: int, story_id: int, signature: np.ndarray, created_at: datetime):
+        self.signatures[news_id] = signature
+        self.story_ids[news_id] = story_id
+        self.created_at[news_id] = created_at
+        for key in self._band_keys(signature):
+            self.buckets[key].add(news_id)
+
+    def _remove(self, news_id: int):
+        signature = self.signatures.pop(news_id)
+        self.story_ids.pop(news_id, None)
+        self.created_at.pop(news_id, None)
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(news_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def find_story(self, signature: np.ndarray) -> Optional[int]:
+        """
+        Ищет историю, к которой относится новость с данной сигнатурой
+
+        Returns:
+            story_id самой похожей новости или None, если похожих нет
+        """
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best_id, best_similarity = None, self.threshold
+        for candidate_id in candidates:
+            similarity = float(np.mean(self.signatures[candidate_id] == signature))
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate_id, similarity
+
+        return self.story_ids[best_id] if best_id is not None else None
+
+    def assign(self, news_id: int, title: str, content: str, created_at: Optional[datetime] = None) -> int:
+        """Назначает новости story_id и добавляет её в индекс"""
+        signature = self.hasher.signature(story_shingles(title, content))
+        story_id = self.find_story(signature)
+        if story_id is None:
+            story_id = news_id
+        self._add(news_id, story_id, signature, created_at or datetime.utcnow())
+        return story_id
+
+    def discard(self, news_ids):
+        """Убирает новости из индекса (например, если их вставка откатилась)"""
+        for news_id in news_ids:
+            if news_id in self.signatures:
+                self._remove(news_id)
+
+    def prune(self, now: Optional[datetime] = None):
+        """Удаляет из индекса новости старше окна"""
+        threshold = (now or datetime.utcnow()) - self.window
+        for news_id in [nid for nid, created in self.created_at.items() if created < threshold]:
+            self._remove(news_id)
+
+    def warm_up(self, session: Session, News, exclude_ids: Optional[set] = None):
+        """Заполняет индекс новостями за последнее окно из БД"""
+        cutoff = datetime.utcnow() - self.window
+        rows = session.query(
+            News.id, News.title, News.content, News.story_id, News.created_at
+        ).filter(News.created_at >= cutoff).order_by(News.id).all()
+
+        exclude_ids = exclude_ids or set()
+        for news_id, title, content, story_id, created_at in rows:
+            if news_id in exclude_ids:
+                continue
+            signature = self.hasher.signature(story_shingles(title, content))
+            self._add(news_id, story_id or news_id, signature, created_at)
+
+        self.is_warm = True
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+def assign_story_ids(session: Session, News, story_index: StoryIndex, news_rows: List[Dict]) -> Dict[int, int]:
+    """
+    Назначает story_id только что вставленным новостям и записывает их одним UPDATE
+
+    Новости добавляются в индекс сразу (следующие новости пачки сравниваются
+    и с ними). Если вызывающий код откатывает транзакцию, он должен убрать их
+    из индекса: story_index.discard(assignments), иначе следующие новости
+    получат story_id несуществующих строк.
+
+    Args:
+        session: SQLAlchemy session (коммит остаётся за вызывающим кодом)
+        News: ORM модель News
+        story_index: Индекс историй
+        news_rows: Словари с ключами id, title, content, created_at
+
+    Returns:
+        Словарь {news_id: story_id}
+    """
+    if not story_index.is_warm:
+        story_index.warm_up(session, News, exclude_ids={row['id'] for row in news_rows})
+    story_index.prune()
+
+    assignments = {}
+    try:
+        for row in sorted(news_rows, key=lambda r: r['id']):
+            assignments[row['id']] = story_index.assign(
+                row['id'], row['title'], row['content'], row.get('created_at')
+            )
+
+        if assignments:
+            session.execute(
+                update(News.__table__)
+                .where(News.__table__.c.id == bindparam('news_id'))
+                .values(story_id=bindparam('new_story_id')),
+                [{'news_id': news_id, 'new_story_id': story_id} for news_id, story_id in assignments.items()]
+            )
+    except Exception:
+        story_index.discard(assignments)
+        raise
+
+    return assignments
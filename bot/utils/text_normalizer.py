@@ -0,0 +1,49 @@
+import re
+from html import unescape
+
+
+_CDATA_RE = re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_URL_RE = re.compile(r'http\S+|www.\S+')
+
+
+def normalize_whitespace(text: str) -> str:
+    """Схлопывает любые пробельные символы (включая &nbsp;) в один пробел и обрезает края"""
+    # str.split() без аргументов делит по тем же символам, что и \s в re
+    return ' '.join(text.split())
+
+
+def clean_html(html_text: str) -> str:
+    """
+    Удаляет HTML теги и декодирует HTML сущности
+
+    Результат совпадает с последовательностью CDATA -> теги -> unescape ->
+    пробелы, но каждый шаг выполняется только если он что-то меняет
+    (заголовки обычно без разметки и сущностей), а схлопывание пробелов
+    делается одним проходом str.split на C вместо регулярного выражения.
+    Совпадение с прежней реализацией проверяет check_equivalence в
+    benchmarks/bench_text_normalizer.py.
+    """
+    if not html_text:
+        return ""
+    text = html_text
+    if '<' in text:
+        if '<![CDATA[' in text:
+            text = _CDATA_RE.sub(r'\1', text)
+        text = _TAG_RE.sub(' ', text)
+    if '&' in text:
+        text = unescape(text)
+    return normalize_whitespace(text)
+
+
+def preprocess_text(text: str) -> str:
+    """Нижний регистр, схлопнутые пробелы, без ссылок"""
+    text = normalize_whitespace(text.lower())
+    if 'http' in text or 'www' in text:
+        text = _URL_RE.sub('', text)
+    return text
+
+
+def preprocess_classifier_text(title: str, content: str) -> str:
+    """Текст, который подаётся в модель: заголовок дважды, нижний регистр, без ссылок"""
+    return preprocess_text(f"{title} {title} {content}")
@@ -0,0 +1,51 @@
+"""Add news fingerprint with unique index
+
+Revision ID: b81f4e2c6d13
+Revises: a7c3d91e5b02
+Create Date: 2026-10-16 14:32:08.915230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from bot.utils.news_dedup import news_fingerprint
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4e2c6d13'
+down_revision: Union[str, Sequence[str], None] = 'a7c3d91e5b02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('news', sa.Column('fingerprint', sa.String(length=40), nullable=True))
+
+    # Заполняем отпечатки существующих новостей; у повторов остаётся NULL,
+    # чтобы уникальный индекс создался на уже задублированных данных
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, title, source_url FROM news ORDER BY id")).fetchall()
+    seen = set()
+    updates = []
+    for news_id, title, source_url in rows:
+        fingerprint = news_fingerprint(title, source_url)
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        updates.append({'id': news_id, 'fingerprint': fingerprint})
+    if updates:
+        connection.execute(
+            sa.text("UPDATE news SET fingerprint = :fingerprint WHERE id = :id"),
+            updates
+        )
+
+    op.create_index(op.f('ix_news_fingerprint'), 'news', ['fingerprint'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_news_fingerprint'), table_name='news')
+    op.drop_column('news', 'fingerprint')
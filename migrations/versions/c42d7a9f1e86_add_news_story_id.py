@@ -0,0 +1,31 @@
+"""Add news story_id for near-duplicate clustering
+
+Revision ID: c42d7a9f1e86
+Revises: b81f4e2c6d13
+Create Date: 2026-10-16 16:05:44.287311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c42d7a9f1e86'
+down_revision: Union[str, Sequence[str], None] = 'b81f4e2c6d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('news', sa.Column('story_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE news SET story_id = id")
+    op.create_index(op.f('ix_news_story_id'), 'news', ['story_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_news_story_id'), table_name='news')
+    op.drop_column('news', 'story_id')
@@ -0,0 +1,63 @@
+"""Add news full-text search vector and trigram index
+
+Revision ID: f3b9c1d84e20
+Revises: e9a1f6c2d37b
+Create Date: 2026-10-16 19:12:37.604518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9c1d84e20'
+down_revision: Union[str, Sequence[str], None] = 'e9a1f6c2d37b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce({row}content, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('news', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Вектор считается в БД при каждой вставке (в том числе COPY из дампа)
+    # и при изменении заголовка или текста; смена категории его не трогает
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION news_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER news_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, content ON news
+        FOR EACH ROW EXECUTE FUNCTION news_search_vector_update()
+    """)
+    op.execute(f"UPDATE news SET search_vector = {SEARCH_VECTOR_SQL.format(row='')}")
+
+    op.create_index('ix_news_search_vector', 'news', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_news_title_trgm', 'news', ['title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_news_title_trgm', table_name='news', postgresql_using='gin')
+    op.drop_index('ix_news_search_vector', table_name='news', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS news_search_vector_trigger ON news")
+    op.execute("DROP FUNCTION IF EXISTS news_search_vector_update()")
+    op.drop_column('news', 'search_vector')